@@ -6,16 +6,15 @@ Gerenciador visual completo para Assetto Corsa
 """
 
 import os
+import re
 import sys
 import ctypes
 import shutil
 import subprocess
 import json
-import re
-import configparser
-import urllib.request
-import zipfile
-import ssl
+import bisect
+import functools
+import itertools
 
 
 
@@ -43,11 +42,34 @@ def auto_install_packages():
 auto_install_packages()
 
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, filedialog, messagebox, simpledialog
 
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *  
 
+from ac_manager.console import CONSOLE_DIR, STDERR
+from ac_manager.catalog import ContentCatalog, iter_dirs
+from ac_manager.deploy import Deployer
+from ac_manager.fleet import FLEET_FILE, INSTANCE_FIELDS, Fleet, describe_result, op_content, op_upgrade
+from ac_manager.installer import RELEASE_CACHE_DIR, Installer, ReleaseCache
+from ac_manager.jobs import DONE, FAILED, JobScheduler
+from ac_manager.logparse import LOG_STATE_FILE, LogAnalytics
+from ac_manager.logsearch import search_logs
+from ac_manager.metrics import MetricsExporter, MetricsServer
+from ac_manager.scanner import ContentScanner
+from ac_manager.search import SearchIndex
+from ac_manager.ports import PortAllocator, PortConflict, bound_ports, find_conflicts, instance_ports
+from ac_manager.model import WEATHER_LIST, ABS_TC_OPTS, START_RULES, AppSettings, ServerConfig
+from ac_manager.serverconfig import (
+    grid_summary, render_entry_list, car_skins, entry_list_cars, read_server_cfg,
+    read_csp_extra_options, read_text, write_text, write_if_changed, write_server_files,
+)
+from ac_manager.readiness import ReadinessProbe
+from ac_manager.resources import MIN_INTERVAL, ResourceSampler
+from ac_manager.supervisor import Supervisor, describe_event, find_server_exe
+from ac_manager.watcher import ContentWatcher
+
 try:
     from ttkbootstrap.widgets import ToolTip
 except ImportError:
@@ -64,21 +86,14 @@ except ImportError:
 APP_NAME = "AC Server Manager"
 APP_VERSION = "4.0"
 CONFIG_FILE = "ac_manager_config.json"
-GITHUB_API = "https://api.github.com/repos/compujuckel/AssettoServer/releases/latest"
-
-WEATHER_LIST = [
-    "1_heavy_fog", "2_light_fog", "3_clear", "4_mid_clear",
-    "5_light_clouds", "6_mid_clouds", "7_heavy_clouds",
-    "8_rain", "9_thunderstorm",
-]
-
-ABS_TC_OPTS = ["0 - Desligado", "1 - Fabrica", "2 - Forcado Ligado"]
-
-START_RULES = [
-    "0 - Carro Bloqueado na Largada",
-    "1 - Teleporta ao Pit",
-    "2 - Drive-Through Penalidade",
-]
+CATALOG_FILE = "ac_manager_catalog.json"
+SEARCH_DEBOUNCE_MS = 150
+JOB_POLL_MS = 50
+CONSOLE_REFRESH_MS = 250
+CONSOLE_VIEW_LINES = 2000
+LOG_POLL_MS = 5000
+METRICS_APPLY_MS = 800
+TK_VARS = {str: tk.StringVar, int: tk.IntVar, float: tk.DoubleVar, bool: tk.BooleanVar}
 
 LISTBOX_KW = dict(
     bg="#2b2b2b", fg="#e0e0e0",
@@ -95,6 +110,227 @@ def is_admin():
         return False
 
 
+def open_folder(path):
+    """Abre a pasta no gerenciador de arquivos (os.startfile so existe no Windows)."""
+    if hasattr(os, "startfile"):
+        os.startfile(path)
+        return
+    opener = "open" if sys.platform == "darwin" else "xdg-open"
+    try:
+        subprocess.Popen([opener, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        messagebox.showinfo("Pasta", path)
+
+
+def fmt_eta(seconds):
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s" if seconds >= 60 else f"{seconds}s"
+
+
+
+
+
+class VirtualList(ttkb.Frame):
+    """Lista que desenha so as linhas visiveis de uma sequencia.
+
+    A sequencia nao e copiada: `set_items` guarda a referencia e `refresh`
+    redesenha depois de alteracoes feitas nela. `formatter(item)` devolve o
+    texto de cada coluna. Imita a API do tk.Listbox usada no app
+    (curselection, get, size, yview).
+    """
+
+    def __init__(self, parent, columns=(("", 0),), formatter=None, selectmode=tk.BROWSE):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.formatter = formatter or (lambda item: (str(item),))
+        self.selectmode = selectmode
+        self.items = []
+        self.top = 0
+        self.selected = set()
+        self.anchor = None
+        self._rows = []
+        self._widths = []
+
+        self.font = tkfont.Font(font=LISTBOX_KW["font"])
+        self.row_h = self.font.metrics("linespace") + 6
+        self.char_w = max(self.font.measure("0"), 1)
+
+        self.scrollbar = ttkb.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.header = None
+        if len(self.columns) > 1:
+            self.header = tk.Canvas(self, height=self.row_h, bg="#222222", highlightthickness=0)
+            self.header.pack(side="top", fill="x")
+        self.canvas = tk.Canvas(
+            self, bg=LISTBOX_KW["bg"], highlightthickness=1, takefocus=1,
+            highlightcolor=LISTBOX_KW["highlightcolor"], highlightbackground=LISTBOX_KW["bg"],
+        )
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Shift-Button-1>", lambda e: self._on_click(e, shift=True))
+        self.canvas.bind("<Control-Button-1>", lambda e: self._on_click(e, ctrl=True))
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -3 * (e.delta // 120 or (1 if e.delta > 0 else -1)), "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.yview("scroll", -3, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.yview("scroll", 3, "units"))
+        self.canvas.bind("<Up>", lambda e: self._move(-1))
+        self.canvas.bind("<Down>", lambda e: self._move(1))
+        self.canvas.bind("<Prior>", lambda e: self._move(-self._visible()))
+        self.canvas.bind("<Next>", lambda e: self._move(self._visible()))
+
+    def set_items(self, items):
+        self.items = items
+        self.selected.clear()
+        self.anchor = None
+        self.refresh()
+
+    def refresh(self):
+        n = len(self.items)
+        self.selected = {i for i in self.selected if i < n}
+        self.top = max(0, min(self.top, n - self._visible()))
+        self._redraw()
+
+    def update_item(self, index):
+        """Redesenha uma unica linha (O(1)) se ela estiver visivel."""
+        r = index - self.top
+        if 0 <= r < len(self._rows):
+            self._draw_row(r)
+
+    def size(self):
+        return len(self.items)
+
+    def get(self, index):
+        return self.items[index]
+
+    def curselection(self):
+        return tuple(sorted(self.selected))
+
+    def selection_clear(self, *_):
+        self.selected.clear()
+        self._redraw()
+
+    def see(self, index):
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self._visible():
+            self.top = index - self._visible() + 1
+        self.refresh()
+
+    def yview(self, *args):
+        n = len(self.items)
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * n)
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self._visible() if args[2] == "pages" else 1)
+            self.top += step
+        self.refresh()
+
+    def _visible(self):
+        return max(self.canvas.winfo_height() // self.row_h, 1)
+
+    def _fractions(self):
+        n = len(self.items)
+        if not n:
+            return 0.0, 1.0
+        return self.top / n, min((self.top + self._visible()) / n, 1.0)
+
+    def _on_configure(self, event):
+        fixed = sum(w for _, w in self.columns)
+        stretch = [i for i, (_, w) in enumerate(self.columns) if not w]
+        extra = max(event.width - fixed - 8, 40) // max(len(stretch), 1)
+        self._widths = [w or extra for _, w in self.columns]
+
+        count = event.height // self.row_h + 1
+        if count != len(self._rows):
+            self.canvas.delete("all")
+            self._rows = []
+            for r in range(count):
+                y = r * self.row_h
+                rect = self.canvas.create_rectangle(0, y, 0, y + self.row_h, width=0)
+                texts = [self.canvas.create_text(0, y + self.row_h // 2, anchor="w",
+                                                 font=self.font)
+                         for _ in self.columns]
+                self._rows.append((rect, texts))
+        for r, (rect, texts) in enumerate(self._rows):
+            y = r * self.row_h
+            self.canvas.coords(rect, 0, y, event.width, y + self.row_h)
+            x = 6
+            for text, w in zip(texts, self._widths):
+                self.canvas.coords(text, x, y + self.row_h // 2)
+                x += w
+
+        if self.header:
+            self.header.delete("all")
+            x = 6
+            for (title, _), w in zip(self.columns, self._widths):
+                self.header.create_text(x, self.row_h // 2, anchor="w", text=title,
+                                        fill="#9a9a9a", font=self.font)
+                x += w
+        self.refresh()
+
+    def _clip(self, text, width):
+        limit = max(width // self.char_w - 1, 1)
+        return text if len(text) <= limit else text[:limit - 1] + "…"
+
+    def _draw_row(self, r):
+        rect, texts = self._rows[r]
+        i = self.top + r
+        if i >= len(self.items):
+            self.canvas.itemconfigure(rect, state="hidden")
+            for text in texts:
+                self.canvas.itemconfigure(text, state="hidden")
+            return
+        selected = i in self.selected
+        self.canvas.itemconfigure(
+            rect, state="normal",
+            fill=LISTBOX_KW["selectbackground"] if selected else LISTBOX_KW["bg"],
+        )
+        fg = LISTBOX_KW["selectforeground"] if selected else LISTBOX_KW["fg"]
+        for text, value, w in zip(texts, self.formatter(self.items[i]), self._widths):
+            self.canvas.itemconfigure(text, state="normal", fill=fg,
+                                      text=self._clip(str(value), w))
+
+    def _redraw(self):
+        for r in range(len(self._rows)):
+            self._draw_row(r)
+        self.scrollbar.set(*self._fractions())
+
+    def _on_click(self, event, shift=False, ctrl=False):
+        self.canvas.focus_set()
+        i = self.top + event.y // self.row_h
+        if i >= len(self.items):
+            return
+        extended = self.selectmode == tk.EXTENDED
+        if extended and shift and self.anchor is not None:
+            lo, hi = sorted((self.anchor, i))
+            self.selected = set(range(lo, hi + 1))
+        elif extended and ctrl:
+            self.selected ^= {i}
+            self.anchor = i
+        else:
+            self.selected = {i}
+            self.anchor = i
+        self._redraw()
+        self.event_generate("<<ListboxSelect>>")
+
+    def _move(self, step):
+        if not self.items:
+            return
+        current = self.anchor if self.anchor is not None else self.top - step
+        i = max(0, min(current + step, len(self.items) - 1))
+        self.selected = {i}
+        self.anchor = i
+        self.see(i)
+        self.event_generate("<<ListboxSelect>>")
+
+
 
 
 
@@ -104,109 +340,99 @@ class ACServerManager:
         self.root.title(f"{APP_NAME}  v{APP_VERSION}")
 
         
-        self.game_path = tk.StringVar()
-        self.server_path = tk.StringVar()
+        # Modelo tipado; as variaveis Tk (self.server_name, self.udp_port...) sao vistas dele
+        self.settings = AppSettings()
+        self.config = ServerConfig()
+        self._bind_model()
 
         
-        self.server_name = tk.StringVar(value="Meu Servidor AC")
-        self.server_password = tk.StringVar()
-        self.admin_password = tk.StringVar(value="admin1234")
-        self.welcome_msg = tk.StringVar()
-        self.udp_port = tk.IntVar(value=9600)
-        self.tcp_port = tk.IntVar(value=9600)
-        self.http_port = tk.IntVar(value=8081)
-        self.max_clients = tk.IntVar(value=24)
-        self.register_lobby = tk.BooleanVar(value=True)
-        self.pickup_mode = tk.BooleanVar(value=True)
-        self.loop_mode = tk.BooleanVar(value=True)
-        self.locked_entry = tk.BooleanVar(value=False)
-        self.sleep_time = tk.IntVar(value=1)
-        self.client_send_hz = tk.IntVar(value=18)
-        self.num_threads = tk.IntVar(value=2)
-        self.kick_quorum = tk.IntVar(value=85)
-        self.voting_quorum = tk.IntVar(value=80)
-        self.vote_duration = tk.IntVar(value=20)
-
-        
-        self.track_var = tk.StringVar()
-        self.layout_var = tk.StringVar()
         self.pit_boxes_info = tk.StringVar(value="--")
+        self.track_info = tk.StringVar()
         self.track_layouts = {}
 
         
-        self.booking_enabled = tk.BooleanVar(value=False)
-        self.booking_time = tk.IntVar(value=5)
-        self.practice_enabled = tk.BooleanVar(value=True)
-        self.practice_time = tk.IntVar(value=10)
-        self.qualify_enabled = tk.BooleanVar(value=True)
-        self.qualify_time = tk.IntVar(value=10)
-        self.race_laps = tk.IntVar(value=5)
-        self.race_wait_time = tk.IntVar(value=60)
-        self.race_over_time = tk.IntVar(value=180)
-        self.result_screen_time = tk.IntVar(value=60)
-        self.reversed_grid = tk.IntVar(value=0)
-        self.qualify_max_wait = tk.IntVar(value=120)
-
-        
-        self.abs_mode = tk.StringVar(value="1 - Fabrica")
-        self.tc_mode = tk.StringVar(value="1 - Fabrica")
-        self.stability_allowed = tk.BooleanVar(value=False)
-        self.autoclutch_allowed = tk.BooleanVar(value=True)
-        self.tyre_blankets = tk.BooleanVar(value=True)
-        self.force_virtual_mirror = tk.BooleanVar(value=False)
-        self.damage_rate = tk.IntVar(value=50)
-        self.fuel_rate = tk.IntVar(value=100)
-        self.tyre_wear = tk.IntVar(value=100)
-        self.pit_speed_limit = tk.IntVar(value=80)
-        self.allowed_tyres_out = tk.IntVar(value=2)
-        self.start_rule = tk.StringVar(value=START_RULES[0])
-        self.race_gas_penalty = tk.BooleanVar(value=False)
-        self.max_contacts_km = tk.IntVar(value=-1)
-        self.legal_tyres = tk.StringVar(value="V;E;H;M;S;SS;US;ST;I;W")
-        self.max_ballast = tk.IntVar(value=0)
-        self.pit_window_start = tk.IntVar(value=0)
-        self.pit_window_end = tk.IntVar(value=0)
-
-        # AssettoServer extra_cfg.yml
-        self.use_steam_auth = tk.BooleanVar(value=True)
-        self.checksum_check = tk.BooleanVar(value=True)
-
-        
-        self.csp_disable_pit_limiter = tk.BooleanVar(value=False)
-        self.csp_pit_speed = tk.IntVar(value=80)
-        self.csp_keep_collisions = tk.BooleanVar(value=False)
-        self.csp_allow_wrong_way = tk.BooleanVar(value=True)
-
-        
-        self.weather_type = tk.StringVar(value="3_clear")
-        self.temp_ambient = tk.IntVar(value=26)
-        self.temp_var_ambient = tk.IntVar(value=2)
-        self.temp_road = tk.IntVar(value=34)
-        self.temp_var_road = tk.IntVar(value=2)
-        self.sun_angle = tk.DoubleVar(value=0)
-        self.time_mult = tk.IntVar(value=1)
-        self.wind_min = tk.IntVar(value=0)
-        self.wind_max = tk.IntVar(value=5)
-        self.wind_dir = tk.IntVar(value=30)
-        self.wind_var = tk.IntVar(value=15)
-
-        
-        self.dyn_start = tk.IntVar(value=95)
-        self.dyn_random = tk.IntVar(value=1)
-        self.dyn_lap_gain = tk.IntVar(value=15)
-        self.dyn_transfer = tk.IntVar(value=90)
-
-        
         self.server_cars = []
-        self.all_game_cars = []
-        self.server_process = None
+        self.car_index = SearchIndex()
+        self.all_game_cars = self.car_index.names
+        self._filter_job = None
+        self.car_meta = {}
+        self.jobs = JobScheduler()
+        self.supervisor = Supervisor(self.jobs, on_event=self._on_server_event)
+        self._restarting = None
+        self._console_seq = 0
+        self.catalog = ContentCatalog(CATALOG_FILE)
+        self.scanner = ContentScanner(self.catalog, self.jobs)
+        self._shown_cars = []
+        self._track_names = []
+        self._watch_job = None
+        self._watch_flush = None
+        self._changed_tracks = set()
+        self._grid_dirty = False
+        self.server_content = {"cars": None, "tracks": None}
+        self.deployer = Deployer()
+        self.installer = Installer(ReleaseCache(RELEASE_CACHE_DIR))
+        self.fleet = Fleet(FLEET_FILE, self.supervisor).load()
+        self._fleet_names = self.fleet.names()
+        self._fleet_status = {}
+        self.analytics = LogAnalytics(LOG_STATE_FILE)
+        self.sampler = ResourceSampler(self.supervisor)
+        self._sampling = self.sampler.available
+        self._resource_mark = None
+        self.metrics = MetricsExporter(self.supervisor, self.sampler if self._sampling else None,
+                                       self.analytics, self.jobs)
+        self._metrics_job = None
 
         self._load_config()
         self._build_ui()
+        self.root.after(JOB_POLL_MS, self._poll_jobs)
+        self.root.after(CONSOLE_REFRESH_MS, self._console_tick)
+        self.root.after(LOG_POLL_MS, self._logs_tick)
+        if self._sampling:
+            self.sampler.interval = self.settings.sample_interval
+            self.sample_interval.trace_add("write", self._on_sample_interval)
+            self.jobs.submit("resources", self.sampler.run, dedicated=True)
+        self._apply_metrics()
+        for var in (self.metrics_enabled, self.metrics_port, self.metrics_host):
+            var.trace_add("write", self._on_metrics_setting)
 
         if self.game_path.get() and self.server_path.get():
             self._refresh_all()
 
+    def _poll_jobs(self):
+        """Unico poller da interface: aplica progresso e resultados dos jobs."""
+        self.jobs.poll()
+        self.root.after(JOB_POLL_MS, self._poll_jobs)
+
+    def _model_fields(self):
+        for name, kind in AppSettings.field_types().items():
+            yield "settings", None, name, kind
+        for sec, name, kind in ServerConfig.fields():
+            yield "config", sec, name, kind
+
+    def _model_section(self, owner, sec):
+        obj = getattr(self, owner)
+        return getattr(obj, sec) if sec else obj
+
+    def _bind_model(self):
+        """Cria uma variavel Tk por campo do modelo; escrever nela atualiza o modelo."""
+        for owner, sec, name, kind in self._model_fields():
+            var = TK_VARS[kind](value=getattr(self._model_section(owner, sec), name))
+            var.trace_add("write", functools.partial(self._on_var_write, owner, sec, name, var))
+            setattr(self, name, var)
+
+    def _on_var_write(self, owner, sec, name, var, *_):
+        try:
+            value = var.get()
+        except (tk.TclError, ValueError):
+            # Campo numerico no meio da digitacao: o modelo guarda o ultimo valor valido
+            return
+        setattr(self._model_section(owner, sec), name, value)
+
+    def _push_model(self):
+        """Copia o modelo para as variaveis Tk (depois de carregar um arquivo)."""
+        for owner, sec, name, _ in self._model_fields():
+            getattr(self, name).set(getattr(self._model_section(owner, sec), name))
+
     
     
     
@@ -266,6 +492,9 @@ class ACServerManager:
             "  Pista & Sessoes  ": self._build_tab_track,
             "  Realismo  ": self._build_tab_realism,
             "  Clima  ": self._build_tab_weather,
+            "  Frota  ": self._build_tab_fleet,
+            "  Console  ": self._build_tab_console,
+            "  Logs  ": self._build_tab_logs,
         }
         for label, builder in tabs.items():
             frame = ttkb.Frame(self.nb)
@@ -279,6 +508,8 @@ class ACServerManager:
 
         self._path_row(frm, "Pasta do Jogo (Steam):", self.game_path)
         self._path_row(frm, "Pasta do Servidor:", self.server_path)
+        self._check_row(frm, "Copiar so o pacote do servidor (minimo)", self.server_pack)
+        ToolTip(frm.winfo_children()[-1], text="Leva para o servidor so o que ele usa: data.acd, collider, ui_*.json,\nnomes das skins, surfaces.ini, mapa e linhas de IA.\nModelos, texturas e sons ficam so no jogo (bem menos espaco e tempo de copia).")
 
         ttkb.Separator(parent, orient="horizontal").pack(fill="x", padx=15, pady=8)
 
@@ -288,6 +519,23 @@ class ACServerManager:
         )
         btn.pack(pady=10, padx=30, fill="x", ipady=8)
         ToolTip(btn, text="Baixa a versao mais recente do AssettoServer e configura automaticamente")
+        off = ttkb.Checkbutton(parent, text="Instalar offline (usar versao ja baixada)",
+                               variable=self.offline_install, bootstyle="success-round-toggle")
+        off.pack(padx=30, anchor="w")
+        ToolTip(off, text="Usa o zip guardado em ac_manager_releases sem consultar o GitHub.\nSem internet isso ja acontece automaticamente se houver uma versao no cache.")
+        row = ttkb.Frame(parent)
+        row.pack(padx=30, pady=(6, 0), anchor="w")
+        met = ttkb.Checkbutton(row, text="Metricas Prometheus (/metrics) na porta",
+                               variable=self.metrics_enabled, bootstyle="success-round-toggle")
+        met.pack(side="left")
+        ttkb.Spinbox(row, from_=1024, to=65535, textvariable=self.metrics_port, width=7).pack(side="left", padx=5)
+        ttkb.Label(row, text="endereco").pack(side="left", padx=(5, 0))
+        host = ttkb.Entry(row, textvariable=self.metrics_host, width=14)
+        host.pack(side="left", padx=5)
+        ToolTip(met, text="Estado, reinicios, tempo ate ficar pronto, CPU, memoria e pilotos de cada servidor,\n"
+                          "mais a duracao das operacoes do app, para o Prometheus coletar por HTTP.")
+        ToolTip(host, text="127.0.0.1 (padrao): so esta maquina acessa as metricas.\n"
+                           "0.0.0.0: qualquer maquina da rede (libere a porta so para o Prometheus).")
 
         info = ttkb.Frame(parent)
         info.pack(pady=10)
@@ -335,6 +583,9 @@ class ACServerManager:
         ToolTip(col2.winfo_children()[-1], text="Porta TCP usada para conexao inicial e troca de dados.\nNormalmente igual a porta UDP.\nTambem precisa estar aberta no firewall/roteador.")
         self._spin_row(col2, "Porta HTTP:", self.http_port, 1024, 65535)
         ToolTip(col2.winfo_children()[-1], text="Porta HTTP para a pagina de informacoes do servidor.\nPermite ver status do servidor pelo navegador (ex: http://seuip:8081).\nSe nao for usar, pode deixar o padrao 8081.")
+        fp = ttkb.Button(col2, text="Usar Portas Livres", bootstyle="info-outline", command=self._suggest_ports)
+        fp.pack(anchor="e", pady=(4, 0))
+        ToolTip(fp, text="Escolhe portas UDP/TCP/HTTP que nenhuma instancia da frota\nnem outro programa desta maquina esteja usando.")
 
         ttkb.Separator(col2, orient="horizontal").pack(fill="x", pady=10)
 
@@ -377,16 +628,21 @@ class ACServerManager:
         left.pack(side="left", fill="both", expand=True)
 
         self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", self._filter_cars)
+        self.search_var.trace_add("write", self._schedule_filter)
         se = ttkb.Entry(left, textvariable=self.search_var, bootstyle="info")
         se.pack(fill="x", padx=5, pady=(5, 2))
         ToolTip(se, text="Digite para filtrar carros")
-
-        self.lb_game = tk.Listbox(left, selectmode=tk.EXTENDED, **LISTBOX_KW)
-        sb1 = ttkb.Scrollbar(left, orient="vertical", command=self.lb_game.yview)
-        self.lb_game.configure(yscrollcommand=sb1.set)
-        sb1.pack(side="right", fill="y", padx=(0, 5), pady=5)
-        self.lb_game.pack(fill="both", expand=True, padx=(5, 0), pady=5)
+        fz = ttkb.Checkbutton(left, text="Busca aproximada", variable=self.fuzzy_search,
+                              bootstyle="info-round-toggle", command=self._schedule_filter)
+        fz.pack(anchor="w", padx=5, pady=(0, 2))
+        ToolTip(fz, text="Aceita letras fora de sequencia (ex: 'f40' acha 'ferrari_f40')\ne ordena pelos resultados mais parecidos")
+
+        self.lb_game = VirtualList(
+            left, columns=(("Carro", 0), ("Marca", 110), ("Classe", 80), ("Skins", 50)),
+            formatter=self._game_car_row, selectmode=tk.EXTENDED,
+        )
+        self.lb_game.pack(fill="both", expand=True, padx=5, pady=5)
+        self.lb_game.set_items(self._shown_cars)
 
         mid = ttkb.Frame(main, padding=10)
         mid.pack(side="left", fill="y")
@@ -400,6 +656,10 @@ class ACServerManager:
 
         ttkb.Button(mid, text="Limpar Grid", bootstyle="warning-outline",
                     command=self._clear_grid, width=15).pack(pady=6)
+        cc = ttkb.Button(mid, text="Cancelar Copia", bootstyle="secondary-outline",
+                         command=self._cancel_deploys, width=15)
+        cc.pack(pady=6)
+        ToolTip(cc, text="Interrompe as copias de carros/pistas em andamento.\nO que ja foi copiado e aproveitado na proxima vez.")
 
         self.grid_count_var = tk.StringVar(value="Grid: 0")
         ttkb.Label(mid, textvariable=self.grid_count_var,
@@ -408,11 +668,12 @@ class ACServerManager:
         right = ttk.LabelFrame(main, text="  Grid do Servidor  ", padding=5)
         right.pack(side="left", fill="both", expand=True)
 
-        self.lb_grid = tk.Listbox(right, **LISTBOX_KW)
-        sb2 = ttkb.Scrollbar(right, orient="vertical", command=self.lb_grid.yview)
-        self.lb_grid.configure(yscrollcommand=sb2.set)
-        sb2.pack(side="right", fill="y", padx=(0, 5), pady=5)
-        self.lb_grid.pack(fill="both", expand=True, padx=(5, 0), pady=5)
+        self.lb_grid = VirtualList(
+            right, columns=(("Qtd", 50), ("Carro", 0), ("Skins", 50), ("Status", 130)),
+            formatter=self._grid_row,
+        )
+        self.lb_grid.pack(fill="both", expand=True, padx=5, pady=5)
+        self.lb_grid.set_items(self.server_cars)
 
     
     def _build_tab_track(self, parent):
@@ -444,6 +705,8 @@ class ACServerManager:
                    font=("Segoe UI", 20, "bold"), bootstyle="warning").pack(pady=5)
         ttkb.Label(pit_frame, text="(Max. Jogadores deve ser <= Pit Boxes)",
                    bootstyle="secondary", font=("Segoe UI", 8)).pack()
+        ttkb.Label(pit_frame, textvariable=self.track_info, bootstyle="info",
+                   wraplength=320, justify="left").pack(anchor="w", pady=(6, 0))
 
         ttkb.Separator(col1, orient="horizontal").pack(fill="x", pady=10)
 
@@ -617,6 +880,134 @@ class ACServerManager:
         ToolTip(c3.winfo_children()[-1], text="% do grip mantido entre sessoes")
 
     
+    def _build_tab_fleet(self, parent):
+        main = ttkb.Frame(parent)
+        main.pack(fill="both", expand=True, padx=10, pady=8)
+
+        left = ttk.LabelFrame(main, text="  Instancias  ", padding=5)
+        left.pack(side="left", fill="both", expand=True)
+        self.lb_fleet = VirtualList(
+            left, columns=(("Instancia", 120), ("Pasta", 0), ("Pista", 130), ("Portas", 150),
+                           ("Pilotos", 60), ("Estado", 190)),
+            formatter=self._fleet_row, selectmode=tk.EXTENDED,
+        )
+        self.lb_fleet.pack(fill="both", expand=True, padx=5, pady=5)
+        self.lb_fleet.set_items(self._fleet_names)
+        ttkb.Label(left, text="Sem selecao, as acoes em lote valem para todas as instancias.",
+                   bootstyle="secondary").pack(anchor="w", padx=5)
+
+        right = ttkb.Frame(main, padding=10)
+        right.pack(side="left", fill="y")
+
+        ttkb.Button(right, text="Adicionar Atual", bootstyle="success",
+                    command=self._fleet_add_current, width=20).pack(pady=4)
+        ttkb.Button(right, text="Importar Pasta...", bootstyle="success-outline",
+                    command=self._fleet_import, width=20).pack(pady=4)
+        ttkb.Button(right, text="Abrir no Editor", bootstyle="info",
+                    command=self._fleet_open, width=20).pack(pady=4)
+        ttkb.Button(right, text="Remover", bootstyle="danger-outline",
+                    command=self._fleet_remove, width=20).pack(pady=4)
+
+        ttkb.Separator(right, orient="horizontal").pack(fill="x", pady=10)
+
+        ap = ttkb.Button(right, text="Aplicar Config Atual", bootstyle="warning",
+                         command=self._fleet_apply, width=20)
+        ap.pack(pady=4)
+        ToolTip(ap, text="Copia a configuracao e o grid do editor para as instancias e salva todas.\nNome e portas de cada instancia sao mantidos.")
+        for text, command in (
+            ("Salvar", lambda: self._fleet_bulk("salvar", self.fleet.operation("save"))),
+            ("Gerar Entry List", lambda: self._fleet_bulk("entry list", self.fleet.operation("entry-list"))),
+            ("Copiar Conteudo", self._fleet_content),
+            ("Iniciar", lambda: self._fleet_bulk("iniciar", self.fleet.operation("start"))),
+            ("Parar", lambda: self._fleet_bulk("parar", self.fleet.operation("stop"))),
+            ("Atualizar AssettoServer", lambda: self._fleet_bulk(
+                "atualizar", op_upgrade(self.installer, self.offline_install.get()))),
+        ):
+            ttkb.Button(right, text=text, bootstyle="info-outline", command=command, width=20).pack(pady=4)
+
+    
+    
+    
+    def _build_tab_console(self, parent):
+        bar = ttkb.Frame(parent, padding=(10, 8, 10, 0))
+        bar.pack(fill="x")
+        ttkb.Label(bar, text="Servidor:").pack(side="left")
+        self.console_target = tk.StringVar()
+        self.cb_console = ttkb.Combobox(bar, textvariable=self.console_target, state="readonly", width=40)
+        self.cb_console.pack(side="left", padx=5)
+        self.cb_console.bind("<<ComboboxSelected>>", lambda e: self._console_reset())
+        self.console_follow = tk.BooleanVar(value=True)
+        ttkb.Checkbutton(bar, text="Rolar automaticamente", variable=self.console_follow,
+                         bootstyle="info-round-toggle").pack(side="left", padx=10)
+        ttkb.Label(bar, text="Amostra (s):").pack(side="left", padx=(10, 0))
+        sp = ttkb.Spinbox(bar, from_=MIN_INTERVAL, to=60, increment=0.5,
+                          textvariable=self.sample_interval, width=5)
+        sp.pack(side="left", padx=5)
+        ToolTip(sp, text="Intervalo entre as leituras de CPU, memoria, threads e sockets do servidor (/proc).")
+        ttkb.Button(bar, text="Abrir Logs", bootstyle="secondary-outline",
+                    command=self._console_open_logs, width=14).pack(side="right", padx=4)
+        ttkb.Button(bar, text="Limpar", bootstyle="secondary-outline",
+                    command=self._console_clear, width=10).pack(side="right", padx=4)
+
+        box = ttkb.Frame(parent, padding=10)
+        box.pack(fill="both", expand=True)
+        self.txt_console = tk.Text(
+            box, wrap="none", state="disabled", undo=False,
+            bg="#1e1e1e", fg="#d4d4d4", font=("Consolas", 9), relief="flat", borderwidth=0,
+        )
+        ys = ttkb.Scrollbar(box, orient="vertical", command=self.txt_console.yview)
+        self.txt_console.configure(yscrollcommand=ys.set)
+        ys.pack(side="right", fill="y")
+        self.txt_console.pack(fill="both", expand=True)
+        self.txt_console.tag_configure("err", foreground="#e06c75")
+        self.txt_console.tag_configure("note", foreground="#888888")
+
+        self.console_resources = tk.StringVar(value=(
+            "Aguardando amostras de CPU e memoria..." if self._sampling
+            else "Uso de CPU e memoria: disponivel so com /proc (Linux)"))
+        tk.Label(parent, textvariable=self.console_resources, justify="left", anchor="w",
+                 bg="#1e1e1e", fg="#9cdcfe", font=("Consolas", 9), padx=10, pady=4).pack(fill="x", padx=10)
+        self.console_stats = tk.StringVar(value="Sem eventos do log ainda")
+        ttkb.Label(parent, textvariable=self.console_stats, bootstyle="info",
+                   padding=(10, 0, 10, 8)).pack(fill="x")
+
+    def _build_tab_logs(self, parent):
+        bar = ttkb.Frame(parent, padding=(10, 8, 10, 0))
+        bar.pack(fill="x")
+        ttkb.Label(bar, text="Buscar:").pack(side="left")
+        self.log_query = tk.StringVar()
+        entry = ttkb.Entry(bar, textvariable=self.log_query, bootstyle="info")
+        entry.pack(side="left", fill="x", expand=True, padx=5)
+        entry.bind("<Return>", lambda e: self._search_logs())
+        ToolTip(entry, text="Todos os termos sao obrigatorios.\n"
+                            "GUID, piloto:NOME e erro:PALAVRA usam o indice (erro: sozinho = todos os erros);\n"
+                            "qualquer outro texto e procurado direto nos arquivos.")
+        self.log_scope = tk.StringVar(value="Servidor atual")
+        ttkb.Combobox(bar, textvariable=self.log_scope, state="readonly", width=14,
+                      values=("Servidor atual", "Toda a frota")).pack(side="left", padx=5)
+        self.log_since = tk.StringVar()
+        self.log_until = tk.StringVar()
+        for label, var in (("De:", self.log_since), ("Ate:", self.log_until)):
+            ttkb.Label(bar, text=label).pack(side="left", padx=(5, 0))
+            ttkb.Entry(bar, textvariable=var, width=11).pack(side="left", padx=5)
+        ttkb.Button(bar, text="Buscar", bootstyle="info",
+                    command=self._search_logs, width=10).pack(side="left", padx=4)
+
+        box = ttkb.Frame(parent, padding=10)
+        box.pack(fill="both", expand=True)
+        self._log_hits = []
+        self.lb_log_hits = VirtualList(
+            box, columns=(("Servidor", 140), ("Data", 90), ("Linha", 0)),
+            formatter=lambda item: (item[0], item[1].day, item[1].line),
+        )
+        self.lb_log_hits.pack(fill="both", expand=True)
+        self.lb_log_hits.set_items(self._log_hits)
+
+        self.log_search_status = tk.StringVar(value="Datas no formato AAAA-MM-DD (opcionais)")
+        ttkb.Label(parent, textvariable=self.log_search_status, bootstyle="info",
+                   padding=(10, 0, 10, 8)).pack(fill="x")
+
+    
     
     
     def _path_row(self, parent, label, variable):
@@ -649,21 +1040,18 @@ class ACServerManager:
     
     
     def _refresh_tracks(self):
-        tracks_dir = os.path.join(self.game_path.get(), "content", "tracks")
-        if not os.path.isdir(tracks_dir):
-            return
-        tracks = sorted(d for d in os.listdir(tracks_dir)
-                        if os.path.isdir(os.path.join(tracks_dir, d)))
-        self.combo_track["values"] = tracks
-        if tracks and not self.track_var.get():
-            self.combo_track.current(0)
-            self._on_track_change()
+        self._start_scan(("tracks",))
 
     def _on_track_change(self, event=None):
         track = self.track_var.get()
         if not track:
             return
-        self.track_layouts = self._detect_layouts(track)
+        layouts = self.catalog.cached_layouts(self.game_path.get(), track)
+        if layouts is None:
+            # Pista ainda nao lida pela varredura em segundo plano
+            layouts = self.catalog.layouts(self.game_path.get(), track)
+            self.catalog.save()
+        self.track_layouts = layouts
         layout_names = list(self.track_layouts.keys())
         self.combo_layout["values"] = layout_names
         if layout_names:
@@ -671,54 +1059,59 @@ class ACServerManager:
         self._on_layout_change()
 
     def _on_layout_change(self, event=None):
-        layout = self.layout_var.get()
-        pits = self.track_layouts.get(layout, 0)
+        meta = self.track_layouts.get(self.layout_var.get())
+        pits = meta["pitboxes"] if meta else 0
         self.pit_boxes_info.set(str(pits) if pits > 0 else "? (nao detectado)")
-
-    def _detect_layouts(self, track_name):
-        track_dir = os.path.join(self.game_path.get(), "content", "tracks", track_name)
-        ui_dir = os.path.join(track_dir, "ui")
-        layouts = {}
-
-        if not os.path.isdir(ui_dir):
-            return {"": 0}
-
-        for item in sorted(os.listdir(ui_dir)):
-            sub = os.path.join(ui_dir, item)
-            if os.path.isdir(sub):
-                jf = os.path.join(sub, "ui_track.json")
-                if os.path.exists(jf):
-                    layouts[item] = self._read_pitboxes(jf)
-
-        if not layouts:
-            main_json = os.path.join(ui_dir, "ui_track.json")
-            if os.path.exists(main_json):
-                layouts[""] = self._read_pitboxes(main_json)
-            else:
-                layouts[""] = 0
-
-        return layouts
-
-    def _read_pitboxes(self, json_path):
-        try:
-            with open(json_path, "r", encoding="utf-8-sig") as f:
-                content = f.read()
-            content = re.sub(r",\s*}", "}", content)
-            content = re.sub(r",\s*]", "]", content)
-            data = json.loads(content)
-            return int(data.get("pitboxes", 0))
-        except Exception:
-            return 0
+        info = []
+        if meta:
+            for label, key in (("Pais", "country"), ("Comprimento", "length"),
+                               ("Largura", "width"), ("Sentido", "run")):
+                if meta[key]:
+                    info.append(f"{label}: {meta[key]}")
+            if meta["tags"]:
+                info.append("Tags: " + ", ".join(meta["tags"]))
+        self.track_info.set("\n".join(info))
+
+    def _reload_track_meta(self):
+        """Atualiza os layouts da pista atual depois da leitura em lote, mantendo o layout escolhido."""
+        track = self.track_var.get()
+        layouts = self.catalog.cached_layouts(self.game_path.get(), track) if track else None
+        if layouts is None:
+            return
+        self.track_layouts = layouts
+        self.combo_layout["values"] = list(layouts.keys())
+        if self.layout_var.get() not in layouts and layouts:
+            self.layout_var.set(next(iter(layouts)))
+        self._on_layout_change()
 
     
     
     
+    def _schedule_filter(self, *_):
+        if self._filter_job:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(SEARCH_DEBOUNCE_MS, self._filter_cars)
+
     def _filter_cars(self, *_):
-        term = self.search_var.get().lower()
-        self.lb_game.delete(0, tk.END)
-        for car in self.all_game_cars:
-            if term in car.lower():
-                self.lb_game.insert(tk.END, car)
+        self._filter_job = None
+        self._show_cars(self.car_index.search(self.search_var.get(), self.fuzzy_search.get()))
+
+    def _show_cars(self, new):
+        # A lista virtual so redesenha as linhas visiveis, qualquer que seja o tamanho
+        self._shown_cars = new
+        self.lb_game.set_items(new)
+
+    def _game_car_row(self, name):
+        meta = self.car_meta.get(name)
+        if not meta:
+            return name, "", "", ""
+        return name, meta["brand"], meta["class"], meta["skins"]
+
+    def _grid_row(self, item):
+        meta = self.car_meta.get(item["model"])
+        deployed = self.server_content["cars"]
+        status = "falta no servidor" if deployed is not None and item["model"] not in deployed else ""
+        return f"{item['qty']}x", item["model"], meta["skins"] if meta else "", status
 
     def _add_car(self):
         sel = self.lb_game.curselection()
@@ -732,20 +1125,11 @@ class ACServerManager:
         if not qty:
             return
 
-        src = os.path.join(self.game_path.get(), "content", "cars", car_name)
-        dst_dir = os.path.join(self.server_path.get(), "content", "cars")
-        dst = os.path.join(dst_dir, car_name)
-        if not os.path.exists(dst_dir):
-            os.makedirs(dst_dir)
-        if not os.path.exists(dst):
-            try:
-                os.symlink(src, dst, target_is_directory=True)
-            except (OSError, NotImplementedError):
-                try:
-                    shutil.copytree(src, dst)
-                except Exception as e:
-                    messagebox.showerror("Erro", f"Falha ao copiar carro:\n{e}")
-                    return
+        try:
+            self._deploy_content("cars", car_name)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Falha ao copiar carro:\n{e}")
+            return
 
         self.server_cars.append({"model": car_name, "qty": qty})
         self._update_grid_ui()
@@ -765,11 +1149,11 @@ class ACServerManager:
             self._update_grid_ui()
 
     def _update_grid_ui(self):
-        self.lb_grid.delete(0, tk.END)
-        total = 0
-        for item in self.server_cars:
-            self.lb_grid.insert(tk.END, f"  {item['qty']}x  |  {item['model']}")
-            total += item["qty"]
+        if self.lb_grid.items is not self.server_cars:
+            self.lb_grid.set_items(self.server_cars)
+        else:
+            self.lb_grid.refresh()
+        total = sum(item["qty"] for item in self.server_cars)
         self.grid_count_var.set(f"Grid: {total}")
 
         for i in range(self.nb.index("end")):
@@ -781,20 +1165,147 @@ class ACServerManager:
     
     
     def _refresh_all(self):
-        self.lb_game.delete(0, tk.END)
-        self.all_game_cars = []
-        cars_dir = os.path.join(self.game_path.get(), "content", "cars")
-        if os.path.isdir(cars_dir):
-            self.all_game_cars = sorted(
-                d for d in os.listdir(cars_dir)
-                if os.path.isdir(os.path.join(cars_dir, d))
-            )
-            for c in self.all_game_cars:
-                self.lb_game.insert(tk.END, c)
-        self._refresh_tracks()
+        self._start_scan(("cars", "tracks"))
+        self._start_watcher()
         self._load_server_config()
         self._update_grid_ui()
 
+    def _start_watcher(self):
+        """(Re)inicia a observacao das pastas de conteudo do jogo e do servidor."""
+        if self._watch_job:
+            self._watch_job.cancel()
+        game = os.path.join(self.game_path.get(), "content")
+        srv = os.path.join(self.server_path.get(), "content")
+        for kind in ("cars", "tracks"):
+            folder = os.path.join(srv, kind)
+            self.server_content[kind] = set(iter_dirs(folder)) if self.server_path.get() else None
+        watcher = ContentWatcher([
+            ("cars", os.path.join(game, "cars"), False),
+            ("tracks", os.path.join(game, "tracks"), True),
+            ("server_cars", os.path.join(srv, "cars"), False),
+            ("server_tracks", os.path.join(srv, "tracks"), False),
+        ])
+        self._watch_job = self.jobs.submit(
+            "watch", lambda job, _: watcher.run(job.cancel_event, job.emit),
+            dedicated=True, on_message=self._on_watch_event,
+        )
+
+    def _on_watch_event(self, event):
+        label, op, name, old = event
+        if op == "resync":
+            if label in ("cars", "tracks"):
+                self._start_scan((label,))
+            else:
+                self._start_watcher()
+            return
+        if op in ("remove", "rename"):
+            self._remove_content(label, old if op == "rename" else name)
+        if op in ("add", "rename"):
+            self._add_content(label, name)
+        if label == "tracks" and op != "remove":
+            self._changed_tracks.add(name)
+        self._grid_dirty = self._grid_dirty or label == "server_cars"
+        if self._watch_flush is None:
+            # Junta os eventos da mesma rodada do poller
+            self._watch_flush = self.root.after_idle(self._flush_watch_events)
+
+    def _flush_watch_events(self):
+        self._watch_flush = None
+        tracks, self._changed_tracks = self._changed_tracks, set()
+        if tracks:
+            game = self.game_path.get()
+            self.jobs.submit(
+                "layouts", lambda job, _: self._reload_layouts(game, tracks),
+                on_done=lambda _: self._reload_track_meta() if self.track_var.get() in tracks else None,
+            )
+        if self._grid_dirty:
+            self._grid_dirty = False
+            self._update_grid_ui()
+
+    def _reload_layouts(self, game, tracks):
+        for track in tracks:
+            self.catalog.layouts(game, track)
+        self.catalog.save()
+
+    def _add_content(self, label, name):
+        if label == "cars":
+            self.catalog.car_meta(self.game_path.get(), name)
+            self._insert_game_cars([name])
+        elif label == "tracks":
+            if name not in self._track_names:
+                bisect.insort(self._track_names, name)
+                self.combo_track["values"] = self._track_names
+        elif self.server_content[label.split("_", 1)[1]] is not None:
+            self.server_content[label.split("_", 1)[1]].add(name)
+
+    def _remove_content(self, label, name):
+        if label == "cars":
+            self.car_index.remove(name)
+            if name in self._shown_cars:
+                self._shown_cars.remove(name)
+                self.lb_game.set_items(self._shown_cars)
+        elif label == "tracks":
+            if name in self._track_names:
+                self._track_names.remove(name)
+                self.combo_track["values"] = self._track_names
+        elif self.server_content[label.split("_", 1)[1]] is not None:
+            self.server_content[label.split("_", 1)[1]].discard(name)
+
+    def _start_scan(self, kinds):
+        """Dispara a leitura em segundo plano; cancela a leitura anterior."""
+        self.scanner.start(self.game_path.get(), kinds,
+                           on_message=self._on_scan_message, on_done=self._on_scan_done)
+        if "cars" in kinds:
+            self.car_index.clear()
+            self.all_game_cars = self.car_index.names
+            self._shown_cars = []
+            self.lb_game.set_items(self._shown_cars)
+            self.car_meta = self.catalog.car_meta_map(self.game_path.get()) if self.game_path.get() else {}
+        if "tracks" in kinds:
+            self._track_names = []
+            self.combo_track["values"] = []
+        self.status_var.set("Lendo conteudo do jogo...")
+
+    def _on_scan_message(self, message):
+        kind, op, names = message
+        if op == "batch":
+            if kind == "cars":
+                self._insert_game_cars(names)
+            else:
+                for name in names:
+                    bisect.insort(self._track_names, name)
+                self.combo_track["values"] = self._track_names
+        elif op == "meta" and kind == "cars":
+            self.lb_game.refresh()
+            self.lb_grid.refresh()
+        elif op == "meta":
+            self._reload_track_meta()
+        elif kind == "tracks" and self._track_names and not self.track_var.get():
+            self.combo_track.current(0)
+            self._on_track_change()
+
+    def _on_scan_done(self, _):
+        if not self.scanner.busy():
+            self.status_var.set(
+                f"Conteudo carregado: {len(self.all_game_cars)} carros, "
+                f"{len(self._track_names)} pistas"
+            )
+
+    def _insert_game_cars(self, names):
+        filtering = bool(self.search_var.get().strip())
+        added = False
+        for name in names:
+            if name in self.car_index:
+                continue
+            self.car_index.add(name)
+            added = True
+            if not filtering:
+                bisect.insort(self._shown_cars, name)
+        if added and filtering:
+            self._schedule_filter()
+        elif added:
+            self.lb_game.refresh()
+
     
     
     
@@ -819,215 +1330,19 @@ class ACServerManager:
             return
 
         try:
-            config = configparser.ConfigParser(strict=False)
-            config.optionxform = str  
-            config.read(cfg_path, encoding="utf-8")
-
-            
-            if config.has_section("SERVER"):
-                s = config["SERVER"]
-
-                
-                str_map = {
-                    "NAME": self.server_name,
-                    "PASSWORD": self.server_password,
-                    "ADMIN_PASSWORD": self.admin_password,
-                    "WELCOME_MESSAGE": self.welcome_msg,
-                    "LEGAL_TYRES": self.legal_tyres,
-                }
-                for key, var in str_map.items():
-                    if key in s:
-                        var.set(s[key])
-
-                
-                int_map = {
-                    "UDP_PORT": self.udp_port,
-                    "TCP_PORT": self.tcp_port,
-                    "HTTP_PORT": self.http_port,
-                    "MAX_CLIENTS": self.max_clients,
-                    "SLEEP_TIME": self.sleep_time,
-                    "CLIENT_SEND_INTERVAL_HZ": self.client_send_hz,
-                    "NUM_THREADS": self.num_threads,
-                    "KICK_QUORUM": self.kick_quorum,
-                    "VOTING_QUORUM": self.voting_quorum,
-                    "VOTE_DURATION": self.vote_duration,
-                    "MAX_BALLAST_KG": self.max_ballast,
-                    "QUALIFY_MAX_WAIT_PERC": self.qualify_max_wait,
-                    "RACE_PIT_WINDOW_START": self.pit_window_start,
-                    "RACE_PIT_WINDOW_END": self.pit_window_end,
-                    "REVERSED_GRID_RACE_POSITIONS": self.reversed_grid,
-                    "FUEL_RATE": self.fuel_rate,
-                    "DAMAGE_MULTIPLIER": self.damage_rate,
-                    "TYRE_WEAR_RATE": self.tyre_wear,
-                    "ALLOWED_TYRES_OUT": self.allowed_tyres_out,
-                    "PIT_SPEED_LIMIT": self.pit_speed_limit,
-                    "RACE_OVER_TIME": self.race_over_time,
-                    "TIME_OF_DAY_MULT": self.time_mult,
-                    "RESULT_SCREEN_TIME": self.result_screen_time,
-                    "MAX_CONTACTS_PER_KM": self.max_contacts_km,
-                }
-                for key, var in int_map.items():
-                    if key in s:
-                        try:
-                            var.set(int(s[key]))
-                        except (ValueError, tk.TclError):
-                            pass
-
-                
-                if "SUN_ANGLE" in s:
-                    try:
-                        self.sun_angle.set(float(s["SUN_ANGLE"]))
-                    except (ValueError, tk.TclError):
-                        pass
-
-                
-                bool_map = {
-                    "REGISTER_TO_LOBBY": self.register_lobby,
-                    "PICKUP_MODE_ENABLED": self.pickup_mode,
-                    "LOOP_MODE": self.loop_mode,
-                    "LOCKED_ENTRY_LIST": self.locked_entry,
-                    "STABILITY_ALLOWED": self.stability_allowed,
-                    "AUTOCLUTCH_ALLOWED": self.autoclutch_allowed,
-                    "TYRE_BLANKETS_ALLOWED": self.tyre_blankets,
-                    "FORCE_VIRTUAL_MIRROR": self.force_virtual_mirror,
-                }
-                for key, var in bool_map.items():
-                    if key in s:
-                        try:
-                            var.set(s[key].strip() == "1")
-                        except tk.TclError:
-                            pass
-
-                
-                if "RACE_GAS_PENALTY_DISABLED" in s:
-                    try:
-                        self.race_gas_penalty.set(s["RACE_GAS_PENALTY_DISABLED"].strip() == "0")
-                    except tk.TclError:
-                        pass
-
-                
-                abs_tc_map = {"0": "0 - Desligado", "1": "1 - Fabrica", "2": "2 - Forcado Ligado"}
-                if "ABS_ALLOWED" in s:
-                    self.abs_mode.set(abs_tc_map.get(s["ABS_ALLOWED"].strip(), self.abs_mode.get()))
-                if "TC_ALLOWED" in s:
-                    self.tc_mode.set(abs_tc_map.get(s["TC_ALLOWED"].strip(), self.tc_mode.get()))
-
-                
-                start_map = {str(i): START_RULES[i] for i in range(len(START_RULES))}
-                if "START_RULE" in s:
-                    self.start_rule.set(start_map.get(s["START_RULE"].strip(), self.start_rule.get()))
-
-                
-                track_name = s.get("TRACK", "").strip()
-                config_track = s.get("CONFIG_TRACK", "").strip()
-                if track_name:
-                    self.track_var.set(track_name)
-                    self._on_track_change()
-                    if config_track:
-                        self.layout_var.set(config_track)
-                        self._on_layout_change()
-
-            
-            if config.has_section("DYNAMIC_TRACK"):
-                dt = config["DYNAMIC_TRACK"]
-                for key, var in [
-                    ("SESSION_START", self.dyn_start),
-                    ("RANDOMNESS", self.dyn_random),
-                    ("LAP_GAIN", self.dyn_lap_gain),
-                    ("SESSION_TRANSFER", self.dyn_transfer),
-                ]:
-                    if key in dt:
-                        try:
-                            var.set(int(dt[key]))
-                        except (ValueError, tk.TclError):
-                            pass
-
-            
-            self.booking_enabled.set(config.has_section("BOOKING"))
-            if config.has_section("BOOKING") and "TIME" in config["BOOKING"]:
-                try:
-                    self.booking_time.set(int(config["BOOKING"]["TIME"]))
-                except (ValueError, tk.TclError):
-                    pass
-
-            self.practice_enabled.set(config.has_section("PRACTICE"))
-            if config.has_section("PRACTICE") and "TIME" in config["PRACTICE"]:
-                try:
-                    self.practice_time.set(int(config["PRACTICE"]["TIME"]))
-                except (ValueError, tk.TclError):
-                    pass
-
-            self.qualify_enabled.set(config.has_section("QUALIFY"))
-            if config.has_section("QUALIFY") and "TIME" in config["QUALIFY"]:
-                try:
-                    self.qualify_time.set(int(config["QUALIFY"]["TIME"]))
-                except (ValueError, tk.TclError):
-                    pass
-
-            if config.has_section("RACE"):
-                r = config["RACE"]
-                if "LAPS" in r:
-                    try:
-                        self.race_laps.set(int(r["LAPS"]))
-                    except (ValueError, tk.TclError):
-                        pass
-                if "WAIT_TIME" in r:
-                    try:
-                        self.race_wait_time.set(int(r["WAIT_TIME"]))
-                    except (ValueError, tk.TclError):
-                        pass
-
-            
-            if config.has_section("WEATHER_0"):
-                w = config["WEATHER_0"]
-                if "GRAPHICS" in w:
-                    self.weather_type.set(w["GRAPHICS"])
-                for key, var in [
-                    ("BASE_TEMPERATURE_AMBIENT", self.temp_ambient),
-                    ("VARIATION_AMBIENT", self.temp_var_ambient),
-                    ("BASE_TEMPERATURE_ROAD", self.temp_road),
-                    ("VARIATION_ROAD", self.temp_var_road),
-                    ("WIND_BASE_SPEED_MIN", self.wind_min),
-                    ("WIND_BASE_SPEED_MAX", self.wind_max),
-                    ("WIND_BASE_DIRECTION", self.wind_dir),
-                    ("WIND_VARIATION_DIRECTION", self.wind_var),
-                ]:
-                    if key in w:
-                        try:
-                            var.set(int(w[key]))
-                        except (ValueError, tk.TclError):
-                            pass
-
-            
-            csp_path = os.path.join(srv, "cfg", "csp_extra_options.ini")
-            if os.path.exists(csp_path):
-                csp = configparser.ConfigParser(strict=False)
-                csp.optionxform = str
-                csp.read(csp_path, encoding="utf-8")
-                if csp.has_section("PITS_SPEED_LIMITER"):
-                    ps = csp["PITS_SPEED_LIMITER"]
-                    if "DISABLE_FORCED" in ps:
-                        try:
-                            self.csp_disable_pit_limiter.set(ps["DISABLE_FORCED"].strip() == "1")
-                        except tk.TclError:
-                            pass
-                    if "SPEED_KMH" in ps:
-                        try:
-                            self.csp_pit_speed.set(int(ps["SPEED_KMH"].strip()))
-                        except (ValueError, tk.TclError):
-                            pass
-                    if "KEEP_COLLISIONS" in ps:
-                        try:
-                            self.csp_keep_collisions.set(ps["KEEP_COLLISIONS"].strip() == "1")
-                        except tk.TclError:
-                            pass
-                if csp.has_section("EXTRA_RULES"):
-                    er = csp["EXTRA_RULES"]
-                    if "ALLOW_WRONG_WAY" in er:
-                        try:
-                            self.csp_allow_wrong_way.set(er["ALLOW_WRONG_WAY"].strip() == "1")
-                        except tk.TclError:
-                            pass
+            values = read_server_cfg(read_text(cfg_path))
+            values.update(read_csp_extra_options(read_text(os.path.join(srv, "cfg", "csp_extra_options.ini"))))
+            track_name = values.pop("track_var", "").strip()
+            config_track = values.pop("layout_var", "").strip()
+            self.config.update(values)
+            self._push_model()
+
+            if track_name:
+                self.track_var.set(track_name)
+                self._on_track_change()
+                if config_track:
+                    self.layout_var.set(config_track)
+                    self._on_layout_change()
 
             # Carregar extra_cfg.yml (AssettoServer)
             extra_cfg_path = os.path.join(srv, "extra_cfg.yml")
@@ -1063,20 +1378,9 @@ class ACServerManager:
             return
 
         try:
-            config = configparser.ConfigParser(strict=False)
-            config.optionxform = str
-            config.read(entry_path, encoding="utf-8")
-
-            
-            car_counts = {}
-            for section in sorted(config.sections()):
-                if section.startswith("CAR_"):
-                    model = config[section].get("MODEL", "").strip()
-                    if model:
-                        car_counts[model] = car_counts.get(model, 0) + 1
-
-            if car_counts:
-                self.server_cars = [{"model": m, "qty": q} for m, q in car_counts.items()]
+            cars = entry_list_cars(read_text(entry_path))
+            if cars:
+                self.server_cars = cars
         except Exception as e:
             print(f"Erro ao carregar entry list: {e}")
 
@@ -1084,21 +1388,11 @@ class ACServerManager:
     
     
     def _save_config(self):
-        data = {}
-        for name in dir(self):
-            obj = getattr(self, name, None)
-            if isinstance(obj, tk.StringVar):
-                data[name] = obj.get()
-            elif isinstance(obj, tk.IntVar):
-                data[name] = obj.get()
-            elif isinstance(obj, tk.DoubleVar):
-                data[name] = obj.get()
-            elif isinstance(obj, tk.BooleanVar):
-                data[name] = obj.get()
+        data = self.settings.to_dict()
+        data.update(self.config.to_dict())
         data["server_cars"] = self.server_cars
         try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_if_changed(CONFIG_FILE, json.dumps(data, indent=2, ensure_ascii=False))
         except Exception:
             pass
 
@@ -1108,20 +1402,13 @@ class ACServerManager:
         try:
             with open(CONFIG_FILE, "r", encoding="utf-8") as f:
                 data = json.load(f)
-            for key, value in data.items():
-                if key == "server_cars":
-                    self.server_cars = value
-                    continue
-                obj = getattr(self, key, None)
-                if obj is None:
-                    continue
-                if isinstance(obj, (tk.StringVar, tk.IntVar, tk.DoubleVar, tk.BooleanVar)):
-                    try:
-                        obj.set(value)
-                    except Exception:
-                        pass
         except Exception:
-            pass
+            return
+        if isinstance(data.get("server_cars"), list):
+            self.server_cars = data["server_cars"]
+        self.settings.update(data)
+        self.config.update(data)
+        self._push_model()
 
     
     
@@ -1132,12 +1419,7 @@ class ACServerManager:
             messagebox.showwarning("Aviso", "Defina a pasta do servidor primeiro!")
             return
 
-        cfg_dir = os.path.join(srv, "cfg")
-        os.makedirs(cfg_dir, exist_ok=True)
-
-        unique_cars = list(dict.fromkeys(c["model"] for c in self.server_cars))
-        cars_str = ";".join(unique_cars) if unique_cars else ""
-        total_slots = sum(c["qty"] for c in self.server_cars)
+        unique_cars, total_slots = grid_summary(self.server_cars)
 
         if total_slots > self.max_clients.get():
             messagebox.showwarning(
@@ -1147,193 +1429,180 @@ class ACServerManager:
             )
             self.max_clients.set(total_slots)
 
-        abs_v = self.abs_mode.get().split(" ")[0]
-        tc_v = self.tc_mode.get().split(" ")[0]
-        sr_v = self.start_rule.get().split(" ")[0]
-        layout = self.layout_var.get()
-
-        content = f"""[SERVER]
-NAME={self.server_name.get()}
-CARS={cars_str}
-TRACK={self.track_var.get()}
-CONFIG_TRACK={layout}
-SUN_ANGLE={self.sun_angle.get():.0f}
-PASSWORD={self.server_password.get()}
-ADMIN_PASSWORD={self.admin_password.get()}
-UDP_PORT={self.udp_port.get()}
-TCP_PORT={self.tcp_port.get()}
-HTTP_PORT={self.http_port.get()}
-MAX_BALLAST_KG={self.max_ballast.get()}
-QUALIFY_MAX_WAIT_PERC={self.qualify_max_wait.get()}
-RACE_PIT_WINDOW_START={self.pit_window_start.get()}
-RACE_PIT_WINDOW_END={self.pit_window_end.get()}
-REVERSED_GRID_RACE_POSITIONS={self.reversed_grid.get()}
-LOCKED_ENTRY_LIST={1 if self.locked_entry.get() else 0}
-PICKUP_MODE_ENABLED={1 if self.pickup_mode.get() else 0}
-LOOP_MODE={1 if self.loop_mode.get() else 0}
-SLEEP_TIME={self.sleep_time.get()}
-CLIENT_SEND_INTERVAL_HZ={self.client_send_hz.get()}
-SEND_BUFFER_SIZE=0
-RACE_OVER_TIME={self.race_over_time.get()}
-KICK_QUORUM={self.kick_quorum.get()}
-VOTING_QUORUM={self.voting_quorum.get()}
-VOTE_DURATION={self.vote_duration.get()}
-BLACKLIST_MODE=1
-FUEL_RATE={self.fuel_rate.get()}
-DAMAGE_MULTIPLIER={self.damage_rate.get()}
-TYRE_WEAR_RATE={self.tyre_wear.get()}
-ALLOWED_TYRES_OUT={self.allowed_tyres_out.get()}
-ABS_ALLOWED={abs_v}
-TC_ALLOWED={tc_v}
-STABILITY_ALLOWED={1 if self.stability_allowed.get() else 0}
-AUTOCLUTCH_ALLOWED={1 if self.autoclutch_allowed.get() else 0}
-TYRE_BLANKETS_ALLOWED={1 if self.tyre_blankets.get() else 0}
-FORCE_VIRTUAL_MIRROR={1 if self.force_virtual_mirror.get() else 0}
-START_RULE={sr_v}
-RACE_GAS_PENALTY_DISABLED={0 if self.race_gas_penalty.get() else 1}
-TIME_OF_DAY_MULT={self.time_mult.get()}
-RESULT_SCREEN_TIME={self.result_screen_time.get()}
-MAX_CONTACTS_PER_KM={self.max_contacts_km.get()}
-REGISTER_TO_LOBBY={1 if self.register_lobby.get() else 0}
-MAX_CLIENTS={self.max_clients.get()}
-NUM_THREADS={self.num_threads.get()}
-UDP_PLUGIN_LOCAL_PORT=0
-UDP_PLUGIN_ADDRESS=
-AUTH_PLUGIN_ADDRESS=
-LEGAL_TYRES={self.legal_tyres.get()}
-PIT_SPEED_LIMIT={self.pit_speed_limit.get()}
-WELCOME_MESSAGE={self.welcome_msg.get()}
-EXTERNAL_SERVER_IP=
-
-[DYNAMIC_TRACK]
-SESSION_START={self.dyn_start.get()}
-RANDOMNESS={self.dyn_random.get()}
-LAP_GAIN={self.dyn_lap_gain.get()}
-SESSION_TRANSFER={self.dyn_transfer.get()}
-"""
-        if self.booking_enabled.get():
-            content += f"""
-[BOOKING]
-NAME=Booking
-TIME={self.booking_time.get()}
-"""
-
-        if self.practice_enabled.get():
-            content += f"""
-[PRACTICE]
-NAME=Practice
-TIME={self.practice_time.get()}
-IS_OPEN=1
-"""
-
-        if self.qualify_enabled.get():
-            content += f"""
-[QUALIFY]
-NAME=Qualify
-TIME={self.qualify_time.get()}
-IS_OPEN=1
-"""
+        problems, free = self._port_conflicts(srv)
+        if problems and free is None:
+            messagebox.showerror("Conflito de Portas", "\n".join(problems))
+            self.status_var.set("Nao salvo: conflito de portas")
+            return
+        if problems:
+            if not messagebox.askyesno(
+                "Conflito de Portas",
+                "\n".join(problems) + "\n\nUsar portas livres (UDP/TCP {}, HTTP {}) e salvar?".format(free[0], free[2]),
+            ):
+                self.status_var.set("Nao salvo: conflito de portas")
+                return
+            self.udp_port.set(free[0])
+            self.tcp_port.set(free[1])
+            self.http_port.set(free[2])
 
-        content += f"""
-[RACE]
-NAME=Race
-LAPS={self.race_laps.get()}
-WAIT_TIME={self.race_wait_time.get()}
-IS_OPEN=1
-
-[WEATHER_0]
-GRAPHICS={self.weather_type.get()}
-BASE_TEMPERATURE_AMBIENT={self.temp_ambient.get()}
-VARIATION_AMBIENT={self.temp_var_ambient.get()}
-BASE_TEMPERATURE_ROAD={self.temp_road.get()}
-VARIATION_ROAD={self.temp_var_road.get()}
-WIND_BASE_SPEED_MIN={self.wind_min.get()}
-WIND_BASE_SPEED_MAX={self.wind_max.get()}
-WIND_BASE_DIRECTION={self.wind_dir.get()}
-WIND_VARIATION_DIRECTION={self.wind_var.get()}
-"""
+        values = self.config.to_dict()
+        server_cars = [dict(c) for c in self.server_cars]
+        layout = self.layout_var.get()
+        summary = (
+            f"Configuracao salva com sucesso!\n\n"
+            f"Pista: {self.track_var.get()} {('(' + layout + ')') if layout else ''}\n"
+            f"Carros: {len(unique_cars)} modelos, {total_slots} slots\n"
+            f"Max. Jogadores: {self.max_clients.get()}\n"
+            f"Pit Speed: {self.pit_speed_limit.get()} km/h"
+        )
+        status = f"Configuracao salva!  |  Carros: {len(unique_cars)}  |  Slots: {total_slots}"
+
+        self.status_var.set("Salvando configuracao...")
+        self.jobs.submit(
+            "save",
+            lambda job, _: write_server_files(srv, values, server_cars, entry_list=False),
+            lane="save",
+            on_done=lambda result: self._on_saved(result, status, summary),
+            on_error=lambda e: messagebox.showerror("Erro", f"Falha ao salvar:\n{e}"),
+        )
 
+    def _port_usage(self, srv):
+        """(portas das outras instancias da frota, portas abertas na maquina) para `srv`."""
+        inst = self.fleet.by_path(srv) if srv else None
+        pids = set(self.fleet.running_pids()) | set(self.supervisor.pids())
+        return self.fleet.port_usage(inst.name if inst else None), bound_ports(pids)
+
+    def _port_conflicts(self, srv):
+        """(problemas, trio livre) das portas do editor; trio None se nao ha portas livres."""
+        others, bound = self._port_usage(srv)
+        problems = find_conflicts(instance_ports(self.config), others, bound)
+        if not problems:
+            return problems, None
         try:
-            cfg_path = os.path.join(cfg_dir, "server_cfg.ini")
-            with open(cfg_path, "w", encoding="utf-8") as f:
-                f.write(content)
-
-            
-            csp_content = f"""[PITS_SPEED_LIMITER]
-DISABLE_FORCED={1 if self.csp_disable_pit_limiter.get() else 0}
-SPEED_KMH={self.csp_pit_speed.get()}
-KEEP_COLLISIONS={1 if self.csp_keep_collisions.get() else 0}
+            return problems, PortAllocator.scan(others.values(), bound).allocate()
+        except PortConflict as e:
+            return problems + [str(e)], None
 
-[EXTRA_RULES]
-ALLOW_WRONG_WAY={1 if self.csp_allow_wrong_way.get() else 0}
-"""
-            csp_path = os.path.join(cfg_dir, "csp_extra_options.ini")
-            with open(csp_path, "w", encoding="utf-8") as f:
-                f.write(csp_content)
-
-            # Gerar extra_cfg.yml (AssettoServer)
-            extra_cfg_path = os.path.join(srv, "extra_cfg.yml")
-            # Se ja existe, atualiza apenas o UseSteamAuth
-            existing_lines = []
-            if os.path.exists(extra_cfg_path):
-                with open(extra_cfg_path, "r", encoding="utf-8") as f:
-                    existing_lines = f.readlines()
-            steam_val = "true" if self.use_steam_auth.get() else "false"
-            checksum_val = "true" if self.checksum_check.get() else "false"
-            found_steam = False
-            found_checksum = False
-            new_lines = []
-            for line in existing_lines:
-                if line.strip().startswith("UseSteamAuth"):
-                    new_lines.append(f"UseSteamAuth: {steam_val}\n")
-                    found_steam = True
-                elif line.strip().startswith("EnableChecksums"):
-                    new_lines.append(f"EnableChecksums: {checksum_val}\n")
-                    found_checksum = True
-                else:
-                    new_lines.append(line)
-            if not found_steam:
-                if not new_lines:
-                    new_lines.append("# AssettoServer Extra Configuration\n")
-                new_lines.append(f"UseSteamAuth: {steam_val}\n")
-            if not found_checksum:
-                new_lines.append(f"EnableChecksums: {checksum_val}\n")
-            with open(extra_cfg_path, "w", encoding="utf-8") as f:
-                f.writelines(new_lines)
+    def _suggest_ports(self):
+        others, bound = self._port_usage(self.server_path.get())
+        try:
+            free = PortAllocator.scan(others.values(), bound).allocate()
+        except ValueError as e:
+            messagebox.showwarning("Portas", str(e))
+            return
+        self.udp_port.set(free[0])
+        self.tcp_port.set(free[1])
+        self.http_port.set(free[2])
+        self.status_var.set("Portas livres: UDP/TCP {}, HTTP {}".format(free[0], free[2]))
 
+    def _on_saved(self, result, status, summary):
+        srv = self.server_path.get()
+        track = self.track_var.get()
+        cfg_path = os.path.join(srv, "cfg", "server_cfg.ini")
+        if result.changed(cfg_path, "SERVER", "TRACK") or (
+                track and not os.path.isdir(os.path.join(srv, "content", "tracks", track))):
             self._copy_track_content()
-
-            self._save_config()
-            self.status_var.set(f"Configuracao salva!  |  Carros: {len(unique_cars)}  |  Slots: {total_slots}")
-            messagebox.showinfo(
+        self._save_config()
+        inst = self.fleet.by_path(srv)
+        if inst is not None:
+            # Instancia da frota aberta no editor: o registro acompanha o que foi salvo
+            inst.config = self.config.copy()
+            inst.server_cars = [dict(c) for c in self.server_cars]
+            self.fleet.save()
+            self.lb_fleet.refresh()
+
+        if not result.written:
+            self.status_var.set("Nada mudou: os arquivos do servidor ja estavam atualizados")
+            messagebox.showinfo("Salvo", "Nenhuma alteracao: os arquivos do servidor ja estavam atualizados.")
+            return
+        self.status_var.set(status)
+        keys = list(dict.fromkeys(key for changes in result.changes.values() for _, key in changes))
+        summary += "\n\nAlterado: " + ", ".join(keys[:8]) + (f" (+{len(keys) - 8})" if len(keys) > 8 else "")
+        if result.restart_needed and self._server_running():
+            if messagebox.askyesno(
                 "Salvo",
-                f"Configuracao salva com sucesso!\n\n"
-                f"Pista: {self.track_var.get()} {('(' + layout + ')') if layout else ''}\n"
-                f"Carros: {len(unique_cars)} modelos, {total_slots} slots\n"
-                f"Max. Jogadores: {self.max_clients.get()}\n"
-                f"Pit Speed: {self.pit_speed_limit.get()} km/h",
-            )
-        except Exception as e:
-            messagebox.showerror("Erro", f"Falha ao salvar:\n{e}")
+                summary + "\n\nO servidor em execucao so le a configuracao na partida.\nReiniciar agora?",
+            ):
+                self._restart_server()
+            return
+        messagebox.showinfo("Salvo", summary)
 
     def _copy_track_content(self):
         track = self.track_var.get()
         if not track:
             return
-        src = os.path.join(self.game_path.get(), "content", "tracks", track)
-        dst_dir = os.path.join(self.server_path.get(), "content", "tracks")
-        dst = os.path.join(dst_dir, track)
-        if not os.path.exists(src):
+        try:
+            self._deploy_content("tracks", track)
+        except Exception:
+            pass
+
+    def _deploy_content(self, kind, name):
+        """Leva content/<kind>/<name> do jogo para o servidor.
+
+        Tenta symlink; se nao der, agenda a copia incremental em segundo plano.
+        Pastas ja copiadas antes sao resincronizadas (so o que mudou).
+        No modo pacote do servidor vai so o minimo, sem symlink.
+        """
+        pack = self.server_pack.get()
+        src = os.path.join(self.game_path.get(), "content", kind, name)
+        dst_dir = os.path.join(self.server_path.get(), "content", kind)
+        dst = os.path.join(dst_dir, name)
+        if not os.path.isdir(src):
             return
+        if os.path.islink(dst):
+            if not pack:
+                return
+            # Link para a pasta do jogo: troca pela copia minima
+            try:
+                os.unlink(dst)
+            except OSError:
+                os.rmdir(dst)
         os.makedirs(dst_dir, exist_ok=True)
-        if not os.path.exists(dst):
+        if not pack and not os.path.exists(dst):
             try:
                 os.symlink(src, dst, target_is_directory=True)
+                if self.server_content[kind] is not None:
+                    self.server_content[kind].add(name)
+                return
             except (OSError, NotImplementedError):
-                try:
-                    shutil.copytree(src, dst)
-                except Exception:
-                    pass
+                pass
+
+        self.jobs.submit(
+            f"deploy:{name}", functools.partial(self._deploy_step, kind, src, dst, pack), lane="deploy",
+            on_progress=lambda done, total, rate: self._on_deploy_progress(name, done, total, rate),
+            on_done=lambda result: self._on_deployed(kind, name, result),
+            on_cancel=lambda: self.status_var.set(f"Copia cancelada: {name}"),
+            on_error=lambda e: self._on_deploy_error(name, e),
+        )
+
+    def _deploy_step(self, kind, src, dst, pack, job, _):
+        if pack:
+            return self.deployer.deploy_server_pack(kind, src, dst, progress=job.report,
+                                                    cancel=job.cancel_event)
+        return self.deployer.deploy(src, dst, progress=job.report, cancel=job.cancel_event)
+
+    def _on_deploy_progress(self, name, done, total, rate):
+        pct = 100 * done // total if total else 100
+        self.status_var.set(
+            f"Copiando {name}: {pct}%  ({done / 1e6:.0f}/{total / 1e6:.0f} MB, {rate / 1e6:.1f} MB/s)"
+        )
+
+    def _on_deployed(self, kind, name, result):
+        if self.server_content[kind] is not None:
+            self.server_content[kind].add(name)
+        if kind == "cars":
+            self.lb_grid.refresh()
+        self.status_var.set(
+            f"Copia concluida: {name}  |  {result.copied} arquivos novos/alterados, "
+            f"{result.skipped} iguais, {result.removed} removidos  |  {result.rate / 1e6:.1f} MB/s"
+        )
+
+    def _on_deploy_error(self, name, error):
+        self.status_var.set(f"Erro ao copiar {name}")
+        messagebox.showerror("Erro", f"Falha ao copiar {name}:\n{error}")
+
+    def _cancel_deploys(self):
+        self.jobs.cancel(lane="deploy")
 
     
     
@@ -1351,33 +1620,8 @@ ALLOW_WRONG_WAY={1 if self.csp_allow_wrong_way.get() else 0}
         os.makedirs(cfg_dir, exist_ok=True)
 
         try:
-            lines = []
-            counter = 0
-            for item in self.server_cars:
-                model = item["model"]
-                skins_path = os.path.join(srv, "content", "cars", model, "skins")
-                skins = []
-                if os.path.isdir(skins_path):
-                    skins = [d for d in os.listdir(skins_path)
-                             if os.path.isdir(os.path.join(skins_path, d))]
-
-                for i in range(item["qty"]):
-                    skin = skins[i % len(skins)] if skins else "default"
-                    lines.append(
-                        f"[CAR_{counter}]\n"
-                        f"MODEL={model}\n"
-                        f"SKIN={skin}\n"
-                        f"SPECTATOR_MODE=0\n"
-                        f"DRIVERNAME=\n"
-                        f"TEAM=\n"
-                        f"GUID=\n"
-                        f"BALLAST=0\n"
-                        f"RESTRICTOR=0\n"
-                    )
-                    counter += 1
-
-            with open(os.path.join(cfg_dir, "entry_list.ini"), "w", encoding="utf-8") as f:
-                f.write("\n".join(lines))
+            text, counter = render_entry_list(self.server_cars, lambda model: car_skins(srv, model))
+            write_text(os.path.join(cfg_dir, "entry_list.ini"), text)
 
             self.status_var.set(f"Entry list gerada com {counter} slots!")
             messagebox.showinfo("Sucesso", f"Entry list salva com {counter} slots!")
@@ -1388,156 +1632,477 @@ ALLOW_WRONG_WAY={1 if self.csp_allow_wrong_way.get() else 0}
     
     
     def _install_server(self):
+        if self.jobs.busy(lane="install"):
+            if messagebox.askyesno("Instalacao", "Ja existe uma instalacao em andamento.\nDeseja cancela-la?"):
+                self.jobs.cancel(lane="install")
+            return
         dest = self.server_path.get()
         src_game = self.game_path.get()
         if not dest or not src_game:
             messagebox.showwarning("Aviso", "Selecione as pastas do jogo e do servidor!")
             return
 
-        if os.path.exists(dest) and os.listdir(dest):
-            if messagebox.askyesno("Limpar", "A pasta destino nao esta vazia.\nDeseja limpar antes de instalar?"):
-                try:
-                    shutil.rmtree(dest)
-                    os.makedirs(dest)
-                except Exception as e:
-                    messagebox.showerror("Erro", f"Falha ao limpar pasta:\n{e}")
-                    return
-            else:
+        installed = any(os.path.exists(os.path.join(dest, exe)) for exe in ("AssettoServer.exe", "AssettoServer"))
+        if installed:
+            answer = messagebox.askyesnocancel(
+                "Atualizar",
+                "A pasta ja tem o AssettoServer instalado.\n\n"
+                "Sim: atualizar no lugar (so os arquivos que mudaram;\n"
+                "cfg/, extra_cfg.yml e content/ ficam como estao)\n"
+                "Nao: limpar a pasta e reinstalar do zero",
+            )
+            if answer is None:
                 return
-
-        os.makedirs(dest, exist_ok=True)
-        self.status_var.set("Baixando AssettoServer...")
-        self.root.update()
-
-        try:
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-
-            req = urllib.request.Request(GITHUB_API, headers={"User-Agent": "Mozilla/5.0"})
-            with urllib.request.urlopen(req, context=ctx) as r:
-                data = json.loads(r.read().decode())
-                dl_url = next(
-                    (a["browser_download_url"] for a in data["assets"] if "win-x64" in a["name"]), None
-                )
-
-            if not dl_url:
-                messagebox.showerror("Erro", "Nao foi possivel encontrar o download win-x64!")
+            if not answer:
+                installed = False
+        clean = False
+        if not installed and os.path.exists(dest) and os.listdir(dest):
+            if not messagebox.askyesno("Limpar", "A pasta destino nao esta vazia.\nDeseja limpar antes de instalar?"):
                 return
+            clean = True
+
+        offline = self.offline_install.get()
+        self.status_var.set("Consultando a ultima versao do AssettoServer...")
+        self.jobs.submit(
+            "install",
+            functools.partial(self._prepare_install_dir, dest, clean),
+            lambda job, _: self.installer.install(dest, job.report, job.cancel_event, offline=offline),
+            functools.partial(self._copy_game_server_exe, src_game, dest),
+            lane="install",
+            on_progress=self._on_install_progress,
+            on_done=self._on_installed,
+            on_cancel=lambda: self.status_var.set(
+                "Instalacao cancelada (o download continua de onde parou na proxima vez)"),
+            on_error=self._on_install_error,
+        )
 
-            self.status_var.set("Baixando...")
-            self.root.update()
-
-            zip_path = os.path.join(dest, "server.zip")
-            with urllib.request.urlopen(dl_url, context=ctx) as r, open(zip_path, "wb") as f:
-                shutil.copyfileobj(r, f)
+    @staticmethod
+    def _prepare_install_dir(dest, clean, job, _):
+        if clean:
+            try:
+                shutil.rmtree(dest)
+            except Exception as e:
+                raise RuntimeError(f"Falha ao limpar pasta: {e}") from e
+        os.makedirs(dest, exist_ok=True)
 
-            self.status_var.set("Extraindo...")
-            self.root.update()
+    @staticmethod
+    def _copy_game_server_exe(src_game, dest, job, installed):
+        for rel in ["server/acServer.exe", "acServer.exe"]:
+            orig = os.path.join(src_game, rel)
+            if os.path.exists(orig):
+                shutil.copy2(orig, dest)
+                break
+        return installed
+
+    def _on_install_progress(self, stage, done, total, rate, eta):
+        pct = 100 * done // total if total else 0
+        label = "Baixando AssettoServer" if stage == "download" else "Extraindo"
+        self.status_var.set(
+            f"{label}: {pct}%  ({done / 1e6:.1f}/{total / 1e6:.1f} MB, "
+            f"{rate / 1e6:.1f} MB/s, faltam {fmt_eta(eta)})"
+        )
 
-            with zipfile.ZipFile(zip_path, "r") as z:
-                z.extractall(dest)
-            os.remove(zip_path)
+    def _on_installed(self, installed):
+        asset, result = installed
+        self.status_var.set(
+            f"AssettoServer {asset.tag} instalado  |  {result.written} arquivos gravados, "
+            f"{result.unchanged} iguais, {result.preserved} preservados  ({result.seconds:.1f}s)"
+        )
+        messagebox.showinfo("Sucesso", f"AssettoServer {asset.tag} instalado com sucesso!")
 
-            for rel in ["server/acServer.exe", "acServer.exe"]:
-                orig = os.path.join(src_game, rel)
-                if os.path.exists(orig):
-                    shutil.copy2(orig, dest)
-                    break
-
-            self.status_var.set("AssettoServer instalado com sucesso!")
-            messagebox.showinfo("Sucesso", "AssettoServer instalado com sucesso!")
-        except Exception as e:
-            self.status_var.set("Erro na instalacao")
-            messagebox.showerror("Erro", f"Falha na instalacao:\n{e}")
+    def _on_install_error(self, error):
+        self.status_var.set("Erro na instalacao")
+        messagebox.showerror("Erro", f"Falha na instalacao:\n{error}")
 
     
     
     
+    def _server_key(self, srv):
+        """Nome do servidor no supervisor: o da instancia da frota, ou a propria pasta."""
+        inst = self.fleet.by_path(srv)
+        return inst.name if inst else os.path.normcase(os.path.abspath(srv))
+
+    def _server_running(self):
+        srv = self.server_path.get()
+        return bool(srv) and self.supervisor.running(self._server_key(srv))
+
     def _start_server(self):
         srv = self.server_path.get()
         if not srv:
             messagebox.showwarning("Aviso", "Defina a pasta do servidor!")
             return
-        if self.server_process and self.server_process.poll() is None:
+        if self._server_running():
             messagebox.showinfo("Info", "O servidor ja esta rodando!\nPare-o primeiro ou use Reiniciar.")
             return
-        for exe_name in ["AssettoServer.exe", "acServer.exe"]:
-            exe = os.path.join(srv, exe_name)
-            if os.path.exists(exe):
-                try:
-                    self.server_process = subprocess.Popen(
-                        ["cmd.exe", "/c", "start", "AC Server", "/wait", exe],
-                        cwd=srv,
-                    )
-                    self.status_var.set(f"Servidor iniciado: {exe_name}  (CMD aberto)")
-                    return
-                except Exception as e:
-                    messagebox.showerror("Erro", f"Falha ao iniciar:\n{e}")
-                    return
-        messagebox.showerror(
-            "Nao Encontrado",
-            "Nenhum executavel do servidor encontrado!\n"
-            "Procurado: AssettoServer.exe, acServer.exe",
-        )
+        exe = find_server_exe(srv)
+        if exe is None:
+            messagebox.showerror(
+                "Nao Encontrado",
+                "Nenhum executavel do servidor encontrado!\n"
+                "Procurado: AssettoServer.exe, acServer.exe",
+            )
+            return
+        try:
+            probe = ReadinessProbe.for_server(srv)
+            proc = self.supervisor.start(self._server_key(srv), [exe], srv, probe=probe)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Falha ao iniciar:\n{e}")
+            return
+        inst = self.fleet.by_path(srv)
+        if inst is not None:
+            inst.set_pid(proc.pid)
+            self.fleet.save()
+        self.status_var.set(f"Servidor iniciado: {os.path.basename(exe)}  (PID {proc.pid}), aguardando ficar pronto...")
+
+    def _stop_step(self):
+        """Passo de job que para so o servidor da pasta atual."""
+        srv = self.server_path.get()
+        inst = self.fleet.by_path(srv) if srv else None
+        if inst is not None:
+            # Instancia da frota: tambem para um servidor iniciado pela linha de comando (so o PID)
+            return functools.partial(self.fleet.operation("stop"), inst)
+        key = self._server_key(srv) if srv else None
+        return lambda job, _: self.supervisor.stop(key)
 
     def _stop_server(self):
-        stopped = False
-        
-        if self.server_process and self.server_process.poll() is None:
-            try:
-                self.server_process.terminate()
-                self.server_process.wait(timeout=5)
-                stopped = True
-            except Exception:
-                try:
-                    self.server_process.kill()
-                    stopped = True
-                except Exception:
-                    pass
-            self.server_process = None
-
-        
-        for exe_name in ["AssettoServer.exe", "acServer.exe"]:
-            try:
-                result = subprocess.run(
-                    ["taskkill", "/f", "/im", exe_name],
-                    capture_output=True, text=True,
-                )
-                if result.returncode == 0:
-                    stopped = True
-            except Exception:
-                pass
+        self.status_var.set("Parando servidor...")
+        self.jobs.submit("stop", self._stop_step(), lane="server", on_done=self._on_server_stopped)
 
+    def _on_server_stopped(self, stopped):
         if stopped:
             self.status_var.set("Servidor parado!")
             messagebox.showinfo("Parado", "Servidor encerrado com sucesso!")
         else:
             self.status_var.set("Nenhum servidor encontrado rodando")
-            messagebox.showinfo("Info", "Nenhum processo do servidor foi encontrado rodando.")
+            messagebox.showinfo("Info", "O servidor desta pasta nao estava rodando.")
 
     def _restart_server(self):
         self.status_var.set("Reiniciando servidor...")
-        self.root.update()
-        
-        if self.server_process and self.server_process.poll() is None:
-            try:
-                self.server_process.terminate()
-                self.server_process.wait(timeout=5)
-            except Exception:
-                try:
-                    self.server_process.kill()
-                except Exception:
-                    pass
-            self.server_process = None
-        for exe_name in ["AssettoServer.exe", "acServer.exe"]:
-            try:
-                subprocess.run(["taskkill", "/f", "/im", exe_name],
-                               capture_output=True, text=True)
-            except Exception:
-                pass
-        
-        self.root.after(1500, self._start_server)
+        self._restarting = self._server_key(self.server_path.get())
+        # A parada so termina com o processo encerrado (portas livres): pode iniciar direto;
+        # o reinicio acaba quando o probe de prontidao responde (_on_server_event)
+        self.jobs.submit("restart", self._stop_step(), lane="server",
+                         on_done=lambda _: self._start_server())
+
+    def _on_server_event(self, name, event, data):
+        text = describe_event(event, data)
+        if event == "started":
+            stats = self.analytics.stats.get(name)
+            if stats is not None:
+                stats.reset_online()
+            self.cb_console.configure(values=list(self.supervisor.procs))
+            srv = self.server_path.get()
+            if not self.console_target.get() or (srv and name == self._server_key(srv)):
+                if self.console_target.get() != name:
+                    self.console_target.set(name)
+                    self._console_reset()
+        inst = self.fleet.instances.get(name)
+        if inst is not None:
+            if event == "started":
+                inst.set_pid(data)
+            self._fleet_status[name] = text
+            self.lb_fleet.refresh()
+        srv = self.server_path.get()
+        if srv and name == self._server_key(srv):
+            if event in ("ready", "unready") and self._restarting == name:
+                self._restarting = None
+                text = f"reiniciado, {text}"
+            self.status_var.set(f"Servidor: {text}")
+        if event == "crashloop":
+            messagebox.showerror("Servidor", f"{name}: {text}.\nConfira a saida do servidor e inicie de novo.")
+
+
+    
+    
+    
+    def _console_tick(self):
+        """Leva as linhas novas ao console, no maximo uma vez a cada CONSOLE_REFRESH_MS."""
+        self.root.after(CONSOLE_REFRESH_MS, self._console_tick)
+        self._show_resources()
+        proc = self.supervisor.get(self.console_target.get())
+        if proc is None or proc.console is None:
+            return
+        lines, self._console_seq, dropped = proc.console.since(self._console_seq, CONSOLE_VIEW_LINES)
+        if not lines and not dropped:
+            return
+        txt = self.txt_console
+        txt.configure(state="normal")
+        if dropped:
+            txt.insert("end", f"... {dropped} linha(s) nao exibidas (ver logs/console)\n", "note")
+        for stream, group in itertools.groupby(lines, key=lambda line: line[0]):
+            tags = ("err",) if stream == STDERR else ()
+            txt.insert("end", "".join(f"{text}\n" for _, text in group), *tags)
+        excess = int(txt.index("end-1c").split(".")[0]) - 1 - CONSOLE_VIEW_LINES
+        if excess > 0:
+            txt.delete("1.0", f"{excess + 1}.0")
+        txt.configure(state="disabled")
+        if self.console_follow.get():
+            txt.see("end")
+
+    def _show_resources(self):
+        """Sparklines e percentis do servidor do console, so quando ha amostra nova."""
+        if not self._sampling:
+            return
+        name = self.console_target.get()
+        history = self.sampler.histories.get(name)
+        mark = (name, history.times.last() if history is not None else None)
+        if mark == self._resource_mark:
+            return
+        self._resource_mark = mark
+        lines = self.sampler.summary(name)
+        self.console_resources.set("\n".join(lines) if lines else "Aguardando amostras de CPU e memoria...")
+
+    def _on_sample_interval(self, *_):
+        # Le a variavel: o Tcl chama o trace mais novo primeiro, antes do que atualiza o modelo
+        try:
+            interval = float(self.sample_interval.get())
+        except (tk.TclError, ValueError):
+            return
+        self.sampler.interval = max(MIN_INTERVAL, interval)
+
+    def _on_metrics_setting(self, *_):
+        if self._metrics_job is not None:
+            self.root.after_cancel(self._metrics_job)
+        self._metrics_job = self.root.after(METRICS_APPLY_MS, self._apply_metrics)
+
+    def _apply_metrics(self):
+        """Liga, desliga ou muda de porta o endpoint /metrics conforme as preferencias."""
+        self._metrics_job = None
+        running = self.jobs.busy("metrics")
+        self.jobs.cancel("metrics")
+        if not self.settings.metrics_enabled:
+            if running:
+                self.status_var.set("Metricas desligadas")
+            return
+        server = MetricsServer(self.metrics, self.settings.metrics_port, self.settings.metrics_host)
+        self.jobs.submit(
+            "metrics", server.run, lane="metrics", dedicated=True,
+            on_error=lambda e: self.status_var.set(f"Metricas: porta {server.port} indisponivel ({e})"),
+        )
+        self.status_var.set(f"Metricas em http://{server.host}:{server.port}/metrics")
+
+    def _console_reset(self):
+        """Troca de servidor: mostra o fim do buffer dele."""
+        self._console_clear()
+        proc = self.supervisor.get(self.console_target.get())
+        self._console_seq = max(0, proc.console.seq - CONSOLE_VIEW_LINES) if proc and proc.console else 0
+        self._show_log_stats()
+
+    def _logs_tick(self):
+        """Le as linhas novas dos logs de todos os servidores conhecidos num job."""
+        self.root.after(LOG_POLL_MS, self._logs_tick)
+        for inst in self.fleet.instances.values():
+            self.analytics.watch(inst.name, inst.server_path)
+        srv = self.server_path.get()
+        if srv and os.path.isdir(srv):
+            self.analytics.watch(self._server_key(srv), srv)
+        if self.jobs.busy("logs"):
+            return
+        self.jobs.submit("logs", lambda job, _: self._poll_logs(), lane="logs",
+                         on_done=self._on_log_events)
+
+    def _poll_logs(self):
+        found = self.analytics.poll()
+        if found:
+            self.analytics.save()
+        return found
+
+    def _on_log_events(self, found):
+        if not found:
+            return
+        if any(name in self.fleet.instances for name in found):
+            self.lb_fleet.refresh()
+        self._show_log_stats()
+
+    def _show_log_stats(self):
+        stats = self.analytics.stats.get(self.console_target.get())
+        self.console_stats.set(stats.summary() if stats else "Sem eventos do log ainda")
+
+    def _console_clear(self):
+        self.txt_console.configure(state="normal")
+        self.txt_console.delete("1.0", "end")
+        self.txt_console.configure(state="disabled")
+
+    def _console_open_logs(self):
+        proc = self.supervisor.get(self.console_target.get())
+        folder = os.path.join(proc.cwd, CONSOLE_DIR) if proc and proc.cwd else None
+        if folder and os.path.isdir(folder):
+            open_folder(folder)
+        else:
+            messagebox.showwarning("Aviso", "Nenhum log de console para este servidor ainda.")
+
+    def _search_logs(self):
+        """Busca nos logs antigos num job (o indice de um log novo pode levar alguns segundos)."""
+        query = self.log_query.get().strip()
+        if not query:
+            return
+        since, until = (var.get().strip() or None for var in (self.log_since, self.log_until))
+        if any(day and not re.fullmatch(r"\d{4}-\d\d-\d\d", day) for day in (since, until)):
+            messagebox.showwarning("Aviso", "Use datas no formato AAAA-MM-DD.")
+            return
+        if self.log_scope.get() == "Toda a frota":
+            dirs = {inst.name: os.path.join(inst.server_path, "logs") for inst in self.fleet.instances.values()}
+        else:
+            srv = self.server_path.get()
+            dirs = {self._server_key(srv): os.path.join(srv, "logs")} if srv else {}
+        if not dirs:
+            messagebox.showwarning("Aviso", "Nenhum servidor para buscar.")
+            return
+        if self.jobs.busy("logsearch"):
+            return
+        self.log_search_status.set("Buscando...")
+        self.jobs.submit(
+            "logsearch", lambda job, _: search_logs(dirs, query, since, until), lane="logsearch",
+            on_done=self._on_log_search,
+            on_error=lambda e: self.log_search_status.set(f"Falha na busca: {e}"),
+        )
+
+    def _on_log_search(self, result):
+        hits, stats = result
+        self._log_hits[:] = hits
+        self.lb_log_hits.set_items(self._log_hits)
+        text = f"{len(hits)} resultado(s) em {stats['files']} arquivo(s), {stats['ms']:.0f} ms"
+        if stats["indexed"]:
+            text += f" ({stats['indexed']} indexado(s) agora)"
+        self.log_search_status.set(text)
+
+    
+    
+    
+    def _fleet_row(self, name):
+        inst = self.fleet.instances[name]
+        server = inst.config.server
+        track = inst.config.session.track_var
+        layout = inst.config.session.layout_var
+        stats = self.analytics.stats.get(name)
+        return (
+            name, inst.server_path, f"{track} ({layout})" if layout else track or "-",
+            f"{server.udp_port}/{server.tcp_port}/{server.http_port}",
+            len(stats.online) if stats else "-",
+            self._fleet_status.get(name, ""),
+        )
+
+    def _fleet_refresh(self):
+        self._fleet_names[:] = self.fleet.names()
+        self.lb_fleet.refresh()
+
+    def _fleet_selected(self):
+        """Nomes selecionados; None (todas) se nao houver selecao."""
+        return [self._fleet_names[i] for i in self.lb_fleet.curselection()] or None
+
+    def _fleet_ask_name(self, default=""):
+        name = simpledialog.askstring("Frota", "Nome da instancia:", initialvalue=default, parent=self.root)
+        return name.strip() if name else None
+
+    def _fleet_add_current(self):
+        srv = self.server_path.get()
+        if not srv:
+            messagebox.showwarning("Aviso", "Defina a pasta do servidor primeiro!")
+            return
+        name = self._fleet_ask_name(os.path.basename(os.path.normpath(srv)))
+        if not name:
+            return
+        try:
+            self.fleet.add(name, srv, self.config.copy(), self.server_cars)
+        except ValueError as e:
+            messagebox.showwarning("Frota", str(e))
+            return
+        self.fleet.save()
+        self._fleet_refresh()
+
+    def _fleet_import(self):
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        name = self._fleet_ask_name(os.path.basename(os.path.normpath(folder)))
+        if not name:
+            return
+        try:
+            self.fleet.import_server(name, folder)
+        except ValueError as e:
+            messagebox.showwarning("Frota", str(e))
+            return
+        self.fleet.save()
+        self._fleet_refresh()
+
+    def _fleet_remove(self):
+        names = self._fleet_selected()
+        if not names:
+            messagebox.showinfo("Frota", "Selecione as instancias a remover.")
+            return
+        if not messagebox.askyesno("Frota", f"Tirar {', '.join(names)} da frota?\n(Os arquivos do servidor nao sao apagados.)"):
+            return
+        for name in names:
+            self.fleet.remove(name)
+            self._fleet_status.pop(name, None)
+            self.analytics.forget(name)
+            self.sampler.forget(name)
+        self.fleet.save()
+        self.lb_fleet.selection_clear()
+        self._fleet_refresh()
+
+    def _fleet_open(self):
+        """Carrega a instancia selecionada no editor (abas de configuracao)."""
+        names = self._fleet_selected()
+        if not names or len(names) != 1:
+            messagebox.showinfo("Frota", "Selecione uma instancia.")
+            return
+        inst = self.fleet.instances[names[0]]
+        self.server_path.set(inst.server_path)
+        self._save_config()
+        self._start_watcher()
+        session = inst.config.session
+        self.config.update(inst.config.to_dict())
+        self._push_model()
+        if session.track_var:
+            self._on_track_change()
+            self.layout_var.set(session.layout_var)
+            self._on_layout_change()
+        self.server_cars = [dict(c) for c in inst.server_cars]
+        self._update_grid_ui()
+        self.status_var.set(f"Editando a instancia {inst.name}  |  {inst.server_path}")
+
+    def _fleet_apply(self):
+        names = self._fleet_selected()
+        target = ", ".join(names) if names else f"todas as {len(self._fleet_names)} instancias"
+        if not messagebox.askyesno(
+            "Frota",
+            f"Aplicar a configuracao e o grid do editor em {target} e salvar?\n"
+            f"Mantidos por instancia: {', '.join(INSTANCE_FIELDS)}.",
+        ):
+            return
+        self.fleet.apply(self.config.to_dict(), names, server_cars=self.server_cars)
+        self.fleet.save()
+        self._fleet_bulk("salvar", self.fleet.operation("save"), names)
+
+    def _fleet_content(self):
+        fn = op_content(self.deployer, self.game_path.get(), self.server_pack.get())
+        self._fleet_bulk("copiar conteudo", fn)
+
+    def _fleet_bulk(self, label, fn, names=None):
+        names = self._fleet_selected() if names is None else names
+        run = self.fleet.run(self.jobs, label, fn, names,
+                             on_result=self._on_fleet_result,
+                             on_done=lambda results: self._on_fleet_done(label, results))
+        for name in run.names:
+            self._fleet_status[name] = f"{label}..."
+        self.lb_fleet.refresh()
+        self.status_var.set(f"Frota: {label} em {len(run.names)} instancia(s)...")
+
+    def _on_fleet_result(self, name, state, value):
+        if state == DONE:
+            self._fleet_status[name] = describe_result(value)
+        elif state == FAILED:
+            self._fleet_status[name] = f"ERRO: {value}"
+        else:
+            self._fleet_status[name] = "cancelado"
+        self.lb_fleet.refresh()
+
+    def _on_fleet_done(self, label, results):
+        self.fleet.save()
+        failed = [name for name, (state, _) in results.items() if state != DONE]
+        text = f"Frota: {label} concluido em {len(results)} instancia(s)"
+        self.status_var.set(text + (f"  |  falhas: {', '.join(failed)}" if failed else ""))
 
     
     
@@ -1545,7 +2110,7 @@ ALLOW_WRONG_WAY={1 if self.csp_allow_wrong_way.get() else 0}
     def _open_folder(self):
         srv = self.server_path.get()
         if srv and os.path.isdir(srv):
-            os.startfile(srv)
+            open_folder(srv)
         else:
             messagebox.showwarning("Aviso", "Pasta do servidor nao definida ou nao existe!")
 
@@ -0,0 +1,3 @@
+"""
+Modulos de apoio do AC Server Manager (sem dependencia de interface grafica)
+"""
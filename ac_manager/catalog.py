@@ -0,0 +1,176 @@
+"""
+Catalogo persistente de conteudo do jogo (carros, pistas, layouts e metadados).
+Cada entrada guarda o mtime da pasta de origem; so o que mudou e relido do disco.
+"""
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .uimeta import scan_layouts, read_car_meta
+
+
+CATALOG_FILE = "ac_manager_catalog.json"
+CATALOG_VERSION = 3
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def iter_dirs(path):
+    """Subpastas de `path` na ordem do disco (uma unica leitura via scandir)."""
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_dir():
+                        yield e.name
+                except OSError:
+                    pass
+    except OSError:
+        return
+
+
+def list_dirs(path):
+    """Nomes das subpastas de `path`, em ordem alfabetica."""
+    return sorted(iter_dirs(path))
+
+
+class ContentCatalog:
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        self.roots = {}
+        self.dirty = False
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION:
+                self.roots = data.get("roots", {})
+        except Exception:
+            self.roots = {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"version": CATALOG_VERSION, "roots": self.roots}, f,
+                              ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp, self.path)
+                self.dirty = False
+            except Exception:
+                pass
+
+    def _root(self, game_path):
+        key = os.path.normcase(os.path.abspath(game_path))
+        return self.roots.setdefault(
+            key, {"cars": {}, "tracks": {}, "layouts": {}, "car_meta": {}})
+
+    def fresh_names(self, game_path, kind):
+        """(mtime, nomes) do cache; nomes e None se a pasta mudou desde a ultima leitura."""
+        mtime = _mtime(os.path.join(game_path, "content", kind))
+        if mtime is None:
+            return None, []
+        with self.lock:
+            entry = self._root(game_path)[kind]
+            if entry.get("mtime") == mtime:
+                return mtime, entry["names"]
+        return mtime, None
+
+    def store_names(self, game_path, kind, mtime, names):
+        with self.lock:
+            root = self._root(game_path)
+            root[kind] = {"mtime": mtime, "names": sorted(names)}
+            known = set(root[kind]["names"])
+            details = root["layouts" if kind == "tracks" else "car_meta"]
+            for gone in [n for n in details if n not in known]:
+                del details[gone]
+            self.dirty = True
+            return root[kind]["names"]
+
+    def _names(self, game_path, kind):
+        mtime, names = self.fresh_names(game_path, kind)
+        if names is None:
+            names = self.store_names(game_path, kind, mtime,
+                                     iter_dirs(os.path.join(game_path, "content", kind)))
+        return names
+
+    def cars(self, game_path):
+        return self._names(game_path, "cars")
+
+    def tracks(self, game_path):
+        return self._names(game_path, "tracks")
+
+    def cached_layouts(self, game_path, track):
+        """Layouts da pista -> metadados, sem tocar no disco (None se nunca lido)."""
+        with self.lock:
+            entry = self._root(game_path)["layouts"].get(track)
+            return dict(entry["layouts"]) if entry else None
+
+    def refresh_layouts(self, game_path, tracks, cancel=None, workers=8):
+        """Revalida/rele os ui_track.json de todas as pistas em paralelo."""
+        self._bulk(self.layouts, game_path, tracks, cancel, workers)
+
+    def refresh_car_meta(self, game_path, cars, cancel=None, workers=8):
+        """Revalida/rele ui_car.json e skins de todos os carros em paralelo."""
+        self._bulk(self.car_meta, game_path, cars, cancel, workers)
+
+    @staticmethod
+    def _bulk(fn, game_path, names, cancel, workers):
+        def one(name):
+            if cancel is None or not cancel.is_set():
+                fn(game_path, name)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui_meta") as pool:
+            list(pool.map(one, names))
+
+    def car_meta_map(self, game_path):
+        """Dicionario carro -> metadados (o proprio cache; so leitura)."""
+        with self.lock:
+            return self._root(game_path)["car_meta"]
+
+    def car_meta(self, game_path, car):
+        car_dir = os.path.join(game_path, "content", "cars", car)
+        key = [_mtime(os.path.join(car_dir, "ui", "ui_car.json")),
+               _mtime(os.path.join(car_dir, "skins"))]
+        with self.lock:
+            entry = self._root(game_path)["car_meta"].get(car)
+        if entry and entry["mtime"] == key:
+            return entry
+        meta = read_car_meta(car_dir)
+        meta["mtime"] = key
+        with self.lock:
+            self._root(game_path)["car_meta"][car] = meta
+            self.dirty = True
+        return meta
+
+    def layouts(self, game_path, track):
+        """Layouts da pista -> metadados. Revalida pelo mtime de ui/ e de cada ui_track.json."""
+        ui_dir = os.path.join(game_path, "content", "tracks", track, "ui")
+        with self.lock:
+            entry = self._root(game_path)["layouts"].get(track)
+        if entry and entry["mtime"] == _mtime(ui_dir) and all(
+            _mtime(os.path.join(ui_dir, rel)) == m for rel, m in entry["files"]
+        ):
+            return dict(entry["layouts"])
+
+        layouts, files = scan_layouts(ui_dir)
+        with self.lock:
+            self._root(game_path)["layouts"][track] = {
+                "mtime": _mtime(ui_dir), "files": files, "layouts": layouts,
+            }
+            self.dirty = True
+        return dict(layouts)
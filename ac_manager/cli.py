@@ -0,0 +1,397 @@
+"""
+Linha de comando do AC Server Manager (sem interface grafica).
+
+    python -m ac_manager generate evento.json --server /caminho/do/servidor
+    python -m ac_manager fleet apply mudanca.json      (todas as instancias da frota)
+    python -m ac_manager fleet supervise               (inicia e vigia ate Ctrl+C)
+    python -m ac_manager fleet supervise --metrics 9310   (e serve /metrics para o Prometheus)
+    python -m ac_manager logs                          (pilotos, voltas e erros dos logs)
+    python -m ac_manager search piloto:mario --since 2024-01-01   (busca nos logs antigos)
+
+O evento pode ser JSON ou YAML com os mesmos campos do ac_manager_config.json;
+o proprio ac_manager_config.json salvo pela interface tambem serve.
+"""
+
+import os
+import sys
+import time
+import argparse
+import datetime
+
+from .serverconfig import load_event, config_values, event_cars, grid_summary, write_server_files
+
+# Os outros modulos (frota, jobs, supervisor, asyncio das metricas...) sao importados
+# dentro dos comandos que os usam: o generate so precisa do serverconfig. Pelo mesmo
+# motivo as opcoes com padrao definido nesses modulos ficam None ate o comando rodar.
+
+
+LOG_POLL = 5.0
+
+
+def cmd_generate(args):
+    start = time.perf_counter()
+    data = load_event(args.event)
+    server = args.server or data.get("server_path")
+    if not server:
+        raise ValueError("Informe a pasta do servidor (--server ou server_path no evento)")
+
+    values = config_values(data)
+    if not args.no_port_check:
+        from .fleet import FLEET_FILE, Fleet
+        from .ports import bound_ports, check_ports
+
+        fleet = Fleet(FLEET_FILE).load()
+        inst = fleet.by_path(server)
+        ports = (values["udp_port"], values["tcp_port"], values["http_port"])
+        check_ports(ports, fleet.port_usage(inst.name if inst else None), bound_ports(fleet.running_pids()))
+    cars = event_cars(data)
+    _, total_slots = grid_summary(cars)
+    if total_slots > values["max_clients"]:
+        print(f"Aviso: grid ({total_slots}) > max_clients ({values['max_clients']}), ajustando.",
+              file=sys.stderr)
+        values["max_clients"] = total_slots
+    entry_list = not args.no_entry_list
+    if entry_list and not cars:
+        print("Aviso: evento sem carros, entry_list.ini nao gerado.", file=sys.stderr)
+        entry_list = False
+
+    result = write_server_files(server, values, cars, entry_list=entry_list)
+    for path in result.written:
+        print(path)
+    if args.verbose:
+        for path in result.unchanged:
+            print(f"{path} (sem mudancas)", file=sys.stderr)
+        for path, changes in result.changes.items():
+            if all(old is None for old, _ in changes.values()):
+                print(f"  {os.path.basename(path)}: arquivo novo", file=sys.stderr)
+                continue
+            for (section, key), (old, new) in changes.items():
+                if "PASSWORD" in key.upper():
+                    old, new = old and "***", new and "***"
+                name = f"{section}.{key}" if section else key
+                print(f"  {os.path.basename(path)} {name}: {old} -> {new}", file=sys.stderr)
+        print(f"Gerado em {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+def _run_bulk(fleet, label, fn, names, workers):
+    """Roda `fn` nas instancias em paralelo e imprime uma linha por instancia."""
+    from .fleet import describe_result
+    from .jobs import DONE, JobScheduler
+
+    jobs = JobScheduler(workers=workers)
+    start = time.perf_counter()
+
+    def report(name, state, value):
+        if state == DONE:
+            print(f"{name}: {describe_result(value)}")
+        else:
+            print(f"{name}: ERRO {value}" if value is not None else f"{name}: cancelado", file=sys.stderr)
+
+    try:
+        run = fleet.run(jobs, label, fn, names, on_result=report)
+        while not run.done():
+            jobs.poll()
+            time.sleep(0.02)
+    finally:
+        jobs.shutdown()
+    fleet.save()
+    print(f"{label}: {len(run.names)} instancia(s) em {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 1 if run.failed() else 0
+
+
+def _print_resources(sampler):
+    from .resources import CPU, RSS, SOCKETS, THREADS
+
+    for name, (pid, last, (p50, p95, p99)) in sorted(sampler.snapshot().items()):
+        print(f"{name}: CPU {last[CPU]:.1f}% (p50 {p50:.1f} / p95 {p95:.1f} / p99 {p99:.1f})  "
+              f"RAM {last[RSS] / 1e6:.0f} MB  threads {last[THREADS]:.0f}  sockets {last[SOCKETS]:.0f}",
+              file=sys.stderr, flush=True)
+
+
+def _serve_metrics(jobs, exporter, port, host):
+    from .metrics import MetricsServer
+
+    def failed(e):
+        print(f"Metricas: porta {port} indisponivel ({e})", file=sys.stderr)
+
+    jobs.submit("metrics", MetricsServer(exporter, port, host).run, dedicated=True, on_error=failed)
+    print(f"Metricas em http://{host}:{port}/metrics", file=sys.stderr)
+
+
+def _supervise(fleet, names, workers, quiet=False, stats=0, metrics=0, metrics_host=None):
+    """Inicia as instancias e as reinicia se cairem, ate Ctrl+C (que para todas)."""
+    from .console import STDERR
+    from .jobs import JobScheduler
+    from .resources import ResourceSampler
+    from .supervisor import BACKOFF, CRASHLOOP, RUNNING, Supervisor, describe_event
+
+    jobs = JobScheduler(workers=workers)
+    fleet.supervisor = Supervisor(
+        jobs, on_event=lambda name, event, data: print(f"{name}: {describe_event(event, data)}", flush=True))
+    sampler = ResourceSampler(fleet.supervisor)
+    if sampler.available:
+        jobs.submit("resources", sampler.run, dedicated=True)
+    analytics = None
+    if metrics:
+        # Pilotos conectados para o /metrics
+        from .logparse import LOG_STATE_FILE, LogAnalytics
+        from .metrics import METRICS_HOST, MetricsExporter
+
+        analytics = LogAnalytics(LOG_STATE_FILE)
+        for inst in fleet.select(names):
+            analytics.watch(inst.name, inst.server_path)
+        exporter = MetricsExporter(fleet.supervisor, sampler if sampler.available else None, analytics, jobs)
+        _serve_metrics(jobs, exporter, metrics, metrics_host or METRICS_HOST)
+    seen = {}
+    next_stats = time.monotonic() + stats
+    next_logs = time.monotonic()
+
+    def poll():
+        nonlocal next_stats, next_logs
+        jobs.poll()
+        now = time.monotonic()
+        if stats and now >= next_stats:
+            next_stats += stats
+            _print_resources(sampler)
+        if analytics is not None and now >= next_logs:
+            next_logs = now + LOG_POLL
+            if analytics.poll():
+                analytics.save()
+        if quiet:
+            return
+        for name, proc in list(fleet.supervisor.procs.items()):
+            lines, seen[name], _ = proc.console.since(seen.get(name, 0))
+            for stream, text in lines:
+                print(f"{name} | {text}", file=sys.stderr if stream == STDERR else sys.stdout)
+
+    status = 0
+    try:
+        start = fleet.operation("start")
+        for inst in fleet.select(names):
+            try:
+                start(inst, None, None)
+            except (OSError, ValueError) as e:
+                print(f"{inst.name}: ERRO {e}", file=sys.stderr)
+                status = 1
+        fleet.save()
+        procs = fleet.supervisor.procs.values()
+        try:
+            while any(proc.state in (RUNNING, BACKOFF) for proc in procs):
+                poll()
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("Parando...", file=sys.stderr)
+            run = fleet.run(jobs, "stop", fleet.operation("stop"), list(fleet.supervisor.procs))
+            while not run.done():
+                poll()
+                time.sleep(0.05)
+        poll()
+    finally:
+        jobs.shutdown()
+    fleet.save()
+    return status or (1 if any(proc.state == CRASHLOOP for proc in procs) else 0)
+
+
+def cmd_fleet(args):
+    from .fleet import FLEET_FILE, Fleet, op_upgrade
+    from .ports import bound_ports, instance_ports
+
+    fleet = Fleet(args.fleet or FLEET_FILE).load()
+    if args.action == "list":
+        for inst in fleet.instances.values():
+            server = inst.config.server
+            print(f"{inst.name}\t{inst.server_path}\t{inst.config.session.track_var or '-'}\t"
+                  f"UDP {server.udp_port} TCP {server.tcp_port} HTTP {server.http_port}")
+        return 0
+    if args.action == "add":
+        if args.import_cfg:
+            inst = fleet.import_server(args.name, args.path)
+        else:
+            inst = fleet.add(args.name, args.path)
+        fleet.save()
+        print("{}: portas UDP {} TCP {} HTTP {}".format(inst.name, *instance_ports(inst.config)))
+        return 0
+    if args.action == "ports":
+        conflicts = fleet.conflicts()
+        for name, ports in fleet.port_usage().items():
+            print("{}\tUDP {} TCP {} HTTP {}".format(name, *ports) + "".join(f"\n  ! {p}" for p in conflicts.get(name, ())))
+        print("Proximo trio livre: UDP {} TCP {} HTTP {}".format(*fleet.allocator(bound_ports(fleet.running_pids())).allocate()))
+        return 1 if conflicts else 0
+    if args.action == "remove":
+        try:
+            fleet.remove(args.name)
+        except KeyError:
+            raise ValueError(f"Instancia desconhecida: {args.name}") from None
+        fleet.save()
+        return 0
+    if args.action == "apply":
+        data = load_event(args.event)
+        cars = event_cars(data) if "server_cars" in data else None
+        changes = fleet.apply(data, args.instance, server_cars=cars)
+        for name, diff in changes.items():
+            print(f"{name}: {', '.join(diff)}", file=sys.stderr)
+        return _run_bulk(fleet, "save", fleet.operation("save"), args.instance, args.workers)
+    if args.action == "supervise":
+        return _supervise(fleet, args.instance, args.workers, args.quiet, args.stats,
+                          args.metrics, args.metrics_host)
+    if args.action == "upgrade":
+        from .installer import RELEASE_CACHE_DIR, Installer, ReleaseCache
+
+        installer = Installer(ReleaseCache(args.cache or RELEASE_CACHE_DIR))
+        return _run_bulk(fleet, "upgrade", op_upgrade(installer, args.offline), args.instance, args.workers)
+    return _run_bulk(fleet, args.action, fleet.operation(args.action), args.instance, args.workers)
+
+
+def cmd_logs(args):
+    """Le o que os logs ganharam desde a ultima vez e mostra o resumo de cada servidor."""
+    from .logparse import LOG_STATE_FILE, LogAnalytics, format_laptime
+
+    analytics = LogAnalytics(args.state or LOG_STATE_FILE)
+    if args.server:
+        targets = {os.path.normcase(os.path.abspath(args.server)): args.server}
+    else:
+        from .fleet import FLEET_FILE, Fleet
+
+        fleet = Fleet(args.fleet or FLEET_FILE).load()
+        targets = {inst.name: inst.server_path for inst in fleet.select(args.instance)}
+    for name, path in targets.items():
+        analytics.watch(name, path)
+    start = time.perf_counter()
+    total = 0
+    while True:
+        # Cada poll le no maximo READ_LIMIT por arquivo, e um trecho pode nao ter eventos:
+        # so para quando nenhum offset anda
+        before = analytics.positions()
+        found = analytics.poll()
+        total += sum(len(events) for events in found.values())
+        if analytics.positions() == before:
+            break
+    analytics.save()
+    for name in targets:
+        stats = analytics.stats[name]
+        print(f"{name}: {stats.summary()}")
+        if stats.online:
+            print("  online: " + ", ".join(sorted(stats.online.values())))
+        for pos, (driver, ms, when) in enumerate(stats.leaderboard(args.laps), 1):
+            print(f"  {pos:2}. {format_laptime(ms)}  {driver}  ({when})")
+        for e in list(stats.recent)[-args.events:] if args.events else ():
+            print(f"  {e.time} {e.kind:<10} {e.name} {e.detail}".rstrip())
+    print(f"{total} evento(s) novo(s) em {(time.perf_counter() - start) * 1000:.0f} ms", file=sys.stderr)
+    return 0
+
+
+def _log_dirs(args):
+    if args.server:
+        return {os.path.normcase(os.path.abspath(args.server)): os.path.join(args.server, "logs")}
+    from .fleet import FLEET_FILE, Fleet
+
+    fleet = Fleet(args.fleet or FLEET_FILE).load()
+    return {inst.name: os.path.join(inst.server_path, "logs") for inst in fleet.select(args.instance)}
+
+
+def cmd_search(args):
+    """Linhas dos logs com todos os termos da consulta (usa e atualiza logs/.index/)."""
+    from .logsearch import SEARCH_LIMIT, search_logs
+
+    limit = SEARCH_LIMIT if args.limit is None else args.limit
+    hits, stats = search_logs(_log_dirs(args), " ".join(args.query), args.since, args.until, limit)
+    for name, hit in hits:
+        print(f"{name}: {hit.line}")
+    more = " (limite atingido)" if len(hits) >= limit else ""
+    indexed = f", {stats['indexed']} indexado(s) agora" if stats["indexed"] else ""
+    print(f"{len(hits)} resultado(s){more} em {stats['files']} arquivo(s){indexed}, {stats['ms']:.0f} ms",
+          file=sys.stderr)
+    return 0 if hits else 1
+
+
+def _day(text):
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data invalida (use AAAA-MM-DD): {text}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m ac_manager", description="AC Server Manager sem interface")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="gera os arquivos de configuracao do servidor")
+    p.add_argument("event", help="descricao do evento (.json, .yml ou .yaml)")
+    p.add_argument("--server", help="pasta do servidor (padrao: server_path do evento)")
+    p.add_argument("--no-entry-list", action="store_true", help="nao gera o entry_list.ini")
+    p.add_argument("--no-port-check", action="store_true",
+                   help="nao confere as portas com a frota e a maquina (ex: gerando para outro host)")
+    p.add_argument("-v", "--verbose", action="store_true", help="mostra o que mudou e o tempo gasto")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("logs", help="pilotos online, melhores voltas e erros lidos dos logs do servidor")
+    p.add_argument("--server", help="so esta pasta de servidor (padrao: as instancias da frota)")
+    p.add_argument("-i", "--instance", action="append", help="so esta instancia (pode repetir)")
+    p.add_argument("--fleet", help="registro da frota (padrao: ac_manager_fleet.json)")
+    p.add_argument("--state", help="offsets e estatisticas (padrao: ac_manager_logs.json)")
+    p.add_argument("--laps", type=int, default=10, help="tamanho do ranking de voltas (padrao: 10)")
+    p.add_argument("--events", type=int, default=0, help="mostra os N eventos mais recentes")
+    p.set_defaults(func=cmd_logs)
+
+    p = sub.add_parser("search", help="busca nos logs antigos (GUID, piloto:NOME, erro:PALAVRA ou texto)")
+    p.add_argument("query", nargs="+", help="termos (todos obrigatorios)")
+    p.add_argument("--server", help="so esta pasta de servidor (padrao: as instancias da frota)")
+    p.add_argument("-i", "--instance", action="append", help="so esta instancia (pode repetir)")
+    p.add_argument("--fleet", help="registro da frota (padrao: ac_manager_fleet.json)")
+    p.add_argument("--since", type=_day, help="a partir do dia (AAAA-MM-DD)")
+    p.add_argument("--until", type=_day, help="ate o dia, inclusive (AAAA-MM-DD)")
+    p.add_argument("--limit", type=int, help="maximo de resultados (padrao: 500)")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("fleet", help="varias instancias do servidor (frota)")
+    p.add_argument("--fleet", help="registro da frota (padrao: ac_manager_fleet.json)")
+    p.set_defaults(func=cmd_fleet)
+    actions = p.add_subparsers(dest="action", required=True)
+    actions.add_parser("list", help="lista as instancias")
+    actions.add_parser("ports", help="portas de cada instancia, conflitos e o proximo trio livre")
+    a = actions.add_parser("add", help="registra uma instancia")
+    a.add_argument("name")
+    a.add_argument("path", help="pasta do servidor da instancia")
+    a.add_argument("--import", dest="import_cfg", action="store_true",
+                   help="le a configuracao atual da pasta (server_cfg.ini, entry_list.ini)")
+    a = actions.add_parser("remove", help="tira uma instancia do registro (nao apaga arquivos)")
+    a.add_argument("name")
+    bulk = {
+        "apply": "aplica os campos de um evento (menos nome e portas) e salva",
+        "save": "grava os arquivos de configuracao",
+        "entry-list": "gera o entry_list.ini",
+        "start": "inicia os servidores",
+        "stop": "para os servidores",
+        "supervise": "inicia os servidores e reinicia os que cairem, ate Ctrl+C",
+        "upgrade": "instala/atualiza o AssettoServer (um download para todas)",
+    }
+    for action, text in bulk.items():
+        a = actions.add_parser(action, help=text)
+        if action == "apply":
+            a.add_argument("event", help="campos a aplicar (.json, .yml ou .yaml)")
+        a.add_argument("-i", "--instance", action="append", help="so esta instancia (pode repetir)")
+        a.add_argument("-j", "--workers", type=int, default=8, help="instancias ao mesmo tempo (padrao: 8)")
+        if action == "supervise":
+            a.add_argument("-q", "--quiet", action="store_true",
+                           help="nao mostra a saida dos servidores (continua em logs/console/)")
+            a.add_argument("--stats", type=float, default=0, metavar="SEGUNDOS",
+                           help="mostra CPU (p50/p95/p99), memoria, threads e sockets a cada N segundos (/proc)")
+            a.add_argument("--metrics", type=int, default=0, metavar="PORTA",
+                           help="serve metricas no formato do Prometheus em http://HOST:PORTA/metrics")
+            a.add_argument("--metrics-host",
+                           help="endereco do endpoint de metricas (padrao: 127.0.0.1, so esta maquina; "
+                                "0.0.0.0 aceita de qualquer uma)")
+        if action == "upgrade":
+            a.add_argument("--offline", action="store_true", help="usa so a versao do cache")
+            a.add_argument("--cache", help="pasta do cache de releases (padrao: ac_manager_releases)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
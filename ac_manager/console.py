@@ -0,0 +1,214 @@
+"""
+Saida (stdout/stderr) dos servidores supervisionados.
+Cada fluxo e lido em pedacos por uma thread propria e as linhas vao para um buffer
+circular de tamanho fixo (memoria limitada mesmo com semanas no ar) e para um
+arquivo com rotacao por tamanho, em que os antigos sao comprimidos com gzip.
+"""
+
+import os
+import re
+import gzip
+import shutil
+import itertools
+import threading
+import collections
+
+
+CONSOLE_LINES = 5000
+MAX_LINE = 4096
+READ_CHUNK = 64 * 1024
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+CONSOLE_DIR = os.path.join("logs", "console")
+CONSOLE_FILE = "console.log"
+
+STDOUT = "out"
+STDERR = "err"
+
+_ANSI = re.compile(rb"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+class ConsoleBuffer:
+    """Ultimas `maxlen` linhas (fluxo, texto), numeradas: `seq` e o total ja recebido.
+
+    Leitores guardam o seq que ja viram e pedem so o que chegou depois (since).
+    """
+
+    def __init__(self, maxlen=CONSOLE_LINES, log=None):
+        self.lines = collections.deque(maxlen=maxlen)
+        self.seq = 0
+        self.log = log
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lines)
+
+    def append(self, stream, lines):
+        if not lines:
+            return
+        with self._lock:
+            self.lines.extend((stream, line) for line in lines)
+            self.seq += len(lines)
+        if self.log is not None:
+            # Fora do lock: disco lento (ou uma rotacao) nao segura o since() da interface;
+            # o RotatingLog tem lock proprio
+            prefix = "" if stream == STDOUT else "[stderr] "
+            self.log.write("".join(f"{prefix}{line}\n" for line in lines).encode("utf-8"))
+
+    def since(self, seq, limit=None):
+        """(linhas novas depois de `seq`, seq atual, linhas perdidas por terem saido do buffer)."""
+        with self._lock:
+            new = self.seq - seq
+            take = min(new, len(self.lines), limit or new)
+            lines = list(itertools.islice(reversed(self.lines), take))
+            lines.reverse()
+            return lines, self.seq, new - take
+
+    def tail(self, n):
+        return self.since(max(0, self.seq - n))[0]
+
+    def clear(self):
+        with self._lock:
+            self.lines.clear()
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+
+
+def _compress(src, dst):
+    tmp = dst + ".tmp"
+    with open(src, "rb") as f, gzip.open(tmp, "wb") as g:
+        shutil.copyfileobj(f, g, 1024 * 1024)
+    os.replace(tmp, dst)
+    os.remove(src)
+
+
+class RotatingLog:
+    """Arquivo que passa de `max_bytes` vira path.1.gz (e os anteriores .2.gz ... .N.gz).
+
+    A compressao roda numa thread a parte para nao segurar a leitura da saida.
+    Um erro de disco (cheio, rotacao que falhou) desliga o arquivo e fica em
+    `error`; quem escreve nao ve a excecao.
+    """
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.error = None
+        self._lock = threading.Lock()
+        self._compressor = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "ab")
+        self.size = self._file.tell()
+
+    def write(self, data):
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                if self.size and self.size + len(data) > self.max_bytes:
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+            except (OSError, ValueError) as e:
+                # ValueError: arquivo ja fechado por uma rotacao que falhou no meio
+                self.error = e
+                self._disable()
+                return
+            self.size += len(data)
+
+    def _disable(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def _rotate(self):
+        self._file.close()
+        if self._compressor is not None:
+            self._compressor.join()
+        first = f"{self.path}.1"
+        if os.path.exists(first):
+            # Sobra de uma compressao interrompida (app fechado no meio)
+            _compress(first, first + ".gz")
+        for i in range(self.backups, 0, -1):
+            src = f"{self.path}.{i}.gz"
+            if not os.path.exists(src):
+                continue
+            if i == self.backups:
+                os.remove(src)
+            else:
+                os.replace(src, f"{self.path}.{i + 1}.gz")
+        os.replace(self.path, first)
+        self._compressor = threading.Thread(target=_compress, args=(first, first + ".gz"),
+                                            name="console-gzip", daemon=True)
+        self._compressor.start()
+        self._file = open(self.path, "ab")
+        self.size = 0
+
+    def files(self):
+        """Arquivo atual e os comprimidos que existem, do mais novo ao mais velho."""
+        names = [self.path] + [f"{self.path}.{i}.gz" for i in range(1, self.backups + 1)]
+        return [name for name in names if os.path.exists(name)]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self._compressor is not None:
+            self._compressor.join()
+
+
+def _decode(raw):
+    if len(raw) > MAX_LINE:
+        raw = raw[:MAX_LINE]
+    return _ANSI.sub(b"", raw).rstrip(b"\r").decode("utf-8", "replace")
+
+
+def _deliver(buffer, stream, lines):
+    try:
+        buffer.append(stream, lines)
+    except Exception:
+        # O pipe tem que continuar sendo lido: parar trava (ou derruba) o servidor
+        pass
+
+
+def _pump(pipe, stream, buffer):
+    """Le o pipe em pedacos (os.read devolve o que houver, sem esperar linha completa)."""
+    fd = pipe.fileno()
+    partial = b""
+    try:
+        while True:
+            try:
+                chunk = os.read(fd, READ_CHUNK)
+            except OSError:
+                break
+            if not chunk:
+                break
+            lines = (partial + chunk).split(b"\n")
+            partial = lines.pop()
+            if len(partial) > MAX_LINE:
+                lines.append(partial)
+                partial = b""
+            _deliver(buffer, stream, [_decode(line) for line in lines])
+        if partial:
+            _deliver(buffer, stream, [_decode(partial)])
+    finally:
+        pipe.close()
+
+
+def capture(process, buffer):
+    """Threads que copiam stdout/stderr de `process` (Popen com PIPE) para `buffer`."""
+    threads = []
+    for pipe, stream in ((process.stdout, STDOUT), (process.stderr, STDERR)):
+        if pipe is None:
+            continue
+        thread = threading.Thread(target=_pump, args=(pipe, stream, buffer),
+                                  name=f"console-{process.pid}-{stream}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
@@ -0,0 +1,344 @@
+"""
+Copia de conteudo (carros/pistas) do jogo para o servidor.
+Tenta reflink, depois hardlink e por fim copia em blocos paralelos; um manifesto
+por item guarda tamanho/mtime (e hash opcional) para so recopiar o que mudou.
+No modo "pacote do servidor" so vao os arquivos que o servidor dedicado le.
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import fnmatch
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+MANIFEST_NAME = ".ac_manager_manifest.json"
+CHUNK_SIZE = 16 * 1024 * 1024
+BUFFER_SIZE = 1024 * 1024
+FICLONE = 0x40049409
+
+_NO_LINK_ERRORS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK,
+                   errno.ENOTSUP, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS, errno.ENOTTY}
+
+# Arquivos (e pastas vazias) que o servidor precisa de cada tipo de conteudo.
+# Padroes fnmatch sobre o caminho relativo em minusculas, com "/" como separador.
+SERVER_PACK_RULES = {
+    "cars": {
+        "files": (
+            "data.acd", "data/*", "collider.kn5",
+            "ui/*.json", "skins/*/ui_skin.json",
+        ),
+        "dirs": ("skins/*",),
+    },
+    "tracks": {
+        "files": (
+            "surfaces.ini", "models*.ini", "map.png", "map.ini",
+            "data/*", "*/data/*", "ai/*.ai", "*/ai/*.ai", "*/map.png", "*/map.ini",
+            "ui/*.json", "ui/*/*.json",
+        ),
+        "dirs": (),
+    },
+}
+
+
+class DeployCancelled(Exception):
+    pass
+
+
+@dataclass
+class DeployResult:
+    copied: int = 0
+    skipped: int = 0
+    removed: int = 0
+    bytes_copied: int = 0
+    seconds: float = 0.0
+    methods: dict = field(default_factory=dict)
+
+    @property
+    def rate(self):
+        return self.bytes_copied / self.seconds if self.seconds > 0 else 0.0
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(BUFFER_SIZE), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+
+def _matcher(patterns):
+    patterns = tuple(p.lower() for p in patterns)
+    return lambda rel: any(fnmatch.fnmatchcase(rel.lower(), p) for p in patterns)
+
+
+def server_pack_filters(kind):
+    """(include_arquivo, include_pasta) do pacote minimo de `kind` ("cars"/"tracks")."""
+    rules = SERVER_PACK_RULES[kind]
+    return _matcher(rules["files"]), _matcher(rules["dirs"])
+
+
+def walk_tree(root):
+    """Arquivos {rel: (tamanho, mtime_ns)} e lista de pastas relativas de `root` (rel com /)."""
+    files = {}
+    dirs = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                for e in it:
+                    rel = f"{rel_dir}/{e.name}" if rel_dir else e.name
+                    if e.is_dir():
+                        stack.append(rel)
+                        dirs.append(rel)
+                    elif e.is_file() and e.name != MANIFEST_NAME:
+                        st = e.stat()
+                        files[rel] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+    return files, dirs
+
+
+def walk_files(root):
+    """{caminho relativo (com /): (tamanho, mtime_ns)} de todos os arquivos de `root`."""
+    return walk_tree(root)[0]
+
+
+def _prune_dirs(dst, rel, keep=None):
+    """Apaga as pastas de `rel` que ficaram vazias (ate `dst`), menos as escolhidas por `keep`."""
+    parts = rel.split("/")[:-1]
+    while parts and not (keep is not None and keep("/".join(parts))):
+        try:
+            os.rmdir(os.path.join(dst, *parts))
+        except OSError:
+            return
+        parts.pop()
+
+
+def load_manifest(dst):
+    try:
+        with open(os.path.join(dst, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except Exception:
+        return {}
+
+
+def save_manifest(dst, files):
+    path = os.path.join(dst, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "files": files}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+class Deployer:
+    """Instala uma pasta de origem em `dst` de forma incremental.
+
+    `progress(feito, total, bytes_por_seg)` e chamado de threads do pool;
+    `cancel` e um threading.Event.
+    """
+
+    def __init__(self, workers=4, chunk_size=CHUNK_SIZE, hash_files=False):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.hash_files = hash_files
+        self._reflink_ok = fcntl is not None and sys.platform.startswith("linux")
+        self._hardlink_ok = True
+
+    def deploy(self, src, dst, include=None, include_dirs=None, progress=None, cancel=None):
+        """Sincroniza `src` -> `dst`.
+
+        `include(rel)` filtra os arquivos (None = todos) e `include_dirs(rel)`
+        escolhe pastas criadas mesmo vazias (ex: nomes das skins).
+        """
+        start = time.monotonic()
+        result = DeployResult()
+        os.makedirs(dst, exist_ok=True)
+
+        files, dirs = walk_tree(src)
+        if include is not None:
+            files = {rel: st for rel, st in files.items() if include(rel)}
+        if include_dirs is not None:
+            for rel in dirs:
+                if include_dirs(rel):
+                    os.makedirs(os.path.join(dst, *rel.split("/")), exist_ok=True)
+        manifest = load_manifest(dst)
+        if not manifest and not os.path.exists(os.path.join(dst, MANIFEST_NAME)):
+            # Pasta copiada sem o manifesto (versao antiga, a mao): o que ja esta no destino
+            # entra como copiado, entao o que e igual nao e recopiado. Arquivos que a origem
+            # nao tem so entram (e saem) no modo com filtro; numa copia completa podem ser
+            # do servidor (skins, dados extras) e ficam.
+            manifest = {rel: [size, mtime, None] for rel, (size, mtime) in walk_files(dst).items()
+                        if include is not None or rel in files}
+
+        todo = []
+        for rel, (size, mtime) in sorted(files.items()):
+            old = manifest.get(rel)
+            target = os.path.join(dst, *rel.split("/"))
+            if old and old[0] == size and os.path.exists(target):
+                if old[1] == mtime:
+                    result.skipped += 1
+                    continue
+                if self.hash_files and old[2] and file_hash(os.path.join(src, rel)) == old[2]:
+                    manifest[rel] = [size, mtime, old[2]]
+                    result.skipped += 1
+                    continue
+            todo.append(rel)
+
+        for rel in [r for r in manifest if r not in files]:
+            try:
+                os.remove(os.path.join(dst, *rel.split("/")))
+            except OSError:
+                pass
+            else:
+                _prune_dirs(dst, rel, include_dirs)
+            del manifest[rel]
+            result.removed += 1
+
+        total = sum(files[rel][0] for rel in todo)
+        done = [0]
+        lock = threading.Lock()
+        last_report = [0.0]
+
+        def account(n):
+            with lock:
+                done[0] += n
+                result.bytes_copied += n
+                now = time.monotonic()
+                if progress and (now - last_report[0] > 0.2 or done[0] >= total):
+                    last_report[0] = now
+                    elapsed = max(now - start, 1e-6)
+                    progress(done[0], total, done[0] / elapsed)
+
+        if progress:
+            progress(0, total, 0.0)
+        try:
+            self._transfer(src, dst, todo, files, manifest, result, account, cancel)
+        finally:
+            save_manifest(dst, manifest)
+            result.seconds = time.monotonic() - start
+        return result
+
+    def deploy_server_pack(self, kind, src, dst, progress=None, cancel=None):
+        """Sincroniza so o pacote minimo do servidor; o resto sai do destino."""
+        include, include_dirs = server_pack_filters(kind)
+        return self.deploy(src, dst, include=include, include_dirs=include_dirs,
+                           progress=progress, cancel=cancel)
+
+    def _transfer(self, src, dst, todo, files, manifest, result, account, cancel):
+        pending = {}
+        tasks = []
+        lock = threading.Lock()
+        abort = threading.Event()
+
+        def stopped():
+            return abort.is_set() or (cancel is not None and cancel.is_set())
+
+        def finish(rel, method):
+            size, mtime = files[rel]
+            target = os.path.join(dst, *rel.split("/"))
+            if method == "copy":
+                os.utime(target, ns=(mtime, mtime))
+            digest = file_hash(os.path.join(src, rel)) if self.hash_files else None
+            with lock:
+                manifest[rel] = [size, mtime, digest]
+                result.copied += 1
+                result.methods[method] = result.methods.get(method, 0) + 1
+
+        for rel in todo:
+            if stopped():
+                raise DeployCancelled()
+            source = os.path.join(src, rel)
+            target = os.path.join(dst, *rel.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.lexists(target):
+                # Nunca escrever por cima: o destino pode ser um hardlink da origem
+                os.remove(target)
+
+            method = self._link(source, target)
+            if method:
+                account(files[rel][0])
+                finish(rel, method)
+                continue
+
+            size = files[rel][0]
+            with open(target, "wb") as f:
+                f.truncate(size)
+            offsets = list(range(0, size, self.chunk_size)) or [0]
+            pending[rel] = len(offsets)
+            for off in offsets:
+                tasks.append((rel, source, target, off, min(self.chunk_size, size - off)))
+
+        if not tasks:
+            return
+
+        def run(rel, source, target, off, length):
+            self._copy_range(source, target, off, length, account, stopped)
+            with lock:
+                pending[rel] -= 1
+                last = pending[rel] == 0
+            if last:
+                finish(rel, "copy")
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="deploy") as pool:
+            futures = [pool.submit(run, *task) for task in tasks]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for fut in not_done:
+                fut.cancel()
+            for fut in done:
+                exc = fut.exception()
+                if exc is not None:
+                    abort.set()
+                    wait(not_done)
+                    raise exc
+
+    def _link(self, source, target):
+        if self._reflink_ok:
+            try:
+                with open(source, "rb") as fi, open(target, "wb") as fo:
+                    fcntl.ioctl(fo.fileno(), FICLONE, fi.fileno())
+                st = os.stat(source)
+                os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+                return "reflink"
+            except OSError as e:
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+                if e.errno in _NO_LINK_ERRORS:
+                    self._reflink_ok = False
+        if self._hardlink_ok:
+            try:
+                os.link(source, target)
+                return "hardlink"
+            except OSError as e:
+                if e.errno in _NO_LINK_ERRORS or getattr(e, "winerror", None):
+                    self._hardlink_ok = False
+        return None
+
+    @staticmethod
+    def _copy_range(source, target, offset, length, account, stopped):
+        with open(source, "rb") as fi, open(target, "r+b") as fo:
+            fi.seek(offset)
+            fo.seek(offset)
+            remaining = length
+            while remaining > 0:
+                if stopped():
+                    raise DeployCancelled()
+                buf = fi.read(min(BUFFER_SIZE, remaining))
+                if not buf:
+                    break
+                fo.write(buf)
+                remaining -= len(buf)
+                account(len(buf))
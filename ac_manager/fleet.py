@@ -0,0 +1,343 @@
+"""
+Frota de servidores: varias instancias do AssettoServer na mesma maquina.
+Cada instancia tem nome, pasta e configuracao proprias; o conteudo vem todo do
+mesmo jogo (um so catalogo e um so Deployer). As operacoes em lote rodam em
+paralelo no JobScheduler, um job por instancia, e devolvem o resultado de cada uma.
+"""
+
+import os
+import json
+import functools
+import subprocess
+from dataclasses import dataclass, field
+
+from .jobs import DONE, FAILED, CANCELLED
+from .model import ServerConfig, slotted
+from .ports import PortAllocator, bound_ports, check_ports, find_conflicts, instance_ports
+from .supervisor import find_server_exe, popen_options, process_start, same_process, terminate_pid
+from .serverconfig import (
+    entry_list_cars, read_csp_extra_options, read_server_cfg, read_text,
+    write_entry_list, write_if_changed, write_server_files,
+)
+
+
+FLEET_FILE = "ac_manager_fleet.json"
+
+# Campos que identificam cada instancia: "aplicar a frota" nunca copia estes
+INSTANCE_FIELDS = ("server_name", "udp_port", "tcp_port", "http_port")
+
+
+@slotted
+@dataclass
+class Instance:
+    name: str
+    server_path: str
+    config: ServerConfig = field(default_factory=ServerConfig)
+    server_cars: list = field(default_factory=list)
+    pid: int = 0
+    pid_start: str = ""
+
+    def to_dict(self):
+        data = self.config.to_dict()
+        data.update(server_path=self.server_path, server_cars=self.server_cars,
+                    pid=self.pid, pid_start=self.pid_start)
+        return data
+
+    def set_pid(self, pid):
+        """Guarda o PID com a marca de inicio do processo (ver live_pid)."""
+        self.pid = pid or 0
+        self.pid_start = (process_start(pid) or "") if pid else ""
+
+    def live_pid(self):
+        """PID guardado, se ainda for o mesmo processo; um PID velho (reboot, reuso) e limpo."""
+        if self.pid and same_process(self.pid, self.pid_start):
+            return self.pid
+        self.pid, self.pid_start = 0, ""
+        return 0
+
+    @classmethod
+    def from_dict(cls, name, data):
+        return cls(
+            name=name,
+            server_path=str(data.get("server_path", "")),
+            config=ServerConfig.from_dict(data),
+            server_cars=[dict(c) for c in data.get("server_cars") or []],
+            pid=int(data.get("pid") or 0),
+            pid_start=str(data.get("pid_start") or ""),
+        )
+
+
+# Operacoes: fn(instancia, job, _) -> resultado, rodando numa thread de trabalho
+
+def op_save(inst, job, _):
+    return write_server_files(inst.server_path, inst.config.to_dict(), inst.server_cars, entry_list=False)
+
+
+def op_entry_list(inst, job, _):
+    return write_entry_list(inst.server_path, inst.server_cars)
+
+
+def op_start(inst, job, _, supervisor=None):
+    """Inicia o servidor da instancia; devolve o PID (o mesmo, se ja estava rodando).
+
+    Com `supervisor` o processo e vigiado (reiniciado se cair, com aviso de
+    quando fica pronto); sem ele (linha de comando) fica solto e so o PID e guardado.
+    """
+    proc = supervisor.get(inst.name) if supervisor else None
+    if proc is not None and proc.running:
+        inst.set_pid(proc.pid)
+        return inst.pid
+    if inst.live_pid():
+        return inst.pid
+    exe = find_server_exe(inst.server_path)
+    if exe is None:
+        raise FileNotFoundError(f"Nenhum executavel do servidor em {inst.server_path}")
+    if supervisor:
+        from .readiness import ReadinessProbe
+
+        probe = ReadinessProbe.for_server(inst.server_path)
+        inst.set_pid(supervisor.start(inst.name, [exe], inst.server_path, probe=probe).pid)
+    else:
+        inst.set_pid(subprocess.Popen([exe], cwd=inst.server_path, **popen_options()).pid)
+    return inst.pid
+
+
+def op_stop(inst, job, _, supervisor=None):
+    """Encerra so o processo desta instancia. True se havia algo rodando."""
+    pid = inst.live_pid()
+    inst.set_pid(0)
+    if supervisor and supervisor.get(inst.name) is not None:
+        return supervisor.stop(inst.name)
+    # Iniciado por outro processo (ex: linha de comando): so o PID, e so se ainda e o mesmo processo
+    return terminate_pid(pid, check=job.check) if pid else False
+
+
+def op_upgrade(installer, offline=False):
+    """Operacao que instala/atualiza o AssettoServer em cada instancia (um download so)."""
+    def upgrade(inst, job, _):
+        return installer.install(inst.server_path, cancel=job.cancel_event, offline=offline)
+    return upgrade
+
+
+def op_content(deployer, game_path, server_pack=False):
+    """Operacao que leva a pista e os carros do grid do jogo para cada instancia."""
+    def content(inst, job, _):
+        items = [("cars", c["model"]) for c in inst.server_cars]
+        track = inst.config.session.track_var
+        if track:
+            items.append(("tracks", track))
+        results = {}
+        for kind, name in dict.fromkeys(items):
+            job.check()
+            src = os.path.join(game_path, "content", kind, name)
+            dst = os.path.join(inst.server_path, "content", kind, name)
+            if not os.path.isdir(src) or os.path.islink(dst):
+                continue
+            if server_pack:
+                results[name] = deployer.deploy_server_pack(kind, src, dst, cancel=job.cancel_event)
+            else:
+                results[name] = deployer.deploy(src, dst, cancel=job.cancel_event)
+        return results
+    return content
+
+
+def describe_result(value):
+    """Resumo de uma linha do resultado de uma operacao."""
+    if isinstance(value, bool):
+        return "ok" if value else "nada a fazer"
+    if hasattr(value, "written"):
+        return f"{len(value.written)} arquivo(s) gravado(s)" if value.written else "sem mudancas"
+    if isinstance(value, tuple) and len(value) == 2 and hasattr(value[1], "written"):
+        asset, result = value
+        return f"{asset.tag}: {result.written} gravados, {result.unchanged} iguais"
+    if isinstance(value, dict):
+        return f"{len(value)} item(ns) sincronizado(s)"
+    if isinstance(value, int):
+        return f"PID {value}"
+    return "ok"
+
+
+OPERATIONS = {
+    "save": op_save,
+    "entry-list": op_entry_list,
+    "start": op_start,
+    "stop": op_stop,
+}
+
+
+class BulkRun:
+    """Uma operacao em varias instancias ao mesmo tempo.
+
+    `results` e {nome: (estado, resultado ou excecao)}; on_result(nome, estado,
+    valor) chega a cada instancia concluida e on_done(results) no fim, ambos na
+    thread que chama JobScheduler.poll.
+    """
+
+    def __init__(self, jobs, label, fn, instances, on_result=None, on_done=None):
+        self.label = label
+        self.names = [inst.name for inst in instances]
+        self.results = {}
+        self._on_result = on_result
+        self._on_done = on_done
+        self.jobs = [
+            jobs.submit(
+                f"{label}:{inst.name}", functools.partial(fn, inst),
+                lane=f"fleet:{inst.name}",
+                on_done=functools.partial(self._finish, inst.name, DONE),
+                on_error=functools.partial(self._finish, inst.name, FAILED),
+                on_cancel=functools.partial(self._finish, inst.name, CANCELLED, None),
+            )
+            for inst in instances
+        ]
+        if not instances and on_done:
+            on_done(self.results)
+
+    def done(self):
+        return len(self.results) == len(self.names)
+
+    def failed(self):
+        return [name for name, (state, _) in self.results.items() if state != DONE]
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def _finish(self, name, state, value):
+        self.results[name] = (state, value)
+        if self._on_result:
+            self._on_result(name, state, value)
+        if self.done() and self._on_done:
+            self._on_done(self.results)
+
+
+class Fleet:
+    """Registro das instancias, salvo em `path` (JSON)."""
+
+    def __init__(self, path=FLEET_FILE, supervisor=None):
+        self.path = path
+        self.supervisor = supervisor
+        self.instances = {}
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        for name, item in (data.get("instances") or {}).items():
+            self.instances[name] = Instance.from_dict(name, item)
+        return self
+
+    def save(self):
+        data = {"version": 1, "instances": {name: inst.to_dict() for name, inst in self.instances.items()}}
+        return write_if_changed(self.path, json.dumps(data, indent=2, ensure_ascii=False))
+
+    def names(self):
+        return list(self.instances)
+
+    def add(self, name, server_path, config=None, server_cars=None):
+        """Registra uma instancia; se as portas dela colidem com outra, recebe portas livres."""
+        name = name.strip()
+        if not name:
+            raise ValueError("Nome da instancia vazio")
+        if name in self.instances:
+            raise ValueError(f"Ja existe uma instancia chamada '{name}'")
+        inst = Instance(name, os.path.abspath(server_path), config or ServerConfig(),
+                        [dict(c) for c in server_cars or []])
+        if find_conflicts(instance_ports(inst.config), self.port_usage()):
+            # Mesmas portas de outra instancia (ex: todas no padrao 9600): pega um trio livre
+            server = inst.config.server
+            server.udp_port, server.tcp_port, server.http_port = \
+                self.allocator(bound_ports(self.running_pids())).allocate()
+        self.instances[name] = inst
+        return inst
+
+    def import_server(self, name, server_path):
+        """Adiciona uma pasta de servidor ja configurada, lendo os arquivos dela."""
+        cfg = os.path.join(server_path, "cfg")
+        values = read_server_cfg(read_text(os.path.join(cfg, "server_cfg.ini")))
+        values.update(read_csp_extra_options(read_text(os.path.join(cfg, "csp_extra_options.ini"))))
+        cars = entry_list_cars(read_text(os.path.join(cfg, "entry_list.ini")))
+        return self.add(name, server_path, ServerConfig.from_dict(values), cars)
+
+    def running_pids(self):
+        pids = []
+        for inst in self.instances.values():
+            proc = self.supervisor.get(inst.name) if self.supervisor else None
+            pid = proc.pid if proc is not None and proc.running else inst.live_pid()
+            if pid:
+                pids.append(pid)
+        return pids
+
+    def port_usage(self, exclude=None):
+        """{nome: (udp, tcp, http)} das instancias (menos `exclude`)."""
+        return {name: instance_ports(inst.config) for name, inst in self.instances.items() if name != exclude}
+
+    def allocator(self, bound=None):
+        return PortAllocator.scan(self.port_usage().values(), bound)
+
+    def conflicts(self, names=None):
+        """{nome: [problemas]} das instancias com portas em conflito."""
+        bound = bound_ports(self.running_pids())
+        found = {}
+        for inst in self.select(names):
+            problems = find_conflicts(instance_ports(inst.config), self.port_usage(inst.name), bound)
+            if problems:
+                found[inst.name] = problems
+        return found
+
+    def checked(self, fn):
+        """`fn` precedida da verificacao de portas contra a frota e a maquina."""
+        def run(inst, job, prev):
+            # Sockets das instancias rodando ja aparecem em port_usage
+            bound = bound_ports(self.running_pids())
+            check_ports(instance_ports(inst.config), self.port_usage(inst.name), bound)
+            return fn(inst, job, prev)
+        return run
+
+    def operation(self, name):
+        """Operacao de OPERATIONS; salvar e iniciar recusam portas em conflito."""
+        fn = OPERATIONS[name]
+        if name in ("start", "stop"):
+            fn = functools.partial(fn, supervisor=self.supervisor)
+        return self.checked(fn) if name in ("save", "start") else fn
+
+    def by_path(self, server_path):
+        path = os.path.normcase(os.path.abspath(server_path))
+        for inst in self.instances.values():
+            if os.path.normcase(inst.server_path) == path:
+                return inst
+        return None
+
+    def remove(self, name):
+        del self.instances[name]
+
+    def select(self, names=None):
+        """Instancias de `names` (None/vazio = todas); ValueError para nome desconhecido."""
+        if not names:
+            return list(self.instances.values())
+        unknown = [n for n in names if n not in self.instances]
+        if unknown:
+            raise ValueError(f"Instancia desconhecida: {', '.join(unknown)}")
+        return [self.instances[n] for n in names]
+
+    def apply(self, values, names=None, server_cars=None, keep=INSTANCE_FIELDS):
+        """Copia os campos de `values` (menos `keep`) para as instancias.
+
+        Retorna {nome: {campo: (antes, depois)}} das instancias que mudaram.
+        """
+        values = {k: v for k, v in values.items() if k not in keep}
+        changes = {}
+        for inst in self.select(names):
+            before = inst.config.copy()
+            inst.config.update(values)
+            diff = before.diff(inst.config)
+            if server_cars is not None and server_cars != inst.server_cars:
+                diff["server_cars"] = (inst.server_cars, server_cars)
+                inst.server_cars = [dict(c) for c in server_cars]
+            if diff:
+                changes[inst.name] = diff
+        return changes
+
+    def run(self, jobs, label, fn, names=None, on_result=None, on_done=None):
+        return BulkRun(jobs, label, fn, self.select(names), on_result, on_done)
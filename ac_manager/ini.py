@@ -0,0 +1,172 @@
+"""
+Leitura e escrita de arquivos .ini sem perder nada do texto original.
+Uma passada pelas linhas guarda secoes, chaves, comentarios e a ordem; mudar um
+valor reescreve so a linha dele, entao um arquivo carregado e salvo sem
+alteracoes sai com os mesmos bytes. Chaves e secoes desconhecidas ficam onde estao.
+"""
+
+
+class IniSection:
+    """Linhas cruas de uma secao (a primeira e o cabecalho, menos no preambulo)."""
+
+    __slots__ = ("name", "lines", "keys", "values")
+
+    def __init__(self, name, lines):
+        self.name = name
+        self.lines = lines
+        self.keys = {}
+        self.values = {}
+
+    def _index(self):
+        self.keys.clear()
+        for i, raw in enumerate(self.lines):
+            key = _key(raw)
+            if key is not None:
+                self.keys[key] = i
+
+    def _insert_at(self):
+        """Posicao para uma chave nova: depois da ultima chave (ou do cabecalho)."""
+        if self.keys:
+            return max(self.keys.values()) + 1
+        return 1 if self.name is not None else 0
+
+
+def _key(raw):
+    s = raw.strip()
+    if not s or s[0] in ";#[":
+        return None
+    key, sep, _ = s.partition("=")
+    return key.rstrip() if sep else None
+
+
+def _eol(raw):
+    if raw.endswith("\r\n"):
+        return "\r\n"
+    return "\n" if raw.endswith("\n") else ""
+
+
+class IniDocument:
+    """Arquivo .ini editavel. Chaves diferenciam maiusculas (como optionxform=str).
+
+    Chave repetida numa secao: vale a ultima. Secao repetida: vale a primeira.
+    """
+
+    def __init__(self, newline="\n"):
+        self.newline = newline
+        self._sections = [IniSection(None, [])]
+        self._by_name = {}
+
+    @classmethod
+    def parse(cls, text):
+        doc = cls()
+        section = doc._sections[0]
+        sections = doc._sections
+        by_name = doc._by_name
+        first = True
+        for raw in text.splitlines(True):
+            if first:
+                doc.newline = _eol(raw) or doc.newline
+                first = False
+            s = raw.strip()
+            if s[:1] == "[" and s[-1:] == "]":
+                section = IniSection(s[1:-1].strip(), [raw])
+                sections.append(section)
+                by_name.setdefault(section.name, section)
+                continue
+            section.lines.append(raw)
+            if not s or s[0] in ";#[":
+                continue
+            key, sep, value = s.partition("=")
+            if sep:
+                key = key.rstrip()
+                section.keys[key] = len(section.lines) - 1
+                section.values[key] = value.lstrip()
+        return doc
+
+    def dumps(self):
+        return "".join(raw for section in self._sections for raw in section.lines)
+
+    __str__ = dumps
+
+    def sections(self):
+        return [s.name for s in self._sections if s.name is not None]
+
+    def has_section(self, name):
+        return name in self._by_name
+
+    def items(self, name):
+        section = self._by_name.get(name)
+        return dict(section.values) if section else {}
+
+    def get(self, name, key, default=None):
+        section = self._by_name.get(name)
+        if section is None:
+            return default
+        return section.values.get(key, default)
+
+    def set(self, name, key, value, before=()):
+        """Grava key=value; devolve False se o valor ja era esse.
+
+        Secao nova entra antes da primeira de `before` que existir (ou no fim).
+        """
+        value = str(value)
+        section = self._by_name.get(name)
+        if section is None:
+            section = self.add_section(name, before)
+        elif section.values.get(key) == value:
+            return False
+        i = section.keys.get(key)
+        if i is not None:
+            section.lines[i] = f"{key}={value}{_eol(section.lines[i])}"
+        else:
+            i = section._insert_at()
+            if i > 0 and not _eol(section.lines[i - 1]):
+                section.lines[i - 1] += self.newline
+            section.lines.insert(i, f"{key}={value}{self.newline}")
+            section._index()
+        section.values[key] = value
+        return True
+
+    def add_section(self, name, before=()):
+        section = IniSection(name, [f"[{name}]{self.newline}"])
+        for other in before:
+            target = self._by_name.get(other)
+            if target is not None:
+                section.lines.append(self.newline)
+                self._sections.insert(self._sections.index(target), section)
+                break
+        else:
+            last = self._sections[-1]
+            if last.lines:
+                if not _eol(last.lines[-1]):
+                    last.lines[-1] += self.newline
+                if last.lines[-1].strip():
+                    last.lines.append(self.newline)
+            self._sections.append(section)
+        self._by_name[name] = section
+        return section
+
+    def remove_section(self, name):
+        """Remove todas as secoes `name`; devolve False se nao havia nenhuma."""
+        if name not in self._by_name:
+            return False
+        del self._by_name[name]
+        was_last = self._sections[-1].name == name
+        self._sections = [s for s in self._sections if s.name != name]
+        last = self._sections[-1]
+        if was_last:
+            # Nada depois: a linha em branco que separava nao serve mais
+            while len(last.lines) > 1 and not last.lines[-1].strip():
+                last.lines.pop()
+        return True
+
+    def diff(self, other):
+        """{(secao, chave): (valor aqui, valor em other)} das chaves diferentes; None = ausente."""
+        changes = {}
+        for name in dict.fromkeys(self.sections() + other.sections()):
+            mine, theirs = self.items(name), other.items(name)
+            for key in dict.fromkeys([*mine, *theirs]):
+                a, b = mine.get(key), theirs.get(key)
+                if a != b:
+                    changes[(name, key)] = (a, b)
+        return changes
@@ -0,0 +1,496 @@
+"""
+Download e instalacao do AssettoServer a partir das releases do GitHub.
+O zip vai direto para um arquivo .part (retomado com Range se cair), e conferido
+pelo tamanho e pelo digest sha256 do asset e so entao extraido.
+Os zips ficam num cache local por tag/asset, e a consulta a API usa ETag.
+Atualizar uma instalacao existente so regrava os arquivos cujo CRC32/tamanho
+mudou, sem tocar em cfg/, extra_cfg.yml e content/.
+"""
+
+import os
+import ssl
+import json
+import time
+import zlib
+import shutil
+import socket
+import hashlib
+import zipfile
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+
+try:
+    import certifi
+except ImportError:
+    certifi = None
+
+
+GITHUB_API = "https://api.github.com/repos/compujuckel/AssettoServer/releases/latest"
+ASSET_MATCH = "win-x64"
+USER_AGENT = "AC-Server-Manager"
+CHUNK_SIZE = 256 * 1024
+RETRIES = 5
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+RELEASE_CACHE_DIR = "ac_manager_releases"
+INSTALL_MANIFEST = ".ac_manager_install.json"
+# Caminhos do servidor que pertencem ao usuario: criados se faltarem, nunca sobrescritos
+PRESERVE = ("cfg/", "content/", "extra_cfg.yml")
+
+_NETWORK_ERRORS = (urllib.error.URLError, http.client.HTTPException, ConnectionError, socket.timeout)
+
+
+class InstallError(Exception):
+    pass
+
+
+class InstallCancelled(Exception):
+    pass
+
+
+@dataclass
+class ExtractResult:
+    written: int = 0
+    unchanged: int = 0
+    preserved: int = 0
+    removed: int = 0
+    bytes_written: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class ReleaseAsset:
+    tag: str
+    name: str
+    url: str
+    size: int
+    digest: str = ""
+
+    @property
+    def sha256(self):
+        algo, _, value = self.digest.partition(":")
+        return value.lower() if algo.lower() == "sha256" and value else None
+
+
+def ssl_context():
+    """Contexto TLS com verificacao; usa o certifi quando instalado."""
+    if certifi is not None:
+        return ssl.create_default_context(cafile=certifi.where())
+    return ssl.create_default_context()
+
+
+def _open(url, context, timeout, headers=None):
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, **(headers or {})})
+    if url.startswith("https:"):
+        return urllib.request.urlopen(req, timeout=timeout, context=context)
+    return urllib.request.urlopen(req, timeout=timeout)
+
+
+def fetch_release(api_url=GITHUB_API, match=ASSET_MATCH, context=None, timeout=30, cache=None):
+    """Le a release da API e devolve o asset cujo nome contem `match`.
+
+    Com `cache` a requisicao leva If-None-Match; um 304, limite de taxa ou
+    falta de rede reaproveitam a ultima resposta guardada.
+    """
+    etag, cached = cache.api_entry(api_url) if cache else (None, None)
+    headers = {"Accept": "application/vnd.github+json"}
+    if etag and cached is not None:
+        headers["If-None-Match"] = etag
+    try:
+        with _open(api_url, context or ssl_context(), timeout, headers) as r:
+            data = json.loads(r.read().decode("utf-8"))
+            if cache:
+                cache.store_api(api_url, r.headers.get("ETag"), data)
+    except urllib.error.HTTPError as e:
+        if cached is None or not (e.code == 304 or e.code in (403, 429) or e.code >= 500):
+            raise
+        data = cached
+    except _NETWORK_ERRORS:
+        if cached is None:
+            raise
+        data = cached
+    return _pick_asset(data, match)
+
+
+def _pick_asset(data, match):
+    for asset in data.get("assets", []):
+        if match in asset.get("name", ""):
+            return ReleaseAsset(
+                tag=data.get("tag_name", ""),
+                name=asset["name"],
+                url=asset["browser_download_url"],
+                size=int(asset.get("size") or 0),
+                digest=asset.get("digest") or "",
+            )
+    raise InstallError(f"Nenhum asset '{match}' na release {data.get('tag_name', '')}")
+
+
+def _safe_name(name):
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in name) or "_"
+
+
+class ReleaseCache:
+    """Zips de release guardados em `root`/<tag>/<asset> e a ultima resposta da API.
+
+    Quando o total passa de `max_bytes`, os zips usados ha mais tempo saem
+    primeiro. O indice e um JSON gravado de forma atomica.
+    """
+
+    INDEX = "index.json"
+
+    def __init__(self, root, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self._index = None
+
+    def _data(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.root, self.INDEX), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except Exception:
+                self._index = {}
+            self._index.setdefault("api", {})
+            self._index.setdefault("assets", {})
+        return self._index
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, self.INDEX)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def key(asset):
+        return f"{asset.tag}/{asset.name}"
+
+    def path(self, asset):
+        return os.path.join(self.root, _safe_name(asset.tag), _safe_name(asset.name))
+
+    def api_entry(self, url):
+        with self.lock:
+            entry = self._data()["api"].get(url)
+            return (entry["etag"], entry["release"]) if entry else (None, None)
+
+    def store_api(self, url, etag, release):
+        with self.lock:
+            self._data()["api"][url] = {"etag": etag, "release": release}
+            self._save()
+
+    def lookup(self, asset):
+        """Caminho do zip ja baixado e conferido de `asset`, ou None."""
+        with self.lock:
+            entry = self._data()["assets"].get(self.key(asset))
+            path = self.path(asset)
+            if not entry or entry["digest"] != asset.digest:
+                return None
+            try:
+                if os.path.getsize(path) != entry["size"]:
+                    return None
+            except OSError:
+                return None
+            entry["used"] = time.time()
+            self._save()
+            return path
+
+    def add(self, asset):
+        """Registra o zip conferido em path(asset) e aplica o limite de tamanho."""
+        with self.lock:
+            now = time.time()
+            self._data()["assets"][self.key(asset)] = {
+                "tag": asset.tag, "name": asset.name, "url": asset.url,
+                "size": os.path.getsize(self.path(asset)), "digest": asset.digest,
+                "added": now, "used": now,
+            }
+            self.evict(keep=self.key(asset))
+            self._save()
+
+    def evict(self, keep=None):
+        with self.lock:
+            assets = self._data()["assets"]
+            total = sum(e["size"] for e in assets.values())
+            for key, entry in sorted(assets.items(), key=lambda kv: kv[1]["used"]):
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                try:
+                    os.remove(os.path.join(self.root, _safe_name(entry["tag"]), _safe_name(entry["name"])))
+                except OSError:
+                    pass
+                del assets[key]
+                total -= entry["size"]
+
+    def newest(self, match=ASSET_MATCH):
+        """Asset mais recente ja baixado cujo nome contem `match` (modo offline)."""
+        with self.lock:
+            entries = [e for e in self._data()["assets"].values() if match in e["name"]]
+        if not entries:
+            return None
+        e = max(entries, key=lambda e: e["added"])
+        return ReleaseAsset(tag=e["tag"], name=e["name"], url=e["url"], size=e["size"], digest=e["digest"])
+
+
+def _crc32(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(buf, crc)
+    return crc
+
+
+def _preserved(rel, preserve):
+    rel = rel.lower()
+    return any(rel.startswith(p) if p.endswith("/") else rel == p for p in preserve)
+
+
+def _swap_in(tmp, target):
+    """os.replace que tambem funciona com o .exe em uso no Windows (renomeia o antigo)."""
+    try:
+        os.replace(tmp, target)
+    except PermissionError:
+        old = target + ".old"
+        if os.path.exists(old):
+            os.remove(old)
+        os.replace(target, old)
+        os.replace(tmp, target)
+
+
+def _hash_file(path, h):
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(buf)
+
+
+class Installer:
+    """Baixa, confere e extrai um asset de release.
+
+    `progress(etapa, feito, total, bytes_por_seg, eta_seg)` recebe etapa
+    "download" ou "extract" (eta None quando nao da para estimar);
+    `cancel` e um threading.Event.
+    """
+
+    def __init__(self, cache, api_url=GITHUB_API, match=ASSET_MATCH, context=None,
+                 timeout=30, retries=RETRIES, chunk_size=CHUNK_SIZE):
+        self.cache = cache
+        self.api_url = api_url
+        self.match = match
+        self.context = context or ssl_context()
+        self.timeout = timeout
+        self.retries = retries
+        self.chunk_size = chunk_size
+
+    def release(self, offline=False):
+        """Asset a instalar; offline (ou sem rede) usa o mais novo do cache."""
+        if not offline:
+            try:
+                return fetch_release(self.api_url, self.match, self.context, self.timeout, self.cache)
+            except _NETWORK_ERRORS:
+                if self.cache.newest(self.match) is None:
+                    raise
+        asset = self.cache.newest(self.match)
+        if asset is None:
+            raise InstallError("Nenhuma versao do AssettoServer no cache para instalar offline")
+        return asset
+
+    def fetch(self, asset, progress=None, cancel=None):
+        """Zip de `asset` no cache, baixando so se ainda nao estiver la."""
+        with self.cache.lock:
+            path = self.cache.lookup(asset)
+            if path is None:
+                path = self.cache.path(asset)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self.download(asset, path, progress, cancel)
+                self.cache.add(asset)
+        return path
+
+    def install(self, dest, progress=None, cancel=None, offline=False):
+        """Instala (ou atualiza no lugar) a release em `dest`.
+
+        Retorna (ReleaseAsset, ExtractResult).
+        """
+        asset = self.release(offline)
+        zip_path = self.fetch(asset, progress, cancel)
+        return asset, self.extract(zip_path, dest, progress, cancel)
+
+    def download(self, asset, path, progress=None, cancel=None):
+        """Baixa `asset` para `path`, retomando `path`.part se existir."""
+        part = path + ".part"
+        h = hashlib.sha256()
+        have = 0
+        if os.path.exists(part):
+            have = os.path.getsize(part)
+            if asset.size and have > asset.size:
+                os.remove(part)
+                have = 0
+            else:
+                _hash_file(part, h)
+
+        start = time.monotonic()
+        start_bytes = have
+        last_report = 0.0
+        attempts = 0
+        while not asset.size or have < asset.size:
+            if cancel is not None and cancel.is_set():
+                raise InstallCancelled()
+            headers = {"Range": f"bytes={have}-"} if have else {}
+            try:
+                with _open(asset.url, self.context, self.timeout, headers) as r:
+                    if have and r.status != 206:
+                        # Servidor ignorou o Range: recomeca do zero
+                        have = start_bytes = 0
+                        h = hashlib.sha256()
+                    mode = "ab" if have else "wb"
+                    with open(part, mode) as f:
+                        while True:
+                            if cancel is not None and cancel.is_set():
+                                raise InstallCancelled()
+                            buf = r.read(self.chunk_size)
+                            if not buf:
+                                break
+                            f.write(buf)
+                            h.update(buf)
+                            have += len(buf)
+                            now = time.monotonic()
+                            if progress and now - last_report > 0.2:
+                                last_report = now
+                                rate = (have - start_bytes) / max(now - start, 1e-6)
+                                eta = (asset.size - have) / rate if rate and asset.size else None
+                                progress("download", have, asset.size, rate, eta)
+                if not asset.size:
+                    break
+                if have < asset.size:
+                    raise ConnectionError("Conexao encerrada antes do fim do arquivo")
+            except urllib.error.HTTPError as e:
+                if e.code == 416 and asset.size and have >= asset.size:
+                    break
+                if e.code < 500:
+                    raise InstallError(f"Falha no download ({e.code}): {asset.url}") from e
+                attempts = self._retry(attempts, e)
+            except _NETWORK_ERRORS as e:
+                attempts = self._retry(attempts, e)
+
+        if progress:
+            elapsed = max(time.monotonic() - start, 1e-6)
+            progress("download", have, asset.size or have, (have - start_bytes) / elapsed, 0)
+        self.verify(asset, part, have, h.hexdigest())
+        os.replace(part, path)
+        return path
+
+    def _retry(self, attempts, error):
+        attempts += 1
+        if attempts > self.retries:
+            raise InstallError(f"Download interrompido: {error}") from error
+        time.sleep(min(2 ** attempts, 30))
+        return attempts
+
+    @staticmethod
+    def verify(asset, part, size, sha256):
+        """Confere tamanho e digest; arquivo corrompido e apagado para nao ser retomado."""
+        problem = None
+        if asset.size and size != asset.size:
+            problem = f"tamanho {size} != {asset.size}"
+        elif asset.sha256 and sha256 != asset.sha256:
+            problem = f"sha256 {sha256} != {asset.sha256}"
+        if problem:
+            try:
+                os.remove(part)
+            except OSError:
+                pass
+            raise InstallError(f"{asset.name} corrompido ({problem})")
+
+    @staticmethod
+    def extract(zip_path, dest, progress=None, cancel=None, preserve=PRESERVE):
+        """Extrai so o que difere do disco (CRC32 e tamanho do diretorio central).
+
+        Cada arquivo novo vai para um temporario e entra com os.replace. Um
+        manifesto guarda tamanho/mtime/CRC do que foi instalado, para nao reler
+        arquivos intactos e para apagar os que sairam da release.
+        """
+        start = time.monotonic()
+        result = ExtractResult()
+        os.makedirs(dest, exist_ok=True)
+        manifest_path = os.path.join(dest, INSTALL_MANIFEST)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                old_manifest = json.load(f).get("files", {})
+        except Exception:
+            old_manifest = {}
+        manifest = {}
+        for rel in old_manifest:
+            # Sobras de uma troca com o .exe em uso
+            old = os.path.join(dest, *rel.split("/")) + ".old"
+            if os.path.exists(old):
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+        last_report = 0.0
+        with zipfile.ZipFile(zip_path, "r") as z:
+            members = [m for m in z.infolist() if not m.is_dir()]
+            total = sum(m.file_size for m in members)
+            done = 0
+            for m in members:
+                if cancel is not None and cancel.is_set():
+                    raise InstallCancelled()
+                now = time.monotonic()
+                if progress and now - last_report > 0.2:
+                    last_report = now
+                    rate = done / max(now - start, 1e-6)
+                    progress("extract", done, total, rate, (total - done) / rate if rate else None)
+                rel = m.filename.replace("\\", "/").lstrip("/")
+                parts = rel.split("/")
+                if ".." in parts or ":" in parts[0]:
+                    continue
+                target = os.path.join(dest, *parts)
+                done += m.file_size
+
+                try:
+                    st = os.stat(target)
+                except OSError:
+                    st = None
+                if st is not None and _preserved(rel, preserve):
+                    result.preserved += 1
+                    continue
+                if st is not None and st.st_size == m.file_size:
+                    known = old_manifest.get(rel)
+                    if known and known[:2] == [st.st_size, st.st_mtime_ns]:
+                        crc = known[2]
+                    else:
+                        crc = _crc32(target)
+                    if crc == m.CRC:
+                        manifest[rel] = [st.st_size, st.st_mtime_ns, crc]
+                        result.unchanged += 1
+                        continue
+
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp = target + ".ac_tmp"
+                with z.open(m) as fi, open(tmp, "wb") as fo:
+                    shutil.copyfileobj(fi, fo, 1024 * 1024)
+                _swap_in(tmp, target)
+                st = os.stat(target)
+                manifest[rel] = [st.st_size, st.st_mtime_ns, m.CRC]
+                result.written += 1
+                result.bytes_written += m.file_size
+
+        for rel in old_manifest.keys() - manifest.keys():
+            if _preserved(rel, preserve):
+                continue
+            try:
+                os.remove(os.path.join(dest, *rel.split("/")))
+                result.removed += 1
+            except OSError:
+                pass
+
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": manifest}, f, separators=(",", ":"))
+        os.replace(tmp, manifest_path)
+        result.seconds = time.monotonic() - start
+        return result
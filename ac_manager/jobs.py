@@ -0,0 +1,259 @@
+"""
+Tarefas em segundo plano para a interface.
+Os passos de cada Job rodam num pool de threads (numa thread propria para tarefas
+que nao terminam, ou num pool de processos), e tudo que a interface precisa saber
+passa por uma fila que JobScheduler.poll esvazia na thread do Tk.
+"""
+
+import time
+import queue
+import itertools
+import threading
+import traceback
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "error"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Tarefa com passos encadeados.
+
+    Cada passo e chamado como passo(job, resultado_anterior) na thread de
+    trabalho; o primeiro recebe None e o retorno do ultimo vira `result`.
+    Os callbacks on_progress(*dados), on_message(msg), on_done(resultado),
+    on_error(excecao) e on_cancel() rodam na thread que chama poll().
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, scheduler, name, steps, callbacks, lane=None, dedicated=False):
+        self.id = next(self._ids)
+        self.name = name
+        self.steps = list(steps)
+        self.callbacks = callbacks
+        self.lane = lane
+        self.dedicated = dedicated
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.progress = None
+        self.started = None
+        self.cancel_event = threading.Event()
+        self._scheduler = scheduler
+        self._future = None
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.name} {self.state}>"
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    def check(self):
+        """Levanta JobCancelled se o job foi cancelado (para passos com laco proprio)."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def report(self, *progress):
+        """Progresso; so o mais recente de cada poll chega a interface."""
+        self.progress = progress
+        self._scheduler._post(self, "progress", progress)
+
+    def emit(self, message):
+        """Mensagem entregue em ordem, sem descarte (lotes, eventos...)."""
+        self._scheduler._post(self, "message", message)
+
+    def done(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def _run(self):
+        self.state = RUNNING
+        self.started = time.monotonic()
+        value = None
+        try:
+            for step in self.steps:
+                self.check()
+                value = step(self, value)
+            self.result = value
+            state = DONE
+        except Exception as e:
+            if self.cancelled or isinstance(e, JobCancelled):
+                state = CANCELLED
+            else:
+                self.error = e
+                state = FAILED
+        self._scheduler._finish(self, state)
+
+
+class JobScheduler:
+    """Pool de threads (e de processos, se `processes` > 0) para Jobs.
+
+    Jobs com o mesmo `lane` rodam um de cada vez, na ordem de chegada.
+    `timings` acumula {operacao: [quantidade, segundos, maior]} dos jobs que
+    terminam (operacao = nome ate o ":"); jobs dedicados nao entram.
+    """
+
+    def __init__(self, workers=4, processes=0):
+        self.processes = processes
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._procs = None
+        self._events = queue.Queue()
+        self._lock = threading.Lock()
+        self._active = []
+        self._lanes = {}
+        self.timings = {}
+
+    def submit(self, name, *steps, lane=None, dedicated=False, **callbacks):
+        """Agenda os passos; dedicated=True usa uma thread so para o job (ex: observadores)."""
+        job = Job(self, name, steps, callbacks, lane, dedicated)
+        with self._lock:
+            self._active.append(job)
+            if lane is not None:
+                waiting = self._lanes.setdefault(lane, collections.deque())
+                waiting.append(job)
+                if len(waiting) > 1:
+                    return job
+        self._start(job)
+        return job
+
+    def submit_process(self, name, fn, *args, **callbacks):
+        """Roda fn(*args) no pool de processos (fn e argumentos precisam ser picklaveis).
+
+        Sem progresso; cancelar so tem efeito antes de o processo comecar.
+        """
+        if self.processes <= 0:
+            raise RuntimeError("JobScheduler criado sem pool de processos")
+        job = Job(self, name, (), callbacks)
+        with self._lock:
+            if self._procs is None:
+                # Importado so aqui: carrega o multiprocessing inteiro
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._procs = ProcessPoolExecutor(max_workers=self.processes)
+            self._active.append(job)
+        job.state = RUNNING
+        job.started = time.monotonic()
+        job._future = self._procs.submit(fn, *args)
+
+        def finished(future):
+            if future.cancelled():
+                self._finish(job, CANCELLED)
+            elif future.exception() is not None:
+                job.error = future.exception()
+                self._finish(job, FAILED)
+            else:
+                job.result = future.result()
+                self._finish(job, DONE)
+
+        job._future.add_done_callback(finished)
+        return job
+
+    def _start(self, job):
+        if job.dedicated:
+            threading.Thread(target=job._run, name=f"job-{job.name}", daemon=True).start()
+        else:
+            future = self._pool.submit(job._run)
+            # Cancelado ainda na fila do pool: _run nunca roda, entao o fim e registrado aqui
+            future.add_done_callback(lambda f: self._finish(job, CANCELLED) if f.cancelled() else None)
+            job._future = future
+
+    def _post(self, job, op, data):
+        self._events.put((job, op, data))
+
+    def _finish(self, job, state):
+        job.state = state
+        nxt = None
+        with self._lock:
+            if job.started is not None and not job.dedicated:
+                seconds = time.monotonic() - job.started
+                timing = self.timings.setdefault(job.name.partition(":")[0], [0, 0.0, 0.0])
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+            waiting = self._lanes.get(job.lane) if job.lane is not None else None
+            if waiting:
+                waiting.popleft()
+                if waiting:
+                    nxt = waiting[0]
+                else:
+                    del self._lanes[job.lane]
+        self._post(job, state, None)
+        if nxt is not None:
+            self._start(nxt)
+
+    def timing_snapshot(self):
+        with self._lock:
+            return {op: tuple(timing) for op, timing in self.timings.items()}
+
+    def jobs(self, lane=None):
+        with self._lock:
+            return [j for j in self._active if lane is None or j.lane == lane]
+
+    def cancel(self, lane=None):
+        for job in self.jobs(lane):
+            job.cancel()
+
+    def busy(self, lane=None):
+        return bool(self.jobs(lane)) or (lane is None and not self._events.empty())
+
+    def poll(self, limit=500):
+        """Entrega os eventos pendentes. Chamar so da thread da interface."""
+        progress = {}
+        for _ in range(limit):
+            try:
+                job, op, data = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if op == "progress":
+                progress[job] = data
+                continue
+            if op == "message":
+                if not job.cancelled:
+                    self._call(job, "on_message", data)
+                continue
+            progress.pop(job, None)
+            with self._lock:
+                self._active.remove(job)
+            if op == DONE:
+                self._call(job, "on_done", job.result)
+            elif op == FAILED:
+                if not self._call(job, "on_error", job.error):
+                    traceback.print_exception(type(job.error), job.error, job.error.__traceback__)
+            else:
+                self._call(job, "on_cancel")
+        for job, data in progress.items():
+            if not job.cancelled:
+                self._call(job, "on_progress", *data)
+        return self.busy()
+
+    @staticmethod
+    def _call(job, name, *args):
+        callback = job.callbacks.get(name)
+        if callback is None:
+            return False
+        try:
+            callback(*args)
+        except Exception:
+            traceback.print_exc()
+        return True
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False)
+        if self._procs is not None:
+            self._procs.shutdown(wait=False)
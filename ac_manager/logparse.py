@@ -0,0 +1,318 @@
+"""
+Leitura incremental dos logs do AssettoServer (logs/log-AAAAMMDD.txt).
+Cada arquivo e lido a partir do byte onde a ultima leitura parou, entao cada
+linha passa pelo parser uma vez so; arquivos novos, renomeados ou truncados
+(rotacao) sao detectados pelo inode e pelo tamanho. As linhas viram eventos
+tipados (entrada, saida, kick, volta, erro) que alimentam as estatisticas por
+instancia, salvas junto com os offsets em ac_manager_logs.json.
+"""
+
+import os
+import re
+import json
+import fnmatch
+import threading
+import collections
+from dataclasses import dataclass
+
+from .model import slotted
+from .serverconfig import write_if_changed
+
+
+LOG_STATE_FILE = "ac_manager_logs.json"
+LOG_STATE_VERSION = 1
+LOG_PATTERN = "log*.txt"
+READ_LIMIT = 8 * 1024 * 1024
+RECENT_EVENTS = 200
+
+CONNECT = "connect"
+DISCONNECT = "disconnect"
+KICK = "kick"
+LAP = "lap"
+ERROR = "error"
+
+# 2024-01-14 18:22:05.123 +01:00 [INF] mensagem    (modelo padrao dos arquivos do Serilog)
+# [2024-01-14 18:22:05.123 +01:00 INF] mensagem    (nivel dentro dos mesmos colchetes)
+_LINE = re.compile(r"^\[?(?P<time>\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d)[^\[\]]*?[ \[](?P<level>[A-Z]{3})\] (?P<msg>.*)$")
+_GUID = r"(?P<guid>\d{15,20})"
+# Mario (76561198000000000, 3 (bmw_m3_e30-red)) has connected
+_CONNECT = re.compile(r"^(?P<name>.+?) \(" + _GUID + r"[^)]*\)+ has connected")
+_DISCONNECT = re.compile(r"^(?P<name>.+?)(?: \(" + _GUID + r"[^)]*\)+)? has disconnected")
+_KICK = re.compile(r"^(?P<name>.+?) (?:was|has been) (?P<what>kicked|banned)(?:[.:,]? *(?:Reason:)? *(?P<reason>.*))?$")
+# Lap completed by Mario, 0 cuts, laptime 102345 (ou 1:42.345)
+_LAP = re.compile(r"^Lap completed by (?P<name>.+?), (?P<cuts>\d+) cuts?, laptime (?P<time>[\d:.]+)")
+_ERROR_LEVELS = ("ERR", "FTL")
+
+# Filtro barato antes de cada regex: a maioria das linhas nao e evento
+_MATCHERS = (
+    (" has connected", CONNECT, _CONNECT),
+    (" has disconnected", DISCONNECT, _DISCONNECT),
+    ("Lap completed by ", LAP, _LAP),
+    (" kicked", KICK, _KICK),
+    (" banned", KICK, _KICK),
+)
+_CANDIDATE = re.compile("|".join([re.escape(needle) for needle, _, _ in _MATCHERS] +
+                                 [rf"[ \[]{level}\]" for level in _ERROR_LEVELS])).search
+
+
+@slotted
+@dataclass
+class LogEvent:
+    kind: str
+    time: str
+    name: str = ""
+    guid: str = ""
+    detail: str = ""
+    lap_ms: int = 0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def parse_laptime(text):
+    """Milissegundos de "102345", "1:42.345" ou "42.345"."""
+    if ":" not in text and "." not in text:
+        return int(text)
+    minutes, _, seconds = text.rpartition(":")
+    return round((int(minutes or 0) * 60 + float(seconds)) * 1000)
+
+
+def format_laptime(ms):
+    return f"{ms // 60000}:{ms % 60000 / 1000:06.3f}"
+
+
+def parse_line(line):
+    """LogEvent da linha, ou None se ela nao e um evento."""
+    if _CANDIDATE(line) is None:
+        return None
+    m = _LINE.match(line)
+    if m is None:
+        return None
+    msg = m.group("msg")
+    if m.group("level") in _ERROR_LEVELS:
+        return LogEvent(ERROR, m.group("time"), detail=msg.strip())
+    for needle, kind, pattern in _MATCHERS:
+        if needle not in msg:
+            continue
+        e = pattern.match(msg)
+        if e is None:
+            continue
+        groups = e.groupdict()
+        event = LogEvent(kind, m.group("time"), name=groups["name"], guid=groups.get("guid") or "")
+        if kind == LAP:
+            event.lap_ms = parse_laptime(groups["time"])
+            event.detail = f"{groups['cuts']} cortes"
+        elif kind == KICK:
+            event.detail = groups["what"] + (f": {groups['reason']}" if groups.get("reason") else "")
+        return event
+    return None
+
+
+class LogTailer:
+    """Eventos novos dos logs de `log_dir` a cada poll(), a partir dos offsets salvos.
+
+    `offsets` e {arquivo: [inode, offset]}. So linhas completas sao consumidas;
+    uma linha pela metade espera o proximo poll.
+    """
+
+    def __init__(self, log_dir, offsets=None, pattern=LOG_PATTERN):
+        self.log_dir = log_dir
+        self.pattern = pattern
+        self.offsets = {name: list(v) for name, v in (offsets or {}).items()}
+
+    def _files(self):
+        found = []
+        try:
+            with os.scandir(self.log_dir) as it:
+                for e in it:
+                    if fnmatch.fnmatch(e.name, self.pattern) and e.is_file():
+                        # os.stat e nao e.stat(): no Windows o stat do scandir vem com st_ino 0
+                        found.append((e.name, os.stat(e.path)))
+        except OSError:
+            return []
+        return sorted(found)
+
+    def poll(self, limit=READ_LIMIT):
+        """Eventos das linhas novas (no maximo `limit` bytes por arquivo por chamada)."""
+        files = self._files()
+        by_inode = {ino: offset for ino, offset in self.offsets.values() if ino}
+        offsets = {}
+        events = []
+        for name, st in files:
+            ino, offset = self.offsets.get(name, (None, 0))
+            if ino != st.st_ino:
+                # Arquivo novo ou renomeado (rotacao): segue de onde o inode parou
+                offset = by_inode.get(st.st_ino, 0) if st.st_ino else 0
+            if st.st_size < offset:
+                offset = 0  # Truncado
+            if st.st_size > offset:
+                offset = self._read(os.path.join(self.log_dir, name), offset, min(st.st_size, offset + limit),
+                                    events, st.st_size)
+            offsets[name] = [st.st_ino, offset]
+        self.offsets = offsets
+        return events
+
+    @staticmethod
+    def _read(path, start, end, events, size):
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                data = f.read(end - start)
+                cut = data.rfind(b"\n") + 1
+                if not cut and end < size:
+                    # Linha maior que a janela inteira: nao e evento, pula ate o fim dela
+                    pos = end
+                    for buf in iter(lambda: f.read(1024 * 1024), b""):
+                        i = buf.find(b"\n")
+                        if i >= 0:
+                            return pos + i + 1
+                        pos += len(buf)
+                    return start
+        except OSError:
+            return start
+        if not cut:
+            return start
+        for raw in data[:cut].decode("utf-8", "replace").splitlines():
+            event = parse_line(raw)
+            if event is not None:
+                events.append(event)
+        return start + cut
+
+
+class SessionStats:
+    """Estado de uma instancia montado a partir dos eventos."""
+
+    def __init__(self):
+        self.online = {}
+        self.guids = {}
+        self.best_laps = {}
+        self.laps = 0
+        self.errors = 0
+        self.last_error = ""
+        self.recent = collections.deque(maxlen=RECENT_EVENTS)
+
+    def apply(self, events):
+        for e in events:
+            if e.guid:
+                self.guids[e.name] = e.guid
+            guid = e.guid or self.guids.get(e.name, "")
+            if e.kind == CONNECT:
+                self.online[guid or e.name] = e.name
+            elif e.kind in (DISCONNECT, KICK):
+                self.online.pop(guid or e.name, None)
+            elif e.kind == LAP:
+                self.laps += 1
+                key = guid or e.name
+                best = self.best_laps.get(key)
+                if e.lap_ms > 0 and (best is None or e.lap_ms < best[1]):
+                    self.best_laps[key] = [e.name, e.lap_ms, e.time]
+            elif e.kind == ERROR:
+                self.errors += 1
+                self.last_error = e.detail
+            self.recent.append(e)
+
+    def reset_online(self):
+        """Servidor reiniciado: ninguem continua conectado."""
+        self.online.clear()
+
+    def leaderboard(self, n=10):
+        """[(nome, ms, quando)] das melhores voltas."""
+        return sorted((tuple(v) for v in self.best_laps.values()), key=lambda v: v[1])[:n]
+
+    def summary(self):
+        text = f"Online: {len(self.online)}  |  Voltas: {self.laps}"
+        board = self.leaderboard(1)
+        if board:
+            text += f"  |  Melhor: {board[0][0]} {format_laptime(board[0][1])}"
+        if self.errors:
+            text += f"  |  Erros: {self.errors}"
+        return text
+
+    def to_dict(self):
+        return {
+            "online": self.online, "guids": self.guids, "best_laps": self.best_laps,
+            "laps": self.laps, "errors": self.errors, "last_error": self.last_error,
+            "recent": [e.to_dict() for e in self.recent],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.online = dict(data.get("online") or {})
+        stats.guids = dict(data.get("guids") or {})
+        stats.best_laps = {k: list(v) for k, v in (data.get("best_laps") or {}).items()}
+        stats.laps = int(data.get("laps") or 0)
+        stats.errors = int(data.get("errors") or 0)
+        stats.last_error = str(data.get("last_error") or "")
+        stats.recent.extend(LogEvent(**e) for e in data.get("recent") or [])
+        return stats
+
+
+class LogAnalytics:
+    """Tailers e estatisticas por instancia, persistidos em `path` (JSON)."""
+
+    def __init__(self, path=LOG_STATE_FILE):
+        self.path = path
+        self.tailers = {}
+        self.stats = {}
+        self.lock = threading.RLock()
+        self._saved = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != LOG_STATE_VERSION:
+            return
+        self._saved = data.get("instances") or {}
+
+    def save(self):
+        with self.lock:
+            instances = dict(self._saved)
+            for name, tailer in self.tailers.items():
+                instances[name] = {"log_dir": tailer.log_dir, "offsets": tailer.offsets,
+                                   "stats": self.stats[name].to_dict()}
+            data = {"version": LOG_STATE_VERSION, "instances": instances}
+        return write_if_changed(self.path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+    def watch(self, name, server_path):
+        """Passa a acompanhar logs/ de `server_path`; offsets e estatisticas salvos sao retomados."""
+        log_dir = os.path.join(os.path.abspath(server_path), "logs")
+        with self.lock:
+            tailer = self.tailers.get(name)
+            if tailer is not None and tailer.log_dir == log_dir:
+                return self.stats[name]
+            saved = self._saved.get(name) or {}
+            if saved.get("log_dir") != log_dir:
+                saved = {}
+            self.tailers[name] = LogTailer(log_dir, saved.get("offsets"))
+            self.stats[name] = SessionStats.from_dict(saved.get("stats") or {})
+            return self.stats[name]
+
+    def forget(self, name):
+        with self.lock:
+            self.tailers.pop(name, None)
+            self.stats.pop(name, None)
+            self._saved.pop(name, None)
+
+    def positions(self):
+        """{nome: {arquivo: offset}} de onde cada instancia parou de ler."""
+        with self.lock:
+            return {name: {f: offset for f, (_, offset) in tailer.offsets.items()}
+                    for name, tailer in self.tailers.items()}
+
+    def poll(self, names=None):
+        """Le o que ha de novo; {nome: [eventos]} das instancias com eventos."""
+        with self.lock:
+            tailers = [(n, t) for n, t in self.tailers.items() if names is None or n in names]
+        found = {}
+        for name, tailer in tailers:
+            events = tailer.poll()
+            if events:
+                with self.lock:
+                    self.stats[name].apply(events)
+                found[name] = events
+        return found
@@ -0,0 +1,339 @@
+"""
+Busca nos logs antigos do servidor sem ler arquivo por arquivo.
+Cada log e aberto com mmap e ganha um indice ao lado (logs/.index/<log>.json):
+onde comeca cada dia e a lista de offsets das linhas com cada GUID, com cada
+piloto (entradas, saidas, kicks e voltas) e com cada palavra das linhas de erro.
+Termos indexados viram uma intersecao de listas; texto livre e procurado pelo
+regex direto no mmap, so nos trechos dos dias pedidos. O indice acompanha o
+log: se o arquivo so cresceu, apenas o final e indexado.
+
+Consulta: palavras separadas por espaco, todas obrigatorias.
+  76561198000000000   linhas com o GUID (indice)
+  piloto:mario        eventos do piloto (indice)
+  erro:timeout        linhas de erro com a palavra; "erro:" sozinho = todos os erros
+  qualquer texto      busca direta no arquivo
+"""
+
+import os
+import re
+import json
+import mmap
+import time
+import fnmatch
+import hashlib
+from collections import namedtuple
+
+from .logparse import ERROR, LOG_PATTERN, parse_line
+from .serverconfig import write_text
+
+
+INDEX_DIR = ".index"
+INDEX_VERSION = 2
+SEARCH_LIMIT = 500
+HEAD_BYTES = 4096
+
+# Data no inicio da linha, com ou sem "[" (os dois modelos de logparse._LINE)
+_DAY = re.compile(rb"^\[?(\d{4}-\d\d-\d\d)[ T]", re.MULTILINE)
+# SteamID64 (o GUID do AC): com o prefixo fixo o regex pula direto para os candidatos
+_GUID = re.compile(rb"(?<!\d)7656119\d{10}(?!\d)")
+# So o que o indice guarda vai para o indice; outros numeros sao procurados no arquivo
+_GUID_TEXT = re.compile(r"7656119\d{10}")
+# Trechos fixos das linhas de evento; so as linhas achadas passam pelo parser de logparse
+_MARKERS = [re.compile(re.escape(needle)) for needle in (
+    b" has connected", b" has disconnected", b"Lap completed by ", b" kicked", b" banned",
+)] + [re.compile(rb"[ \[]" + level + rb"\] ") for level in (b"ERR", b"FTL")]
+_WORD = re.compile(r"[\w.:-]{3,}")
+
+# Prefixo na consulta -> prefixo no indice
+PREFIXES = {"piloto": "name", "name": "name", "erro": "error", "error": "error"}
+ANY = "*"
+
+SearchHit = namedtuple("SearchHit", "path offset day line")
+
+
+def tokens(text):
+    """Palavras como ficam no indice (minusculas, sem pontuacao nas pontas)."""
+    return [w.strip(".:-").lower() for w in _WORD.findall(text) if len(w.strip(".:-")) >= 3]
+
+
+def parse_query(query):
+    """(termos do indice, textos para procurar no arquivo) da consulta."""
+    indexed, scan = [], []
+    for raw in query.lower().split():
+        prefix, sep, rest = raw.partition(":")
+        if sep and prefix in PREFIXES:
+            words = tokens(rest) or [ANY]
+            indexed.extend(f"{PREFIXES[prefix]}:{word}" for word in words)
+        elif _GUID_TEXT.fullmatch(raw):
+            indexed.append(raw)
+        else:
+            scan.append(raw)
+    return indexed, scan
+
+
+def _line_start(mm, pos):
+    return mm.rfind(b"\n", 0, pos) + 1
+
+
+def _line_at(mm, start):
+    end = mm.find(b"\n", start)
+    return mm[start:end if end >= 0 else len(mm)].rstrip(b"\r").decode("utf-8", "replace")
+
+
+def _day_at(mm, pos, end):
+    """Data da primeira linha com data a partir de `pos` (None se nao houver ate `end`)."""
+    m = _DAY.search(mm, pos, min(end, pos + 4096))
+    return m.group(1).decode() if m else None
+
+
+def _day_ranges(mm, start, end):
+    """[[dia, inicio, fim]] de mm[start:end]; as viradas de dia sao achadas por bissecao."""
+    day = _day_at(mm, start, end)
+    if day is None:
+        return []
+    last = _day_at(mm, _line_start(mm, end - 1), end) or day
+    bounds = [(day, start)]
+    pos = start
+    while day != last:
+        # Datas crescem no arquivo: lo fica no dia atual, hi no primeiro dia diferente
+        lo, hi = pos, end
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if _day_at(mm, _line_start(mm, mid), end) == day:
+                lo = mid
+            else:
+                hi = mid
+        pos = _line_start(mm, hi)
+        day = _day_at(mm, pos, end)
+        bounds.append((day, pos))
+    return [[d, p, bounds[i + 1][1] if i + 1 < len(bounds) else end] for i, (d, p) in enumerate(bounds)]
+
+
+def build_index(mm, start=0, end=None):
+    """Indice de mm[start:end] (end = fim da ultima linha completa)."""
+    end = len(mm) if end is None else end
+    postings = {}
+
+    def add(token, offset):
+        offsets = postings.setdefault(token, [])
+        if not offsets or offsets[-1] != offset:
+            offsets.append(offset)
+
+    for m in _GUID.finditer(mm, start, end):
+        add(m.group().decode(), _line_start(mm, m.start()))
+    seen = set()
+    for marker in _MARKERS:
+        for m in marker.finditer(mm, start, end):
+            offset = _line_start(mm, m.start())
+            if offset in seen:
+                continue
+            seen.add(offset)
+            event = parse_line(_line_at(mm, offset))
+            if event is None:
+                continue
+            prefix, text = ("error:", event.detail) if event.kind == ERROR else ("name:", event.name)
+            add(prefix + ANY, offset)
+            for word in dict.fromkeys(tokens(text)):
+                add(prefix + word, offset)
+    for offsets in postings.values():
+        offsets.sort()
+    return {"days": _day_ranges(mm, start, end), "tokens": postings}
+
+
+def _delta(offsets):
+    prev = 0
+    out = []
+    for n in offsets:
+        out.append(n - prev)
+        prev = n
+    return out
+
+
+def _undelta(deltas):
+    total = 0
+    out = []
+    for d in deltas:
+        total += d
+        out.append(total)
+    return out
+
+
+def index_path(log_path):
+    folder, name = os.path.split(log_path)
+    return os.path.join(folder, INDEX_DIR, name + ".json")
+
+
+class LogIndex:
+    """Indice de um arquivo de log (carregado do disco ou refeito)."""
+
+    def __init__(self, path, size=0, head="", days=None, postings=None):
+        self.path = path
+        self.size = size
+        self.head = head
+        self.days = days or []
+        self.postings = postings or {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(index_path(path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        postings = {tok: _undelta(deltas) for tok, deltas in data.get("tokens", {}).items()}
+        return cls(path, data.get("size", 0), data.get("head", ""), data.get("days"), postings)
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION, "size": self.size, "head": self.head, "days": self.days,
+            "tokens": {tok: _delta(offsets) for tok, offsets in self.postings.items()},
+        }
+        os.makedirs(os.path.dirname(index_path(self.path)), exist_ok=True)
+        write_text(index_path(self.path), json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+    def update(self, mm):
+        """Indexa o que o arquivo ganhou; refaz tudo se o comeco mudou. True se mudou algo."""
+        end = mm.rfind(b"\n") + 1
+        head = hashlib.sha1(mm[:min(HEAD_BYTES, end)]).hexdigest()
+        if head != self.head or end < self.size:
+            self.size, self.days, self.postings = 0, [], {}
+        if end == self.size:
+            return False
+        part = build_index(mm, self.size, end)
+        for tok, offsets in part["tokens"].items():
+            self.postings.setdefault(tok, []).extend(offsets)
+        days = part["days"]
+        if days and self.days and self.days[-1][0] == days[0][0]:
+            self.days[-1][2] = days.pop(0)[2]
+        self.days.extend(days)
+        self.size = end
+        self.head = head
+        return True
+
+    def ranges(self, since=None, until=None):
+        """[(inicio, fim)] dos dias entre `since` e `until` (AAAA-MM-DD, inclusive)."""
+        if not self.days:
+            return [(0, self.size)] if since is None and until is None else []
+        return [(start, end) for day, start, end in self.days
+                if (since is None or day >= since) and (until is None or day <= until)]
+
+    def day_of(self, offset):
+        for day, start, end in self.days:
+            if start <= offset < end:
+                return day
+        return ""
+
+
+def _open(path):
+    f = open(path, "rb")
+    try:
+        if os.fstat(f.fileno()).st_size == 0:
+            return f, None
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        f.close()
+        raise
+
+
+def log_files(log_dir, pattern=LOG_PATTERN):
+    try:
+        with os.scandir(log_dir) as it:
+            return sorted(e.path for e in it if e.is_file() and fnmatch.fnmatch(e.name, pattern))
+    except OSError:
+        return []
+
+
+def search_file(path, query, since=None, until=None, limit=SEARCH_LIMIT, stats=None):
+    """Linhas de `path` com todos os termos de `query` (sem diferenciar maiusculas)."""
+    indexed, scan = parse_query(query)
+    if not indexed and not scan:
+        return []
+    f, mm = _open(path)
+    candidates = None
+    try:
+        if mm is None:
+            return []
+        index = LogIndex.load(path) or LogIndex(path)
+        if index.update(mm):
+            index.save()
+            if stats is not None:
+                stats["indexed"] = stats.get("indexed", 0) + 1
+        ranges = index.ranges(since, until)
+        if not ranges:
+            return []
+        if indexed:
+            # O indice cobre tudo desses termos: fora dele nao ha resultado
+            lists = sorted((index.postings.get(t, []) for t in indexed), key=len)
+            offsets = lists[0]
+            for other in lists[1:]:
+                offsets = sorted(set(offsets).intersection(other))
+            candidates = (o for o in offsets if any(s <= o < e for s, e in ranges))
+        else:
+            candidates = _scan(mm, max(scan, key=len), ranges)
+        hits = []
+        for offset in candidates:
+            line = _line_at(mm, offset)
+            low = line.lower()
+            if all(t in low for t in scan):
+                hits.append(SearchHit(path, offset, index.day_of(offset), line))
+                if len(hits) >= limit:
+                    break
+        return hits
+    finally:
+        if candidates is not None:
+            candidates.close()  # O finditer pendente segura o mmap
+        if mm is not None:
+            mm.close()
+        f.close()
+
+
+def _term_pattern(term):
+    """Regex de bytes de `term` sem diferenciar maiusculas.
+
+    IGNORECASE em bytes so vale para ASCII: cada letra de fora (a, c com acento...)
+    vira uma alternativa entre as formas minuscula e maiuscula em UTF-8.
+    """
+    parts = []
+    for ch in term:
+        if ord(ch) < 128:
+            parts.append(re.escape(ch.encode()))
+        else:
+            forms = sorted({ch, ch.lower(), ch.upper()})
+            parts.append(b"(?:" + b"|".join(re.escape(f.encode("utf-8")) for f in forms) + b")")
+    return re.compile(b"".join(parts), re.IGNORECASE)
+
+
+def _scan(mm, term, ranges):
+    """Offsets das linhas com `term`, procurando direto no mmap (regex em C)."""
+    pattern = _term_pattern(term)
+    last = -1
+    for start, end in ranges:
+        for m in pattern.finditer(mm, start, end):
+            offset = _line_start(mm, m.start())
+            if offset != last:
+                last = offset
+                yield offset
+
+
+def search_logs(log_dirs, query, since=None, until=None, limit=SEARCH_LIMIT):
+    """Busca em todos os logs de `log_dirs` ({nome: pasta}).
+
+    Devolve ([(nome, SearchHit)], estatisticas {"files", "indexed", "ms"}).
+    """
+    start = time.perf_counter()
+    stats = {"files": 0, "indexed": 0}
+    results = []
+    for name, log_dir in log_dirs.items():
+        for path in log_files(log_dir):
+            if len(results) >= limit:
+                break
+            stats["files"] += 1
+            try:
+                hits = search_file(path, query, since, until, limit - len(results), stats)
+            except OSError:
+                continue
+            results.extend((name, hit) for hit in hits)
+    stats["ms"] = (time.perf_counter() - start) * 1000
+    return results, stats
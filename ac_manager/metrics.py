@@ -0,0 +1,172 @@
+"""
+Metricas do app e dos servidores no formato texto do Prometheus (GET /metrics).
+Um listener asyncio roda num job dedicado; o texto e montado no maximo uma vez
+por intervalo de amostragem e guardado pronto, entao cada scrape so devolve bytes.
+Por padrao so atende esta maquina (127.0.0.1); para um Prometheus em outra
+maquina o endereco tem que ser escolhido (ex: 0.0.0.0).
+"""
+
+import time
+import asyncio
+import threading
+
+from .supervisor import CRASHLOOP
+
+
+METRICS_PORT = 9310
+METRICS_HOST = "127.0.0.1"
+MAX_AGE = 2.0
+REQUEST_TIMEOUT = 5.0
+MAX_HEADERS = 100
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class MetricsExporter:
+    """Texto do /metrics a partir do Supervisor e, se houver, do ResourceSampler,
+    do LogAnalytics e do JobScheduler (tempos das operacoes do app).
+
+    render() reaproveita o ultimo texto enquanto ele tiver menos de `max_age`
+    segundos (por padrao o intervalo do sampler: antes disso nao ha numero novo).
+    """
+
+    def __init__(self, supervisor, sampler=None, analytics=None, jobs=None, max_age=None):
+        self.supervisor = supervisor
+        self.sampler = sampler
+        self.analytics = analytics
+        self.jobs = jobs
+        self._max_age = max_age
+        self._cache = b""
+        self._built = None
+        self._lock = threading.Lock()
+
+    @property
+    def max_age(self):
+        if self._max_age is not None:
+            return self._max_age
+        return self.sampler.interval if self.sampler is not None else MAX_AGE
+
+    def render(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._built is None or now - self._built >= self.max_age:
+                self._cache = self.build().encode("utf-8")
+                self._built = now
+            return self._cache
+
+    def build(self):
+        out = []
+
+        def family(name, kind, text, samples):
+            out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                out.append(f"{name}{{{label}}} {_number(value)}" if label else f"{name} {_number(value)}")
+
+        procs = dict(self.supervisor.procs)
+        players = {}
+        if self.analytics is not None:
+            with self.analytics.lock:
+                players = {name: len(stats.online) for name, stats in self.analytics.stats.items()}
+        names = sorted(set(procs) | set(players))
+
+        family("ac_manager_instance_up", "gauge", "1 se o processo do servidor esta rodando",
+               [({"instance": n}, procs[n].running if n in procs else False) for n in names])
+        family("ac_manager_instance_ready", "gauge", "1 se o servidor respondeu depois do ultimo inicio",
+               [({"instance": n}, p.running and p.ready is not None) for n, p in sorted(procs.items())])
+        family("ac_manager_instance_crashloop", "gauge", "1 se o reinicio automatico foi suspenso",
+               [({"instance": n}, p.state == CRASHLOOP) for n, p in sorted(procs.items())])
+        family("ac_manager_instance_restarts_total", "counter", "Reinicios automaticos depois de quedas",
+               [({"instance": n}, p.restarts) for n, p in sorted(procs.items())])
+        family("ac_manager_instance_time_to_ready_seconds", "gauge", "Tempo ate ficar pronto no ultimo inicio",
+               [({"instance": n}, p.startups[-1]) for n, p in sorted(procs.items()) if p.startups])
+        family("ac_manager_instance_players", "gauge", "Pilotos conectados segundo os logs",
+               [({"instance": n}, count) for n, count in sorted(players.items())])
+
+        if self.sampler is not None:
+            snapshot = sorted((n, v) for n, v in self.sampler.snapshot().items()
+                              if n in procs and procs[n].running)
+            for metric, name, kind, text in (
+                ("cpu", "ac_manager_instance_cpu_percent", "gauge", "CPU na ultima amostra (% de um nucleo)"),
+                ("rss", "ac_manager_instance_resident_memory_bytes", "gauge", "Memoria residente (RSS)"),
+                ("threads", "ac_manager_instance_threads", "gauge", "Threads do processo"),
+                ("sockets", "ac_manager_instance_sockets", "gauge", "Sockets abertos"),
+                ("fds", "ac_manager_instance_open_fds", "gauge", "Descritores de arquivo abertos"),
+            ):
+                family(name, kind, text, [({"instance": n}, last[metric]) for n, (_, last, _) in snapshot])
+
+        if self.jobs is not None:
+            timings = sorted(self.jobs.timing_snapshot().items())
+            out.append("# HELP ac_manager_operation_seconds Duracao das operacoes do app (jobs)")
+            out.append("# TYPE ac_manager_operation_seconds summary")
+            for op, (count, total, _) in timings:
+                out.append(f'ac_manager_operation_seconds_sum{{operation="{_escape(op)}"}} {_number(total)}')
+                out.append(f'ac_manager_operation_seconds_count{{operation="{_escape(op)}"}} {count}')
+            family("ac_manager_operation_seconds_max", "gauge", "Operacao mais demorada de cada tipo",
+                   [({"operation": op}, longest) for op, (_, _, longest) in timings])
+        return "\n".join(out) + "\n"
+
+
+class MetricsServer:
+    """HTTP minimo (GET/HEAD /metrics) sobre asyncio.
+
+    `run(job, _)` e o passo de um job dedicado: abre a porta (OSError faz o job
+    falhar) e atende ate o job ser cancelado.
+    """
+
+    def __init__(self, exporter, port=METRICS_PORT, host=METRICS_HOST):
+        self.exporter = exporter
+        self.port = port
+        self.host = host
+
+    def run(self, job, _):
+        asyncio.run(self._serve(job.cancel_event))
+
+    async def _serve(self, cancel):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            while not cancel.is_set():
+                await asyncio.sleep(0.25)
+
+    async def _handle(self, reader, writer):
+        try:
+            bad = False
+            try:
+                request = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                for _ in range(MAX_HEADERS):
+                    line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+            except ValueError:
+                # Linha maior que o limite do StreamReader (LimitOverrunError)
+                request, bad = b"", True
+            method, _, rest = request.decode("latin-1").partition(" ")
+            path = rest.split(" ", 1)[0].split("?", 1)[0]
+            if bad:
+                status, ctype, body = "400 Bad Request", "text/plain", b"requisicao invalida\n"
+            elif method not in ("GET", "HEAD"):
+                status, ctype, body = "405 Method Not Allowed", "text/plain", b"metodo nao suportado\n"
+            elif path == "/metrics":
+                status, ctype, body = "200 OK", CONTENT_TYPE, self.exporter.render()
+            else:
+                status, ctype, body = "404 Not Found", "text/plain", b"use /metrics\n"
+            head = (f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1")
+            writer.write(head if method == "HEAD" else head + body)
+            await writer.drain()
+        except (OSError, asyncio.TimeoutError, UnicodeError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,251 @@
+"""
+Modelo tipado da configuracao do servidor.
+Uma dataclass com __slots__ por secao; os nomes dos campos sao os mesmos do
+ac_manager_config.json e das variaveis da interface.
+"""
+
+import dataclasses
+from dataclasses import dataclass, field
+
+
+WEATHER_LIST = [
+    "1_heavy_fog", "2_light_fog", "3_clear", "4_mid_clear",
+    "5_light_clouds", "6_mid_clouds", "7_heavy_clouds",
+    "8_rain", "9_thunderstorm",
+]
+
+ABS_TC_OPTS = ["0 - Desligado", "1 - Fabrica", "2 - Forcado Ligado"]
+
+START_RULES = [
+    "0 - Carro Bloqueado na Largada",
+    "1 - Teleporta ao Pit",
+    "2 - Drive-Through Penalidade",
+]
+
+_TRUE = ("1", "true", "yes", "sim", "on")
+
+
+def slotted(cls):
+    """Refaz uma dataclass com __slots__ (dataclass(slots=True) so existe no 3.10+)."""
+    names = tuple(f.name for f in dataclasses.fields(cls))
+    ns = {k: v for k, v in cls.__dict__.items() if k not in names and k not in ("__dict__", "__weakref__")}
+    ns["__slots__"] = names
+    new = type(cls)(cls.__name__, cls.__bases__, ns)
+    new.__qualname__ = cls.__qualname__
+    return new
+
+
+def coerce(value, kind):
+    """Converte `value` para o tipo do campo; ValueError/TypeError se nao der."""
+    if kind is bool:
+        return value.strip().lower() in _TRUE if isinstance(value, str) else bool(value)
+    if kind is int and isinstance(value, str):
+        return int(float(value))
+    return kind(value)
+
+
+class Section:
+    """Operacoes comuns das secoes: leitura/escrita por dicionario, copia e diff."""
+
+    __slots__ = ()
+
+    @classmethod
+    def field_types(cls):
+        return {f.name: f.type for f in dataclasses.fields(cls)}
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def update(self, data):
+        """Aplica os campos conhecidos de `data`; valores invalidos sao ignorados."""
+        for name, kind in self.field_types().items():
+            value = data.get(name)
+            if value is None:
+                continue
+            try:
+                setattr(self, name, coerce(value, kind))
+            except (TypeError, ValueError):
+                pass
+        return self
+
+    def copy(self):
+        return dataclasses.replace(self)
+
+    def diff(self, other):
+        """{campo: (valor aqui, valor em other)} dos campos diferentes."""
+        return {
+            name: (getattr(self, name), getattr(other, name))
+            for name in self.__slots__
+            if getattr(self, name) != getattr(other, name)
+        }
+
+
+@slotted
+@dataclass
+class ServerSection(Section):
+    server_name: str = "Meu Servidor AC"
+    server_password: str = ""
+    admin_password: str = "admin1234"
+    welcome_msg: str = ""
+    udp_port: int = 9600
+    tcp_port: int = 9600
+    http_port: int = 8081
+    max_clients: int = 24
+    register_lobby: bool = True
+    pickup_mode: bool = True
+    loop_mode: bool = True
+    locked_entry: bool = False
+    sleep_time: int = 1
+    client_send_hz: int = 18
+    num_threads: int = 2
+    kick_quorum: int = 85
+    voting_quorum: int = 80
+    vote_duration: int = 20
+    # AssettoServer extra_cfg.yml
+    use_steam_auth: bool = True
+    checksum_check: bool = True
+
+
+@slotted
+@dataclass
+class SessionSection(Section):
+    track_var: str = ""
+    layout_var: str = ""
+    booking_enabled: bool = False
+    booking_time: int = 5
+    practice_enabled: bool = True
+    practice_time: int = 10
+    qualify_enabled: bool = True
+    qualify_time: int = 10
+    race_laps: int = 5
+    race_wait_time: int = 60
+    race_over_time: int = 180
+    result_screen_time: int = 60
+    reversed_grid: int = 0
+    qualify_max_wait: int = 120
+
+
+@slotted
+@dataclass
+class RealismSection(Section):
+    abs_mode: str = ABS_TC_OPTS[1]
+    tc_mode: str = ABS_TC_OPTS[1]
+    stability_allowed: bool = False
+    autoclutch_allowed: bool = True
+    tyre_blankets: bool = True
+    force_virtual_mirror: bool = False
+    damage_rate: int = 50
+    fuel_rate: int = 100
+    tyre_wear: int = 100
+    pit_speed_limit: int = 80
+    allowed_tyres_out: int = 2
+    start_rule: str = START_RULES[0]
+    race_gas_penalty: bool = False
+    max_contacts_km: int = -1
+    legal_tyres: str = "V;E;H;M;S;SS;US;ST;I;W"
+    max_ballast: int = 0
+    pit_window_start: int = 0
+    pit_window_end: int = 0
+
+
+@slotted
+@dataclass
+class WeatherSection(Section):
+    weather_type: str = "3_clear"
+    temp_ambient: int = 26
+    temp_var_ambient: int = 2
+    temp_road: int = 34
+    temp_var_road: int = 2
+    sun_angle: float = 0.0
+    time_mult: int = 1
+    wind_min: int = 0
+    wind_max: int = 5
+    wind_dir: int = 30
+    wind_var: int = 15
+
+
+@slotted
+@dataclass
+class CspSection(Section):
+    csp_disable_pit_limiter: bool = False
+    csp_pit_speed: int = 80
+    csp_keep_collisions: bool = False
+    csp_allow_wrong_way: bool = True
+
+
+@slotted
+@dataclass
+class DynamicTrackSection(Section):
+    dyn_start: int = 95
+    dyn_random: int = 1
+    dyn_lap_gain: int = 15
+    dyn_transfer: int = 90
+
+
+@slotted
+@dataclass
+class AppSettings(Section):
+    """Preferencias do app (nao vao para os arquivos do servidor)."""
+    game_path: str = ""
+    server_path: str = ""
+    server_pack: bool = False
+    offline_install: bool = False
+    fuzzy_search: bool = False
+    sample_interval: float = 2.0
+    metrics_enabled: bool = False
+    metrics_port: int = 9310
+    metrics_host: str = "127.0.0.1"
+
+
+SECTIONS = (
+    ("server", ServerSection),
+    ("session", SessionSection),
+    ("realism", RealismSection),
+    ("weather", WeatherSection),
+    ("csp", CspSection),
+    ("dynamic_track", DynamicTrackSection),
+)
+
+
+@slotted
+@dataclass
+class ServerConfig:
+    """Configuracao completa de um evento; os nomes de campo sao unicos entre secoes."""
+    server: ServerSection = field(default_factory=ServerSection)
+    session: SessionSection = field(default_factory=SessionSection)
+    realism: RealismSection = field(default_factory=RealismSection)
+    weather: WeatherSection = field(default_factory=WeatherSection)
+    csp: CspSection = field(default_factory=CspSection)
+    dynamic_track: DynamicTrackSection = field(default_factory=DynamicTrackSection)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls().update(data)
+
+    @classmethod
+    def fields(cls):
+        """(secao, campo, tipo) de todos os campos, na ordem das secoes."""
+        return [(sec, name, kind) for sec, section in SECTIONS for name, kind in section.field_types().items()]
+
+    def sections(self):
+        return [getattr(self, sec) for sec, _ in SECTIONS]
+
+    def to_dict(self):
+        data = {}
+        for section in self.sections():
+            data.update(section.to_dict())
+        return data
+
+    def update(self, data):
+        for section in self.sections():
+            section.update(data)
+        return self
+
+    def copy(self):
+        return ServerConfig(*(section.copy() for section in self.sections()))
+
+    def diff(self, other):
+        changes = {}
+        for mine, theirs in zip(self.sections(), other.sections()):
+            changes.update(mine.diff(theirs))
+        return changes
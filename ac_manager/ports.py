@@ -0,0 +1,237 @@
+"""
+Portas UDP/TCP/HTTP das instancias do servidor.
+Junta as portas configuradas nas instancias com os sockets abertos na maquina
+(/proc/net no Linux), acha conflitos e entrega trios livres de um conjunto de
+intervalos.
+"""
+
+import os
+import bisect
+import socket
+
+
+GAME_RANGE = (9600, 9999)
+HTTP_RANGE = (8081, 8999)
+TCP_LISTEN = "0A"
+
+
+class PortConflict(ValueError):
+    pass
+
+
+class IntervalSet:
+    """Inteiros livres de [lo, hi], guardados como intervalos ordenados e disjuntos.
+
+    first/pop sao O(1) (o menor livre e o inicio do primeiro intervalo);
+    discard e O(log n) no numero de intervalos.
+    """
+
+    def __init__(self, lo, hi):
+        self.starts = [lo] if lo <= hi else []
+        self.ends = [hi] if lo <= hi else []
+
+    def __len__(self):
+        return sum(e - s + 1 for s, e in zip(self.starts, self.ends))
+
+    def __contains__(self, n):
+        i = bisect.bisect_right(self.starts, n) - 1
+        return i >= 0 and n <= self.ends[i]
+
+    def first(self):
+        return self.starts[0] if self.starts else None
+
+    def pop(self):
+        if not self.starts:
+            raise KeyError("conjunto vazio")
+        n = self.starts[0]
+        if n == self.ends[0]:
+            del self.starts[0], self.ends[0]
+        else:
+            self.starts[0] = n + 1
+        return n
+
+    def discard(self, n):
+        i = bisect.bisect_right(self.starts, n) - 1
+        if i < 0 or n > self.ends[i]:
+            return False
+        start, end = self.starts[i], self.ends[i]
+        if start == end:
+            del self.starts[i], self.ends[i]
+        elif n == start:
+            self.starts[i] = n + 1
+        elif n == end:
+            self.ends[i] = n - 1
+        else:
+            self.ends[i] = n - 1
+            self.starts.insert(i + 1, n + 1)
+            self.ends.insert(i + 1, end)
+        return True
+
+
+def instance_ports(config):
+    """(udp, tcp, http) de um ServerConfig."""
+    server = config.server
+    return server.udp_port, server.tcp_port, server.http_port
+
+
+def _group_pids(pid):
+    """`pid` e os processos do grupo dele (o servidor roda em sessao propria)."""
+    pids = {pid}
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return pids
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if len(fields) > 2 and fields[2] == str(pid):
+            pids.add(int(name))
+    return pids
+
+
+def _socket_inodes(pids):
+    inodes = set()
+    for pid in pids:
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inodes.add(target[8:-1])
+    return inodes
+
+
+def bound_ports(exclude_pids=()):
+    """{"tcp": portas em LISTEN, "udp": portas abertas} da maquina, via /proc/net.
+
+    Sockets dos processos de `exclude_pids` (e dos grupos deles) ficam de fora,
+    para um servidor rodando nao conflitar com as proprias portas. None se o
+    sistema nao tem /proc/net.
+    """
+    if not os.path.isdir("/proc/net"):
+        return None
+    skip = set()
+    if exclude_pids:
+        pids = set()
+        for pid in exclude_pids:
+            pids |= _group_pids(pid)
+        skip = _socket_inodes(pids)
+    ports = {"tcp": set(), "udp": set()}
+    for proto in ("tcp", "tcp6", "udp", "udp6"):
+        used = ports[proto[:3]]
+        try:
+            with open(f"/proc/net/{proto}", "r") as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10 or fields[9] in skip:
+                        continue
+                    if proto.startswith("tcp") and fields[3] != TCP_LISTEN:
+                        continue
+                    used.add(int(fields[1].rsplit(":", 1)[1], 16))
+        except OSError:
+            continue
+    return ports
+
+
+def can_bind(proto, port):
+    """Tenta abrir a porta (para sistemas sem /proc/net)."""
+    kind = socket.SOCK_DGRAM if proto == "udp" else socket.SOCK_STREAM
+    with socket.socket(socket.AF_INET, kind) as s:
+        try:
+            s.bind(("", port))
+        except OSError:
+            return False
+    return True
+
+
+def find_conflicts(ports, others=None, bound=None):
+    """Conflitos de um trio (udp, tcp, http).
+
+    `others` e {nome: (udp, tcp, http)} das outras instancias e `bound` o
+    retorno de bound_ports(). Devolve uma lista de mensagens (vazia = ok).
+    """
+    udp, tcp, http = ports
+    problems = []
+    if tcp == http:
+        problems.append(f"porta TCP e HTTP iguais ({tcp})")
+    for name, (o_udp, o_tcp, o_http) in (others or {}).items():
+        if udp == o_udp:
+            problems.append(f"UDP {udp} ja usada por {name}")
+        for label, port in (("TCP", tcp), ("HTTP", http)):
+            if port in (o_tcp, o_http):
+                problems.append(f"{label} {port} ja usada por {name}")
+    if bound is not None:
+        if udp in bound["udp"]:
+            problems.append(f"UDP {udp} ja aberta na maquina")
+        for label, port in (("TCP", tcp), ("HTTP", http)):
+            if port in bound["tcp"]:
+                problems.append(f"{label} {port} ja aberta na maquina")
+    return problems
+
+
+def check_ports(ports, others=None, bound=None):
+    problems = find_conflicts(ports, others, bound)
+    if problems:
+        raise PortConflict("Conflito de portas: " + "; ".join(problems))
+
+
+class PortAllocator:
+    """Entrega trios (udp, tcp, http) livres.
+
+    UDP e TCP usam o mesmo numero, como no padrao do AssettoServer (9600/9600).
+    """
+
+    def __init__(self, game_range=GAME_RANGE, http_range=HTTP_RANGE, probe=False):
+        self.game = IntervalSet(*game_range)
+        self.http = IntervalSet(*http_range)
+        self.probe = probe
+
+    @classmethod
+    def scan(cls, used=(), bound=None, **kw):
+        """Alocador sem as portas de `used` (trios) nem as abertas na maquina.
+
+        Sem /proc/net (bound=None), cada candidato e testado abrindo a porta.
+        """
+        alloc = cls(probe=bound is None, **kw)
+        for ports in used:
+            alloc.reserve(*ports)
+        if bound is not None:
+            for port in bound["udp"]:
+                alloc.game.discard(port)
+            for port in bound["tcp"]:
+                alloc.game.discard(port)
+                alloc.http.discard(port)
+        return alloc
+
+    def reserve(self, udp, tcp, http):
+        for port in {udp, tcp, http}:
+            self.game.discard(port)
+            self.http.discard(port)
+
+    def _take(self, pool, protos):
+        while True:
+            try:
+                port = pool.pop()
+            except KeyError:
+                raise PortConflict("Nenhuma porta livre na faixa configurada") from None
+            if not self.probe or all(can_bind(proto, port) for proto in protos):
+                return port
+
+    def allocate(self):
+        game = self._take(self.game, ("udp", "tcp"))
+        self.http.discard(game)
+        http = self._take(self.http, ("tcp",))
+        self.game.discard(http)
+        return game, game, http
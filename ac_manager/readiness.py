@@ -0,0 +1,159 @@
+"""
+Deteccao de quando o servidor recem-iniciado esta pronto.
+Consulta o endpoint HTTP /INFO (na http_port) e a porta TCP; se nenhuma responde,
+procura na saida capturada e nos logs do servidor a linha que ele escreve ao
+terminar de subir.
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import http.client
+from collections import namedtuple
+
+from .serverconfig import read_server_cfg, read_text
+
+
+READY_TIMEOUT = 120.0
+SLOW_START = 20.0
+POLL_INTERVAL = 0.25
+TCP_GRACE = 5.0
+
+# AssettoServer (ASP.NET / registro no lobby) e acServer
+READY_LINE = re.compile(r"Now listening on|Lobby registration successful|Server started", re.IGNORECASE)
+
+Readiness = namedtuple("Readiness", "via seconds info")
+
+
+def tcp_ready(host, port, timeout=1.0):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def http_info(host, port, timeout=1.0):
+    """Resposta de GET /INFO (dict, ou {} se nao for JSON); None se o servidor nao respondeu 200."""
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request("GET", "/INFO")
+        resp = conn.getresponse()
+        body = resp.read()
+        if resp.status != 200:
+            return None
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+    try:
+        info = json.loads(body.decode("utf-8", "replace"))
+    except ValueError:
+        return {}
+    return info if isinstance(info, dict) else {}
+
+
+class LogMatcher:
+    """Procura READY_LINE no que os logs de `log_dir` ganharam desde a criacao."""
+
+    def __init__(self, log_dir, pattern=READY_LINE):
+        self.log_dir = log_dir
+        self.pattern = pattern
+        self.offsets = {path: size for path, size in self._files()}
+        self._partial = {}
+
+    def _files(self):
+        try:
+            with os.scandir(self.log_dir) as it:
+                return [(e.path, e.stat().st_size) for e in it if e.is_file() and not e.name.endswith(".gz")]
+        except OSError:
+            return []
+
+    def feed(self, text):
+        return bool(self.pattern.search(text))
+
+    def check(self):
+        for path, size in self._files():
+            offset = self.offsets.get(path, 0)
+            if size < offset:
+                offset = 0  # Arquivo recriado
+            if size == offset:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read(size - offset)
+            except OSError:
+                continue
+            self.offsets[path] = size
+            text = self._partial.pop(path, "") + data.decode("utf-8", "replace")
+            lines = text.split("\n")
+            self._partial[path] = lines.pop()
+            if any(self.feed(line) for line in lines):
+                return True
+        return False
+
+
+class ReadinessProbe:
+    """Espera um ServerProcess ficar pronto; chamar como probe(proc, cancel) numa thread.
+
+    Pronto = /INFO responde; so a porta TCP aceitando conexao vale depois de
+    `tcp_grace` segundos (servidor sem HTTP); a linha de log (no console
+    capturado ou em `log_dir`) vale sempre.
+    Devolve Readiness(via, segundos desde o inicio do processo, info do /INFO).
+    """
+
+    def __init__(self, ports, host="127.0.0.1", log_dir=None, timeout=READY_TIMEOUT,
+                 interval=POLL_INTERVAL, tcp_grace=TCP_GRACE):
+        _, self.tcp_port, self.http_port = ports
+        self.host = host
+        self.log_dir = log_dir
+        self.timeout = timeout
+        self.interval = interval
+        self.tcp_grace = tcp_grace
+
+    @classmethod
+    def for_server(cls, server_path, **kw):
+        """Probe com as portas gravadas no server_cfg.ini da pasta (as que o servidor usa).
+
+        Se o arquivo nao pode ser lido (encoding, porta invalida) so a linha de log vale.
+        """
+        try:
+            values = read_server_cfg(read_text(os.path.join(server_path, "cfg", "server_cfg.ini")))
+        except (OSError, ValueError):  # UnicodeDecodeError e um ValueError
+            values = {}
+        ports = (values.get("udp_port"), values.get("tcp_port"), values.get("http_port"))
+        return cls(ports, log_dir=os.path.join(server_path, "logs"), **kw)
+
+    def __call__(self, proc, cancel):
+        pid, started = proc.pid, proc.started_at
+        logs = LogMatcher(self.log_dir) if self.log_dir else None
+        console = getattr(proc, "console", None)
+        seq = proc.console_mark if console is not None else 0
+        tcp_since = None
+        while True:
+            if proc.pid != pid or not proc.running:
+                raise RuntimeError("o servidor encerrou antes de ficar pronto")
+            now = time.monotonic()
+            if self.http_port:
+                info = http_info(self.host, self.http_port)
+                if info is not None:
+                    return Readiness("http", time.monotonic() - started, info)
+            if self.tcp_port and tcp_ready(self.host, self.tcp_port):
+                tcp_since = tcp_since or now
+                if now - tcp_since >= self.tcp_grace:
+                    return Readiness("tcp", time.monotonic() - started, None)
+            else:
+                tcp_since = None
+            if console is not None:
+                lines, seq, _ = console.since(seq)
+                if any(READY_LINE.search(text) for _, text in lines):
+                    return Readiness("log", time.monotonic() - started, None)
+            if logs is not None and logs.check():
+                return Readiness("log", time.monotonic() - started, None)
+            if now - started >= self.timeout:
+                raise TimeoutError(f"o servidor nao respondeu em {self.timeout:.0f}s")
+            if cancel.wait(self.interval):
+                raise RuntimeError("espera cancelada")
@@ -0,0 +1,257 @@
+"""
+Uso de recursos dos servidores supervisionados: CPU, memoria, threads, arquivos
+e sockets abertos e leitura/escrita em disco.
+Um job le /proc/<pid>/stat, status, io e fd/ de cada processo a cada intervalo e
+guarda cada metrica num buffer circular de tamanho fixo (array de doubles), entao
+horas de amostras ocupam sempre a mesma memoria. Sem /proc (Windows) nao ha amostras.
+"""
+
+import os
+import math
+import time
+import threading
+from array import array
+from collections import namedtuple
+
+
+PROC = "/proc"
+SAMPLE_INTERVAL = 2.0
+MIN_INTERVAL = 0.5
+SAMPLE_HISTORY = 1800
+SPARK_WIDTH = 40
+SPARKS = "".join(chr(0x2581 + i) for i in range(8))
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+CPU = "cpu"
+RSS = "rss"
+THREADS = "threads"
+FDS = "fds"
+SOCKETS = "sockets"
+READ = "read"
+WRITE = "write"
+METRICS = (CPU, RSS, THREADS, FDS, SOCKETS, READ, WRITE)
+
+# Contadores crus de uma leitura; ticks = utime + stime
+ProcStat = namedtuple("ProcStat", "ticks rss threads fds sockets read write")
+
+
+def proc_available(proc=PROC):
+    return os.path.isdir(os.path.join(proc, "self"))
+
+
+def read_proc(pid, proc=PROC):
+    """ProcStat do processo; None se ele nao existe mais (ou nao ha /proc)."""
+    base = f"{proc}/{pid}"
+    try:
+        with open(f"{base}/stat", "rb") as f:
+            # O nome do processo (campo 2) pode ter espacos: tudo depois do ultimo ")"
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open(f"{base}/status", "rb") as f:
+            status = f.read()
+        ticks = int(fields[11]) + int(fields[12])
+        threads = int(fields[17])
+    except (OSError, IndexError, ValueError):
+        return None
+    rss = 0
+    start = status.find(b"\nVmRSS:")
+    if start >= 0:
+        rss = int(status[start + 7:status.index(b"kB", start)]) * 1024
+    read = write = 0
+    try:
+        with open(f"{base}/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"read_bytes:"):
+                    read = int(line.split()[1])
+                elif line.startswith(b"write_bytes:"):
+                    write = int(line.split()[1])
+    except OSError:
+        pass  # io so pode ser lido pelo dono do processo
+    fds = sockets = 0
+    try:
+        names = os.listdir(f"{base}/fd")
+    except OSError:
+        names = []
+    for fd in names:
+        fds += 1
+        try:
+            if os.readlink(f"{base}/fd/{fd}").startswith("socket:"):
+                sockets += 1
+        except OSError:
+            pass
+    return ProcStat(ticks, rss, threads, fds, sockets, read, write)
+
+
+class Ring:
+    """Ultimos `size` valores num array de tamanho fixo; append nao aloca nada."""
+
+    __slots__ = ("data", "size", "count", "pos")
+
+    def __init__(self, size=SAMPLE_HISTORY, typecode="d"):
+        self.data = array(typecode, [0]) * size
+        self.size = size
+        self.count = 0
+        self.pos = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.data[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def values(self, n=None):
+        """Os `n` mais recentes (todos por padrao), do mais velho ao mais novo."""
+        n = self.count if n is None else min(n, self.count)
+        start = (self.pos - n) % self.size
+        if start + n <= self.size:
+            return self.data[start:start + n]
+        return self.data[start:] + self.data[:start + n - self.size]
+
+    def last(self):
+        return self.data[self.pos - 1] if self.count else None
+
+    def clear(self):
+        self.count = self.pos = 0
+
+
+def percentiles(values, ps=(50, 95, 99)):
+    """Percentis por posicao (nearest-rank); None para cada um se nao houver valores."""
+    ordered = sorted(values)
+    n = len(ordered)
+    if not n:
+        return tuple(None for _ in ps)
+    return tuple(ordered[min(n - 1, max(0, math.ceil(p / 100 * n) - 1))] for p in ps)
+
+
+def sparkline(values, width=SPARK_WIDTH, lo=None, hi=None):
+    """Os ultimos `width` valores como blocos de altura proporcional."""
+    values = values[-width:]
+    if not len(values):
+        return ""
+    lo = min(values) if lo is None else lo
+    hi = max(max(values), lo) if hi is None else hi
+    span = hi - lo
+    top = len(SPARKS) - 1
+    return "".join(SPARKS[min(top, max(0, int((v - lo) / span * top + 0.5)))] if span else SPARKS[0]
+                   for v in values)
+
+
+class ResourceHistory:
+    """Series de um servidor: um Ring por metrica e o instante de cada amostra.
+
+    CPU (% de um nucleo, como no top) e disco (bytes/s) saem da diferenca para a
+    leitura anterior do mesmo PID; a primeira leitura de cada processo so serve de base.
+    """
+
+    def __init__(self, size=SAMPLE_HISTORY):
+        self.times = Ring(size)
+        self.series = {metric: Ring(size) for metric in METRICS}
+        self.pid = None
+        self._prev = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, pid, stat, now):
+        """Registra a leitura; True se virou amostra."""
+        prev = self._prev if pid == self.pid else None
+        self.pid, self._prev = pid, (now, stat)
+        if prev is None or now <= prev[0]:
+            return False
+        dt = now - prev[0]
+        last = prev[1]
+        series = self.series
+        series[CPU].append(max(0, stat.ticks - last.ticks) / CLOCK_TICKS / dt * 100)
+        series[RSS].append(stat.rss)
+        series[THREADS].append(stat.threads)
+        series[FDS].append(stat.fds)
+        series[SOCKETS].append(stat.sockets)
+        series[READ].append(max(0, stat.read - last.read) / dt)
+        series[WRITE].append(max(0, stat.write - last.write) / dt)
+        self.times.append(now)
+        return True
+
+    def last(self, metric):
+        return self.series[metric].last()
+
+    def cpu_percentiles(self, ps=(50, 95, 99)):
+        return percentiles(self.series[CPU].values(), ps)
+
+    def summary(self):
+        """Linhas de texto (CPU e memoria com sparkline, depois os contadores)."""
+        if not len(self):
+            return []
+        cpu = self.series[CPU]
+        rss = self.series[RSS]
+        p50, p95, p99 = self.cpu_percentiles()
+        return [
+            f"CPU  {sparkline(cpu.values(SPARK_WIDTH), lo=0):<{SPARK_WIDTH}}  {cpu.last():5.1f}%"
+            f"   p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}",
+            f"RAM  {sparkline(rss.values(SPARK_WIDTH)):<{SPARK_WIDTH}}  {rss.last() / 1e6:5.0f} MB",
+            f"Threads {self.last(THREADS):.0f}  |  Sockets {self.last(SOCKETS):.0f}  |  "
+            f"Arquivos {self.last(FDS):.0f}  |  Disco L {self.last(READ) / 1e6:.2f} MB/s"
+            f"  E {self.last(WRITE) / 1e6:.2f} MB/s",
+        ]
+
+
+class ResourceSampler:
+    """Amostra os servidores vivos do Supervisor a cada `interval` segundos.
+
+    `run(job, _)` e o passo de um job dedicado (para quando o job e cancelado).
+    As historias ({nome: ResourceHistory}) sobrevivem aos reinicios; leituras de
+    outras threads passam por `summary`/`snapshot`, que usam o mesmo lock.
+    """
+
+    def __init__(self, supervisor, interval=SAMPLE_INTERVAL, history=SAMPLE_HISTORY, proc=PROC):
+        self.supervisor = supervisor
+        self.interval = interval
+        self.history = history
+        self.proc = proc
+        self.histories = {}
+        self.lock = threading.Lock()
+
+    @property
+    def available(self):
+        return proc_available(self.proc)
+
+    def sample(self, now=None):
+        """Le todos os processos vivos uma vez; nomes que ganharam amostra."""
+        now = time.monotonic() if now is None else now
+        sampled = []
+        for name, proc in list(self.supervisor.procs.items()):
+            pid = proc.pid
+            if pid is None or not proc.running:
+                continue
+            stat = read_proc(pid, self.proc)
+            if stat is None:
+                continue
+            with self.lock:
+                history = self.histories.get(name)
+                if history is None:
+                    history = self.histories[name] = ResourceHistory(self.history)
+                if history.add(pid, stat, now):
+                    sampled.append(name)
+        return sampled
+
+    def run(self, job, _):
+        while not job.cancel_event.wait(max(MIN_INTERVAL, self.interval)):
+            self.sample()
+
+    def summary(self, name):
+        with self.lock:
+            history = self.histories.get(name)
+            return history.summary() if history is not None else []
+
+    def snapshot(self):
+        """{nome: (pid, {metrica: ultimo valor}, (p50, p95, p99) da CPU)} das historias com amostras."""
+        with self.lock:
+            return {
+                name: (h.pid, {metric: h.last(metric) for metric in METRICS}, h.cpu_percentiles())
+                for name, h in self.histories.items() if len(h)
+            }
+
+    def forget(self, name):
+        with self.lock:
+            self.histories.pop(name, None)
@@ -0,0 +1,77 @@
+"""
+Leitura do conteudo do jogo em segundo plano.
+Cada tipo (carros/pistas) vira um job; os nomes chegam a interface em lotes.
+"""
+
+import os
+import functools
+
+from .catalog import iter_dirs
+
+
+SCAN_KINDS = ("cars", "tracks")
+
+
+class ContentScanner:
+    """Le content/cars e content/tracks como jobs de um JobScheduler.
+
+    Mensagens (on_message): (kind, "batch", [nomes]), (kind, "done",
+    [nomes ordenados]) e (kind, "meta", None) quando os ui_car.json /
+    ui_track.json foram todos lidos. Deve ser usado da thread da interface.
+    """
+
+    def __init__(self, catalog, jobs, batch_size=200):
+        self.catalog = catalog
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self._active = {}
+
+    def start(self, game_path, kinds=SCAN_KINDS, on_message=None, on_done=None):
+        """Inicia uma leitura; cancela a anterior dos mesmos tipos."""
+        for kind in kinds:
+            old = self._active.get(kind)
+            if old:
+                old.cancel()
+            self._active[kind] = self.jobs.submit(
+                f"scan:{kind}", functools.partial(self._scan, game_path, kind),
+                on_message=on_message, on_done=on_done,
+            )
+
+    def cancel(self):
+        for job in self._active.values():
+            job.cancel()
+        self._active.clear()
+
+    def busy(self):
+        return any(not job.done() for job in self._active.values())
+
+    def _scan(self, game_path, kind, job, _):
+        mtime, names = self.catalog.fresh_names(game_path, kind)
+        if names is None:
+            names = []
+            batch = []
+            for name in iter_dirs(os.path.join(game_path, "content", kind)):
+                job.check()
+                batch.append(name)
+                if len(batch) >= self.batch_size:
+                    job.emit((kind, "batch", batch))
+                    names.extend(batch)
+                    batch = []
+            if batch:
+                job.emit((kind, "batch", batch))
+                names.extend(batch)
+            job.check()
+            names = self.catalog.store_names(game_path, kind, mtime, names)
+            self.catalog.save()
+        else:
+            for i in range(0, len(names), self.batch_size):
+                job.check()
+                job.emit((kind, "batch", names[i:i + self.batch_size]))
+        job.emit((kind, "done", list(names)))
+        if kind == "tracks":
+            self.catalog.refresh_layouts(game_path, names, job.cancel_event)
+        else:
+            self.catalog.refresh_car_meta(game_path, names, job.cancel_event)
+        job.check()
+        self.catalog.save()
+        job.emit((kind, "meta", None))
@@ -0,0 +1,115 @@
+"""
+Indice de busca para listas grandes de nomes (carros).
+Nomes em minusculas ficam pre-calculados e cada trigrama aponta para os nomes que o contem.
+"""
+
+import bisect
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _subsequence_gaps(term, text):
+    """Quantos caracteres sobram entre as letras de `term` em `text`; None se nao casa."""
+    pos = -1
+    gaps = 0
+    for ch in term:
+        nxt = text.find(ch, pos + 1)
+        if nxt < 0:
+            return None
+        if pos >= 0:
+            gaps += nxt - pos - 1
+        pos = nxt
+    return gaps
+
+
+class SearchIndex:
+    def __init__(self, names=()):
+        self.clear()
+        for name in names:
+            self.add(name)
+
+    def clear(self):
+        self.names = []
+        self.lower = {}
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.lower
+
+    def add(self, name):
+        if name in self.lower:
+            return
+        bisect.insort(self.names, name)
+        low = name.lower()
+        self.lower[name] = low
+        for tri in _trigrams(low):
+            self.postings.setdefault(tri, set()).add(name)
+
+    def remove(self, name):
+        low = self.lower.pop(name, None)
+        if low is None:
+            return
+        i = bisect.bisect_left(self.names, name)
+        if i < len(self.names) and self.names[i] == name:
+            del self.names[i]
+        for tri in _trigrams(low):
+            names = self.postings.get(tri)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.postings[tri]
+
+    def matches(self, name, term):
+        return term.lower() in self.lower.get(name, name.lower())
+
+    def search(self, term, fuzzy=False):
+        """Nomes que contem `term` (sem diferenciar maiusculas), em ordem alfabetica.
+
+        Com fuzzy=True tambem entram nomes que tem as letras do termo em ordem,
+        e o resultado vem ordenado por relevancia (prefixo, inicio de palavra,
+        posicao do trecho e por ultimo a distancia entre as letras).
+        """
+        term = term.lower().strip()
+        if not term:
+            return list(self.names)
+
+        if len(term) >= 3:
+            sets = []
+            for tri in _trigrams(term):
+                names = self.postings.get(tri)
+                if not names:
+                    sets = None
+                    break
+                sets.append(names)
+            if sets:
+                sets.sort(key=len)
+                candidates = set.intersection(*sets)
+                hits = sorted(n for n in candidates if term in self.lower[n])
+            else:
+                hits = []
+        else:
+            hits = [n for n in self.names if term in self.lower[n]]
+
+        if not fuzzy:
+            return hits
+
+        ranked = []
+        for name in hits:
+            low = self.lower[name]
+            pos = low.find(term)
+            boundary = pos == 0 or not low[pos - 1].isalnum()
+            ranked.append(((0 if pos == 0 else 1 if boundary else 2, pos, 0), name))
+        seen = set(hits)
+        for name in self.names:
+            if name in seen:
+                continue
+            gaps = _subsequence_gaps(term, self.lower[name])
+            if gaps is not None:
+                ranked.append(((3, gaps, len(name)), name))
+        ranked.sort()
+        return [name for _, name in ranked]
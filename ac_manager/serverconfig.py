@@ -0,0 +1,452 @@
+"""
+Geracao dos arquivos de configuracao do servidor a partir de valores simples.
+Os campos tem os mesmos nomes do ac_manager_config.json (e das variaveis da
+interface), entao a interface e a linha de comando geram os mesmos arquivos.
+Nao depende de tkinter.
+"""
+
+import os
+import json
+import hashlib
+from collections import namedtuple
+from dataclasses import dataclass, field
+
+from .ini import IniDocument
+from .model import ABS_TC_OPTS, START_RULES, ServerConfig
+
+
+DEFAULTS = ServerConfig().to_dict()
+
+
+def config_values(data):
+    """DEFAULTS atualizado com os campos conhecidos de `data`, no tipo de cada campo."""
+    return ServerConfig.from_dict(data).to_dict()
+
+
+def grid_summary(server_cars):
+    """(modelos sem repeticao, total de slots) do grid."""
+    unique_cars = list(dict.fromkeys(c["model"] for c in server_cars))
+    return unique_cars, sum(c["qty"] for c in server_cars)
+
+
+IniField = namedtuple("IniField", "section key field codec default", defaults=(None, None, None))
+IniField.__doc__ = """Chave de um .ini ligada a um campo do modelo.
+
+key=None: o campo (bool) diz se a secao existe. field=None: a chave nao vem do
+modelo; so e escrita com `default` quando falta no arquivo.
+"""
+
+TEXT = (str, str)
+NUMBER = (str, int)
+FLAG = (lambda v: "1" if v else "0", lambda s: s == "1")
+ANGLE = (lambda v: f"{v:.0f}", float)
+
+
+def _option(options):
+    """Opcoes do tipo "1 - Fabrica": no arquivo vai so o numero."""
+    by_code = {o.split(" ")[0]: o for o in options}
+    return (lambda v: v.split(" ")[0], lambda s: by_code[s])
+
+
+CODECS = {str: TEXT, int: NUMBER, bool: FLAG, float: (str, float)}
+FIELD_TYPES = {name: kind for _, name, kind in ServerConfig.fields()}
+
+SERVER_CFG = (
+    IniField("SERVER", "NAME", "server_name"),
+    IniField("SERVER", "CARS", "cars", TEXT),
+    IniField("SERVER", "TRACK", "track_var"),
+    IniField("SERVER", "CONFIG_TRACK", "layout_var"),
+    IniField("SERVER", "SUN_ANGLE", "sun_angle", ANGLE),
+    IniField("SERVER", "PASSWORD", "server_password"),
+    IniField("SERVER", "ADMIN_PASSWORD", "admin_password"),
+    IniField("SERVER", "UDP_PORT", "udp_port"),
+    IniField("SERVER", "TCP_PORT", "tcp_port"),
+    IniField("SERVER", "HTTP_PORT", "http_port"),
+    IniField("SERVER", "MAX_BALLAST_KG", "max_ballast"),
+    IniField("SERVER", "QUALIFY_MAX_WAIT_PERC", "qualify_max_wait"),
+    IniField("SERVER", "RACE_PIT_WINDOW_START", "pit_window_start"),
+    IniField("SERVER", "RACE_PIT_WINDOW_END", "pit_window_end"),
+    IniField("SERVER", "REVERSED_GRID_RACE_POSITIONS", "reversed_grid"),
+    IniField("SERVER", "LOCKED_ENTRY_LIST", "locked_entry"),
+    IniField("SERVER", "PICKUP_MODE_ENABLED", "pickup_mode"),
+    IniField("SERVER", "LOOP_MODE", "loop_mode"),
+    IniField("SERVER", "SLEEP_TIME", "sleep_time"),
+    IniField("SERVER", "CLIENT_SEND_INTERVAL_HZ", "client_send_hz"),
+    IniField("SERVER", "SEND_BUFFER_SIZE", default="0"),
+    IniField("SERVER", "RACE_OVER_TIME", "race_over_time"),
+    IniField("SERVER", "KICK_QUORUM", "kick_quorum"),
+    IniField("SERVER", "VOTING_QUORUM", "voting_quorum"),
+    IniField("SERVER", "VOTE_DURATION", "vote_duration"),
+    IniField("SERVER", "BLACKLIST_MODE", default="1"),
+    IniField("SERVER", "FUEL_RATE", "fuel_rate"),
+    IniField("SERVER", "DAMAGE_MULTIPLIER", "damage_rate"),
+    IniField("SERVER", "TYRE_WEAR_RATE", "tyre_wear"),
+    IniField("SERVER", "ALLOWED_TYRES_OUT", "allowed_tyres_out"),
+    IniField("SERVER", "ABS_ALLOWED", "abs_mode", _option(ABS_TC_OPTS)),
+    IniField("SERVER", "TC_ALLOWED", "tc_mode", _option(ABS_TC_OPTS)),
+    IniField("SERVER", "STABILITY_ALLOWED", "stability_allowed"),
+    IniField("SERVER", "AUTOCLUTCH_ALLOWED", "autoclutch_allowed"),
+    IniField("SERVER", "TYRE_BLANKETS_ALLOWED", "tyre_blankets"),
+    IniField("SERVER", "FORCE_VIRTUAL_MIRROR", "force_virtual_mirror"),
+    IniField("SERVER", "START_RULE", "start_rule", _option(START_RULES)),
+    IniField("SERVER", "RACE_GAS_PENALTY_DISABLED", "race_gas_penalty",
+             (lambda v: "0" if v else "1", lambda s: s == "0")),
+    IniField("SERVER", "TIME_OF_DAY_MULT", "time_mult"),
+    IniField("SERVER", "RESULT_SCREEN_TIME", "result_screen_time"),
+    IniField("SERVER", "MAX_CONTACTS_PER_KM", "max_contacts_km"),
+    IniField("SERVER", "REGISTER_TO_LOBBY", "register_lobby"),
+    IniField("SERVER", "MAX_CLIENTS", "max_clients"),
+    IniField("SERVER", "NUM_THREADS", "num_threads"),
+    IniField("SERVER", "UDP_PLUGIN_LOCAL_PORT", default="0"),
+    IniField("SERVER", "UDP_PLUGIN_ADDRESS", default=""),
+    IniField("SERVER", "AUTH_PLUGIN_ADDRESS", default=""),
+    IniField("SERVER", "LEGAL_TYRES", "legal_tyres"),
+    IniField("SERVER", "PIT_SPEED_LIMIT", "pit_speed_limit"),
+    IniField("SERVER", "WELCOME_MESSAGE", "welcome_msg"),
+    IniField("SERVER", "EXTERNAL_SERVER_IP", default=""),
+    IniField("DYNAMIC_TRACK", "SESSION_START", "dyn_start"),
+    IniField("DYNAMIC_TRACK", "RANDOMNESS", "dyn_random"),
+    IniField("DYNAMIC_TRACK", "LAP_GAIN", "dyn_lap_gain"),
+    IniField("DYNAMIC_TRACK", "SESSION_TRANSFER", "dyn_transfer"),
+    IniField("BOOKING", None, "booking_enabled"),
+    IniField("BOOKING", "NAME", default="Booking"),
+    IniField("BOOKING", "TIME", "booking_time"),
+    IniField("PRACTICE", None, "practice_enabled"),
+    IniField("PRACTICE", "NAME", default="Practice"),
+    IniField("PRACTICE", "TIME", "practice_time"),
+    IniField("PRACTICE", "IS_OPEN", default="1"),
+    IniField("QUALIFY", None, "qualify_enabled"),
+    IniField("QUALIFY", "NAME", default="Qualify"),
+    IniField("QUALIFY", "TIME", "qualify_time"),
+    IniField("QUALIFY", "IS_OPEN", default="1"),
+    IniField("RACE", "NAME", default="Race"),
+    IniField("RACE", "LAPS", "race_laps"),
+    IniField("RACE", "WAIT_TIME", "race_wait_time"),
+    IniField("RACE", "IS_OPEN", default="1"),
+    IniField("WEATHER_0", "GRAPHICS", "weather_type"),
+    IniField("WEATHER_0", "BASE_TEMPERATURE_AMBIENT", "temp_ambient"),
+    IniField("WEATHER_0", "VARIATION_AMBIENT", "temp_var_ambient"),
+    IniField("WEATHER_0", "BASE_TEMPERATURE_ROAD", "temp_road"),
+    IniField("WEATHER_0", "VARIATION_ROAD", "temp_var_road"),
+    IniField("WEATHER_0", "WIND_BASE_SPEED_MIN", "wind_min"),
+    IniField("WEATHER_0", "WIND_BASE_SPEED_MAX", "wind_max"),
+    IniField("WEATHER_0", "WIND_BASE_DIRECTION", "wind_dir"),
+    IniField("WEATHER_0", "WIND_VARIATION_DIRECTION", "wind_var"),
+)
+
+CSP_EXTRA_OPTIONS = (
+    IniField("PITS_SPEED_LIMITER", "DISABLE_FORCED", "csp_disable_pit_limiter"),
+    IniField("PITS_SPEED_LIMITER", "SPEED_KMH", "csp_pit_speed"),
+    IniField("PITS_SPEED_LIMITER", "KEEP_COLLISIONS", "csp_keep_collisions"),
+    IniField("EXTRA_RULES", "ALLOW_WRONG_WAY", "csp_allow_wrong_way"),
+)
+
+
+def _codec(f):
+    return f.codec or CODECS[FIELD_TYPES[f.field]]
+
+
+def read_ini(schema, text):
+    """{campo: valor} das chaves do schema presentes em `text`; valores invalidos ficam de fora."""
+    doc = IniDocument.parse(text)
+    values = {}
+    for f in schema:
+        if f.field is None:
+            continue
+        if f.key is None:
+            values[f.field] = doc.has_section(f.section)
+            continue
+        raw = doc.get(f.section, f.key)
+        if raw is None:
+            continue
+        try:
+            values[f.field] = _codec(f)[1](raw)
+        except (KeyError, ValueError):
+            pass
+    return values
+
+
+def write_ini(schema, v, text=""):
+    """`text` com as chaves do schema atualizadas a partir de `v`.
+
+    Chaves cujo valor ja le igual nao sao tocadas, e o que o schema nao conhece
+    (comentarios, outras chaves, secoes WEATHER_1...) fica como estava. Um valor
+    que nao le no tipo do campo (TIME_OF_DAY_MULT=1.5 num campo inteiro) so e
+    regravado se o campo em `v` saiu do padrao.
+    """
+    doc = IniDocument.parse(text)
+    order = list(dict.fromkeys(f.section for f in schema))
+    dropped = set()
+    for f in schema:
+        if f.section in dropped:
+            continue
+        before = order[order.index(f.section) + 1:]
+        if f.key is None:
+            if not v[f.field]:
+                doc.remove_section(f.section)
+                dropped.add(f.section)
+            continue
+        current = doc.get(f.section, f.key)
+        if f.field is None:
+            if current is None:
+                doc.set(f.section, f.key, f.default, before)
+            continue
+        encode, decode = _codec(f)
+        value = v[f.field]
+        if current is not None:
+            try:
+                if decode(current) == value:
+                    continue
+            except (KeyError, ValueError):
+                # read_ini deixou o campo no padrao: se continua nele, o usuario nao mexeu
+                if value == DEFAULTS.get(f.field):
+                    continue
+        doc.set(f.section, f.key, encode(value), before)
+    return doc.dumps()
+
+
+def read_server_cfg(text):
+    return read_ini(SERVER_CFG, text)
+
+
+def render_server_cfg(v, server_cars, text=""):
+    """server_cfg.ini com os valores de `v`; `text` e o arquivo atual, se houver."""
+    unique_cars, _ = grid_summary(server_cars)
+    return write_ini(SERVER_CFG, dict(v, cars=";".join(unique_cars)), text)
+
+
+def read_csp_extra_options(text):
+    return read_ini(CSP_EXTRA_OPTIONS, text)
+
+
+def render_csp_extra_options(v, text=""):
+    return write_ini(CSP_EXTRA_OPTIONS, v, text)
+
+
+def update_extra_cfg(text, v):
+    """extra_cfg.yml com UseSteamAuth/EnableChecksums atualizados; o resto fica igual."""
+    steam_val = "true" if v["use_steam_auth"] else "false"
+    checksum_val = "true" if v["checksum_check"] else "false"
+    eol = "\r\n" if "\r\n" in text else "\n"
+    found_steam = False
+    found_checksum = False
+    new_lines = []
+    for line in text.splitlines(True):
+        if line.strip().startswith("UseSteamAuth"):
+            new_lines.append(f"UseSteamAuth: {steam_val}{eol}")
+            found_steam = True
+        elif line.strip().startswith("EnableChecksums"):
+            new_lines.append(f"EnableChecksums: {checksum_val}{eol}")
+            found_checksum = True
+        else:
+            new_lines.append(line)
+    if new_lines and not new_lines[-1].endswith("\n") and not (found_steam and found_checksum):
+        new_lines[-1] += eol
+    if not found_steam:
+        if not new_lines:
+            new_lines.append(f"# AssettoServer Extra Configuration{eol}")
+        new_lines.append(f"UseSteamAuth: {steam_val}{eol}")
+    if not found_checksum:
+        new_lines.append(f"EnableChecksums: {checksum_val}{eol}")
+    return "".join(new_lines)
+
+
+def car_skins(server_path, model):
+    skins_path = os.path.join(server_path, "content", "cars", model, "skins")
+    try:
+        with os.scandir(skins_path) as it:
+            return [e.name for e in it if e.is_dir()]
+    except OSError:
+        return []
+
+
+def render_entry_list(server_cars, skins_for):
+    """Texto do entry_list.ini e numero de slots; `skins_for(modelo)` lista as skins."""
+    lines = []
+    counter = 0
+    for item in server_cars:
+        model = item["model"]
+        skins = skins_for(model)
+
+        for i in range(item["qty"]):
+            skin = skins[i % len(skins)] if skins else "default"
+            lines.append(
+                f"[CAR_{counter}]\n"
+                f"MODEL={model}\n"
+                f"SKIN={skin}\n"
+                f"SPECTATOR_MODE=0\n"
+                f"DRIVERNAME=\n"
+                f"TEAM=\n"
+                f"GUID=\n"
+                f"BALLAST=0\n"
+                f"RESTRICTOR=0\n"
+            )
+            counter += 1
+    return "\n".join(lines), counter
+
+
+def read_text(path):
+    """Conteudo de `path` com as quebras de linha originais ("" se nao existir)."""
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def _digest(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).digest()
+    except FileNotFoundError:
+        return None
+
+
+def write_text(path, text, newline=None):
+    """Grava de forma atomica (arquivo temporario + os.replace); newline como em open()."""
+    if newline is None and os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(text.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_if_changed(path, text, newline=None):
+    """write_text so se o conteudo final for diferente do arquivo atual. True se gravou."""
+    data = text.replace("\n", os.linesep) if newline is None else text
+    if hashlib.sha1(data.encode("utf-8")).digest() == _digest(path):
+        return False
+    write_text(path, data, "")
+    return True
+
+
+def yaml_keys(text):
+    """Chaves de primeiro nivel "Chave: valor" de um YAML simples (extra_cfg.yml)."""
+    keys = {}
+    for line in text.splitlines():
+        if not line[:1].strip() or line.startswith(("#", "-")):
+            continue
+        key, sep, value = line.partition(":")
+        if sep:
+            keys[key.strip()] = value.strip()
+    return keys
+
+
+def ini_diff(old, new):
+    return IniDocument.parse(old).diff(IniDocument.parse(new))
+
+
+def yaml_diff(old, new):
+    mine, theirs = yaml_keys(old), yaml_keys(new)
+    return {
+        (None, key): (mine.get(key), theirs.get(key))
+        for key in dict.fromkeys([*mine, *theirs])
+        if mine.get(key) != theirs.get(key)
+    }
+
+
+@dataclass
+class SaveResult:
+    """Resultado de write_server_files.
+
+    `changes` e {caminho: {(secao, chave): (antes, depois)}} dos arquivos gravados;
+    secao e None no extra_cfg.yml e antes/depois None quando a chave nao existia.
+    """
+    written: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    changes: dict = field(default_factory=dict)
+
+    @property
+    def restart_needed(self):
+        # O servidor so le estes arquivos na partida
+        return any(self.changes.values())
+
+    def changed(self, path, section, key):
+        return (section, key) in self.changes.get(path, {})
+
+    def _save(self, path, text, old, diff):
+        # Arquivo que ja existia mantem as quebras de linha dele; novo sai com as do sistema
+        if write_if_changed(path, text, "" if old else None):
+            self.written.append(path)
+            self.changes[path] = diff(old, text)
+        else:
+            self.unchanged.append(path)
+
+
+def entry_list_cars(text):
+    """Grid do entry_list.ini: lista de {model, qty} na ordem das secoes CAR_n."""
+    counts = {}
+    doc = IniDocument.parse(text)
+    for name in doc.sections():
+        if name.startswith("CAR_"):
+            model = doc.get(name, "MODEL", "")
+            if model:
+                counts[model] = counts.get(model, 0) + 1
+    return [{"model": m, "qty": q} for m, q in counts.items()]
+
+
+def write_server_files(server_path, v, server_cars, entry_list=True):
+    """Grava server_cfg.ini, csp_extra_options.ini, extra_cfg.yml e (opcional)
+    entry_list.ini, pulando os que nao mudaram. Retorna um SaveResult."""
+    cfg_dir = os.path.join(server_path, "cfg")
+    os.makedirs(cfg_dir, exist_ok=True)
+    result = SaveResult()
+
+    path = os.path.join(cfg_dir, "server_cfg.ini")
+    old = read_text(path)
+    result._save(path, render_server_cfg(v, server_cars, old), old, ini_diff)
+
+    path = os.path.join(cfg_dir, "csp_extra_options.ini")
+    old = read_text(path)
+    result._save(path, render_csp_extra_options(v, old), old, ini_diff)
+
+    path = os.path.join(server_path, "extra_cfg.yml")
+    old = read_text(path)
+    result._save(path, update_extra_cfg(old, v), old, yaml_diff)
+
+    if entry_list:
+        write_entry_list(server_path, server_cars, result)
+    return result
+
+
+def write_entry_list(server_path, server_cars, result=None):
+    """Grava cfg/entry_list.ini (se mudou) com as skins que o servidor tem. Retorna o SaveResult."""
+    result = result or SaveResult()
+    cfg_dir = os.path.join(server_path, "cfg")
+    os.makedirs(cfg_dir, exist_ok=True)
+    text, _ = render_entry_list(server_cars, lambda model: car_skins(server_path, model))
+    path = os.path.join(cfg_dir, "entry_list.ini")
+    old = read_text(path)
+    result._save(path, text, old, ini_diff)
+    return result
+
+
+def load_event(path):
+    """Le a descricao do evento (JSON ou YAML). Aceita o ac_manager_config.json."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yml", ".yaml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("Arquivos YAML precisam do PyYAML: pip install pyyaml") from None
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: esperado um objeto com os campos do evento")
+    return data
+
+
+def event_cars(data):
+    """Grid do evento: lista de {model, qty}; aceita tambem so o nome do modelo."""
+    cars = []
+    for item in data.get("server_cars") or []:
+        if isinstance(item, str):
+            cars.append({"model": item, "qty": 1})
+        else:
+            cars.append({"model": str(item["model"]), "qty": int(item.get("qty", 1))})
+    return cars
@@ -0,0 +1,422 @@
+"""
+Supervisao dos processos do servidor.
+O executavel e iniciado direto (sem cmd.exe), numa sessao/grupo proprio, e o PID
+fica guardado. Parar manda o sinal de encerramento ao grupo, espera e so entao
+mata; se o processo cai sozinho ele e reiniciado com espera exponencial, e
+quedas demais em pouco tempo param as tentativas (crash loop).
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+import collections
+
+from .console import CONSOLE_DIR, CONSOLE_FILE, ConsoleBuffer, RotatingLog, capture
+
+SERVER_EXES = ("AssettoServer.exe", "acServer.exe", "AssettoServer")
+STOP_TIMEOUT = 10.0
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+CRASH_LIMIT = 5
+CRASH_WINDOW = 300.0
+STABLE_AFTER = 60.0
+
+STOPPED = "stopped"
+RUNNING = "running"
+STOPPING = "stopping"
+BACKOFF = "backoff"
+CRASHLOOP = "crashloop"
+
+WINDOWS = sys.platform == "win32"
+
+
+def find_server_exe(server_path):
+    for name in SERVER_EXES:
+        exe = os.path.join(server_path, name)
+        if os.path.isfile(exe):
+            return exe
+    return None
+
+
+def pid_alive(pid):
+    if not pid or pid <= 0:
+        return False
+    if WINDOWS:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x00100000 | 0x1000, False, pid)  # SYNCHRONIZE | QUERY_LIMITED
+        if not handle:
+            return False
+        try:
+            return kernel32.WaitForSingleObject(handle, 0) == 0x102  # WAIT_TIMEOUT
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # Zumbi (ja terminou, so falta o pai recolher) nao conta
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except (OSError, IndexError):
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _boot_id():
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def process_start(pid):
+    """Marca do inicio do processo, para reconhecer o mesmo processo depois.
+
+    Linux: boot atual + starttime (/proc/<pid>/stat, campo 22); Windows: hora de
+    criacao. None se o processo nao existe ou o sistema nao informa.
+    """
+    if not pid or pid <= 0:
+        return None
+    if WINDOWS:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # QUERY_LIMITED_INFORMATION
+        if not handle:
+            return None
+        try:
+            times = [wintypes.FILETIME() for _ in range(4)]
+            if not kernel32.GetProcessTimes(handle, *[ctypes.byref(t) for t in times]):
+                return None
+            return str(times[0].dwHighDateTime << 32 | times[0].dwLowDateTime)
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            starttime = f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+    return f"{_boot_id()}:{starttime}"
+
+
+def same_process(pid, start):
+    """True se `pid` ainda e o processo marcado com `start` (nao um PID reaproveitado)."""
+    return bool(start) and pid_alive(pid) and process_start(pid) == start
+
+
+def signal_group(pid, sig):
+    """Sinal para o grupo do servidor (iniciado em sessao propria) ou so para o PID."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(pid, sig)
+            return
+        except OSError:
+            pass
+    os.kill(pid, sig)
+
+
+def popen_options():
+    """Processo em grupo proprio: os sinais de parada chegam a ele (e aos filhos) e a mais ninguem."""
+    if WINDOWS:
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _graceful(pid):
+    if WINDOWS:
+        # Ctrl+Break e o "Ctrl+C" de um grupo de processos no Windows
+        os.kill(pid, signal.CTRL_BREAK_EVENT)
+    else:
+        signal_group(pid, signal.SIGTERM)
+
+
+def _kill(pid):
+    if WINDOWS:
+        os.kill(pid, signal.SIGTERM)  # TerminateProcess
+    else:
+        signal_group(pid, signal.SIGKILL)
+
+
+def terminate(process, timeout=STOP_TIMEOUT):
+    """Parada educada, `timeout` segundos de espera e depois kill. Devolve o codigo de saida."""
+    if process.poll() is not None:
+        return process.returncode
+    try:
+        _graceful(process.pid)
+    except OSError:
+        pass
+    try:
+        return process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        _kill(process.pid)
+    except OSError:
+        pass
+    return process.wait()
+
+
+def terminate_pid(pid, timeout=STOP_TIMEOUT, check=None):
+    """Como terminate(), para um processo de que so se tem o PID (iniciado por outro programa)."""
+    if not pid_alive(pid):
+        return False
+    try:
+        _graceful(pid)
+    except OSError:
+        pass
+    deadline = time.monotonic() + timeout
+    while pid_alive(pid) and time.monotonic() < deadline:
+        if check:
+            check()
+        time.sleep(0.1)
+    if pid_alive(pid):
+        try:
+            _kill(pid)
+        except OSError:
+            pass
+    return True
+
+
+def describe_event(event, data):
+    """Resumo de uma linha de um evento de ServerProcess.run."""
+    if event == "started":
+        return f"iniciando (PID {data})"
+    if event == "ready":
+        from .readiness import SLOW_START  # http.client so quando ha o que descrever
+
+        text = f"pronto em {data.seconds:.1f}s via {data.via.upper()}"
+        return text + " (inicio lento)" if data.seconds >= SLOW_START else text
+    if event == "unready":
+        return f"nao ficou pronto: {data}"
+    if event == "crashed":
+        code, delay = data
+        return f"caiu (codigo {code}), reiniciando em {delay:.0f}s"
+    if event == "crashloop":
+        return f"caiu (codigo {data}) vezes demais em pouco tempo, reinicio automatico suspenso"
+    code, requested = data
+    return "parado" if requested else f"encerrou (codigo {code})"
+
+
+class ServerProcess:
+    """Um servidor supervisionado.
+
+    run(emit) vigia o processo numa thread propria e manda eventos
+    (nome, evento, dado) para `emit`: "started" (pid), "exited" (codigo, parada
+    pedida), "crashed" (codigo, segundos ate reiniciar) e "crashloop" (codigo).
+    `probe(proc, cancel)`, se houver, e chamado pelo Supervisor a cada inicio e
+    devolve um Readiness; `startups` guarda os ultimos tempos ate ficar pronto.
+    Com `console` (ConsoleBuffer) stdout/stderr vao para ele em vez de herdar o
+    terminal do app; `console_mark` e o seq do buffer no inicio do processo atual.
+    """
+
+    def __init__(self, name, cmd, cwd=None, stop_timeout=STOP_TIMEOUT, auto_restart=True,
+                 backoff=BACKOFF_BASE, backoff_max=BACKOFF_MAX, crash_limit=CRASH_LIMIT,
+                 crash_window=CRASH_WINDOW, stable_after=STABLE_AFTER, popen_kw=None, probe=None,
+                 console=None):
+        self.name = name
+        self.cmd = list(cmd)
+        self.cwd = cwd
+        self.stop_timeout = stop_timeout
+        self.auto_restart = auto_restart
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.crash_limit = crash_limit
+        self.crash_window = crash_window
+        self.stable_after = stable_after
+        self.popen_kw = popen_kw or {}
+        self.probe = probe
+        self.console = console
+        self.console_mark = 0
+        self._readers = []
+        self.ready = None
+        self.startups = collections.deque(maxlen=20)
+        self.state = STOPPED
+        self.process = None
+        self.started_at = None
+        self.exit_code = None
+        self.restarts = 0
+        self.crashes = collections.deque()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<ServerProcess {self.name} {self.state} pid={self.pid}>"
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def launch(self):
+        """Inicia o processo; None se uma parada ja foi pedida."""
+        with self._lock:
+            if self.running:
+                return self.process.pid
+            if self._stop.is_set():
+                return None
+            kw = popen_options()
+            if self.console is not None:
+                kw.update(stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            kw.update(self.popen_kw)
+            self.process = subprocess.Popen(self.cmd, cwd=self.cwd, **kw)
+            if self.console is not None:
+                self.console_mark = self.console.seq
+                self._readers = capture(self.process, self.console)
+            self.started_at = time.monotonic()
+            self.ready = None
+            self.exit_code = None
+            self.state = RUNNING
+            return self.process.pid
+
+    def run(self, emit):
+        """Vigia ate uma parada pedida ou crash loop. Bloqueia a thread."""
+        if self.process is None and self.launch() is None:
+            return None
+        emit((self.name, "started", self.pid))
+        while True:
+            code = self.process.wait()
+            self.exit_code = code
+            for reader in self._readers:
+                # Ultimas linhas (o motivo da queda) antes do evento
+                reader.join(1.0)
+            if self._stop.is_set():
+                self.state = STOPPED
+                emit((self.name, "exited", (code, True)))
+                return code
+            if not self.auto_restart:
+                self.state = STOPPED
+                emit((self.name, "exited", (code, False)))
+                return code
+
+            now = time.monotonic()
+            if now - self.started_at >= self.stable_after:
+                # Rodou tempo suficiente: quedas antigas nao contam mais
+                self.crashes.clear()
+            self.crashes.append(now)
+            while self.crashes and now - self.crashes[0] > self.crash_window:
+                self.crashes.popleft()
+            if len(self.crashes) >= self.crash_limit:
+                self.state = CRASHLOOP
+                emit((self.name, "crashloop", code))
+                return code
+
+            delay = min(self.backoff * 2 ** (len(self.crashes) - 1), self.backoff_max)
+            self.state = BACKOFF
+            emit((self.name, "crashed", (code, delay)))
+            if self._stop.wait(delay) or self.launch() is None:
+                self.state = STOPPED
+                emit((self.name, "exited", (code, True)))
+                return code
+            self.restarts += 1
+            emit((self.name, "started", self.pid))
+
+    def stop(self, timeout=None):
+        """Para e espera (ate `timeout` + o kill). True se o processo estava rodando."""
+        with self._lock:
+            self._stop.set()
+            process = self.process
+        if process is None or process.poll() is not None:
+            self.state = STOPPED
+            return False
+        self.state = STOPPING
+        terminate(process, self.stop_timeout if timeout is None else timeout)
+        return True
+
+
+class Supervisor:
+    """Servidores supervisionados por nome, cada um vigiado por um job dedicado.
+
+    `on_event(nome, evento, dado)` roda na thread que chama JobScheduler.poll.
+    Com capture=True a saida de cada servidor vai para um ConsoleBuffer (que
+    sobrevive aos reinicios) e para <pasta>/logs/console/console.log.
+    Alem dos eventos de ServerProcess.run chegam "ready" (Readiness) e
+    "unready" (excecao) dos servidores iniciados com `probe`.
+    """
+
+    def __init__(self, jobs, on_event=None, capture=True, **defaults):
+        self.jobs = jobs
+        self.on_event = on_event
+        self.capture = capture
+        self.defaults = defaults
+        self.procs = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        return self.procs.get(name)
+
+    def running(self, name):
+        proc = self.procs.get(name)
+        return proc is not None and proc.running
+
+    def pids(self):
+        return [proc.pid for proc in list(self.procs.values()) if proc.running]
+
+    def start(self, name, cmd, cwd=None, **kw):
+        """Inicia (se ainda nao estiver rodando) e devolve o ServerProcess; o PID ja existe na volta."""
+        with self._lock:
+            proc = self.procs.get(name)
+            if proc is not None and (proc.running or proc.state == BACKOFF):
+                return proc
+            options = dict(self.defaults)
+            options.update(kw)
+            if self.capture and "console" not in options:
+                options["console"] = proc.console if proc is not None and proc.console else self._console(cwd)
+            proc = ServerProcess(name, cmd, cwd, **options)
+            proc.launch()
+            self.procs[name] = proc
+        self.jobs.submit(f"supervise:{name}", lambda job, _: proc.run(job.emit),
+                         dedicated=True, on_message=self._dispatch)
+        return proc
+
+    @staticmethod
+    def _console(cwd):
+        log = RotatingLog(os.path.join(cwd, CONSOLE_DIR, CONSOLE_FILE)) if cwd else None
+        return ConsoleBuffer(log=log)
+
+    def stop(self, name, timeout=None):
+        """Bloqueia ate o processo sair; rodar num job."""
+        proc = self.procs.get(name)
+        return proc.stop(timeout) if proc is not None else False
+
+    def restart(self, name, timeout=None):
+        proc = self.procs.get(name)
+        if proc is None:
+            raise KeyError(name)
+        proc.stop(timeout)
+        return self.start(name, proc.cmd, proc.cwd, probe=proc.probe, console=proc.console)
+
+    def stop_all(self, timeout=None):
+        for name in list(self.procs):
+            self.stop(name, timeout)
+
+    def _dispatch(self, message):
+        name, event, data = message
+        proc = self.procs.get(name)
+        if event == "started" and proc is not None and proc.probe is not None and proc.pid == data:
+            self.jobs.submit(f"ready:{name}", lambda job, _: proc.probe(proc, job.cancel_event),
+                             dedicated=True,
+                             on_done=lambda ready: self._ready(proc, ready),
+                             on_error=lambda e: self._event(name, "unready", e))
+        self._event(name, event, data)
+
+    def _ready(self, proc, ready):
+        proc.ready = ready
+        proc.startups.append(ready.seconds)
+        self._event(proc.name, "ready", ready)
+
+    def _event(self, name, event, data):
+        if self.on_event:
+            self.on_event(name, event, data)
@@ -0,0 +1,177 @@
+"""
+Leitura dos ui_*.json do conteudo (carros, pistas e layouts).
+Os arquivos de mods costumam ter virgulas sobrando; o leitor aqui aceita isso
+sem passar regex no texto.
+"""
+
+import os
+import json.decoder
+import json.scanner
+
+
+TRACK_META_KEYS = ("name", "pitboxes", "length", "width", "country", "tags", "run")
+
+_WS = " \t\n\r"
+_NUMBER = json.scanner.NUMBER_RE
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+def _skip(s, i):
+    n = len(s)
+    while i < n and s[i] in _WS:
+        i += 1
+    return i
+
+
+def _value(s, i):
+    ch = s[i:i + 1]
+    if ch == '"':
+        return json.decoder.scanstring(s, i + 1, False)
+    if ch == "{":
+        obj = {}
+        i = _skip(s, i + 1)
+        while s[i:i + 1] != "}":
+            if s[i:i + 1] != '"':
+                raise ValueError(f"Chave esperada na posicao {i}")
+            key, i = json.decoder.scanstring(s, i + 1, False)
+            i = _skip(s, i)
+            if s[i:i + 1] != ":":
+                raise ValueError(f"':' esperado na posicao {i}")
+            obj[key], i = _value(s, _skip(s, i + 1))
+            i = _skip(s, i)
+            if s[i:i + 1] == ",":
+                i = _skip(s, i + 1)
+            elif s[i:i + 1] != "}":
+                raise ValueError(f"',' ou '}}' esperado na posicao {i}")
+        return obj, i + 1
+    if ch == "[":
+        arr = []
+        i = _skip(s, i + 1)
+        while s[i:i + 1] != "]":
+            item, i = _value(s, i)
+            arr.append(item)
+            i = _skip(s, i)
+            if s[i:i + 1] == ",":
+                i = _skip(s, i + 1)
+            elif s[i:i + 1] != "]":
+                raise ValueError(f"',' ou ']' esperado na posicao {i}")
+        return arr, i + 1
+    m = _NUMBER.match(s, i)
+    if m:
+        integer, frac, exp = m.groups()
+        if frac or exp:
+            return float(integer + (frac or "") + (exp or "")), m.end()
+        return int(integer), m.end()
+    for word, val in _LITERALS.items():
+        if s.startswith(word, i):
+            return val, i + len(word)
+    raise ValueError(f"Valor invalido na posicao {i}")
+
+
+def loads_lenient(text):
+    """json.loads que aceita virgula antes de '}' e ']'."""
+    value, end = _value(text, _skip(text, 0))
+    if _skip(text, end) != len(text):
+        raise ValueError(f"Dados extras na posicao {end}")
+    return value
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        return loads_lenient(f.read())
+
+
+def _to_int(value):
+    try:
+        return int(float(str(value).strip()))
+    except (TypeError, ValueError):
+        return 0
+
+
+def read_track_meta(json_path):
+    """Metadados de um ui_track.json. Arquivo ilegivel vira pitboxes=0."""
+    try:
+        data = read_json(json_path)
+    except Exception:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    meta = {key: data.get(key, "") for key in TRACK_META_KEYS}
+    meta["pitboxes"] = _to_int(meta["pitboxes"])
+    tags = meta["tags"]
+    meta["tags"] = [str(t) for t in tags] if isinstance(tags, list) else []
+    for key in ("name", "length", "width", "country", "run"):
+        meta[key] = str(meta[key]).strip() if meta[key] is not None else ""
+    return meta
+
+
+def empty_track_meta():
+    meta = {key: "" for key in TRACK_META_KEYS}
+    meta["pitboxes"] = 0
+    meta["tags"] = []
+    return meta
+
+
+def read_car_meta(car_dir):
+    """Marca, classe e numero de skins de content/cars/<carro>."""
+    try:
+        data = read_json(os.path.join(car_dir, "ui", "ui_car.json"))
+    except Exception:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    skins = 0
+    try:
+        with os.scandir(os.path.join(car_dir, "skins")) as it:
+            skins = sum(1 for e in it if e.is_dir())
+    except OSError:
+        pass
+    return {
+        "brand": str(data.get("brand") or "").strip(),
+        "class": str(data.get("class") or "").strip(),
+        "skins": skins,
+    }
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan_layouts(ui_dir):
+    """Le os layouts de content/tracks/<pista>/ui.
+
+    Retorna ({layout: meta}, [[caminho relativo, mtime], ...]); a lista de
+    arquivos e usada pelo catalogo para saber quando reler.
+    """
+    if not os.path.isdir(ui_dir):
+        return {"": empty_track_meta()}, []
+
+    layouts = {}
+    files = []
+    try:
+        with os.scandir(ui_dir) as it:
+            items = sorted(e.name for e in it if e.is_dir())
+    except OSError:
+        items = []
+    for item in items:
+        files.append([item, _mtime(os.path.join(ui_dir, item))])
+        rel = os.path.join(item, "ui_track.json")
+        jf = os.path.join(ui_dir, rel)
+        mtime = _mtime(jf)
+        if mtime is not None:
+            layouts[item] = read_track_meta(jf)
+            files.append([rel, mtime])
+
+    if not layouts:
+        main_json = os.path.join(ui_dir, "ui_track.json")
+        mtime = _mtime(main_json)
+        if mtime is not None:
+            layouts[""] = read_track_meta(main_json)
+            files.append(["ui_track.json", mtime])
+        else:
+            layouts[""] = empty_track_meta()
+
+    return layouts, files
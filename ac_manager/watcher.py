@@ -0,0 +1,227 @@
+"""
+Observa as pastas de conteudo (carros/pistas do jogo e do servidor).
+No Linux usa inotify; nos demais sistemas compara fotos do scandir a cada intervalo.
+"""
+
+import os
+import sys
+import select
+import struct
+import ctypes
+import ctypes.util
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+DEEP_MASK = ROOT_MASK | IN_CLOSE_WRITE | IN_ATTRIB
+
+_EVENT = struct.Struct("iIII")
+
+
+def _subdirs(path):
+    try:
+        with os.scandir(path) as it:
+            return {e.name for e in it if e.is_dir()}
+    except OSError:
+        return set()
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ContentWatcher:
+    """Gera eventos (label, op, nome, nome_antigo) para a funcao `emit` de run().
+
+    `roots` e uma lista de (label, caminho, deep). Com deep=True (pistas) as
+    pastas ui/ de cada item tambem sao observadas e mudancas nelas viram
+    op="change". As demais ops sao "add", "remove", "rename" e "resync".
+    """
+
+    def __init__(self, roots, interval=2.0, use_inotify=None):
+        self.roots = [(label, path, deep) for label, path, deep in roots if os.path.isdir(path)]
+        self.interval = interval
+        self._stop = None
+        self._sink = None
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+        self._libc = self._load_libc() if use_inotify else None
+
+    @staticmethod
+    def _load_libc():
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            return libc
+        except (OSError, AttributeError):
+            return None
+
+    @property
+    def backend(self):
+        return "inotify" if self._libc else "polling"
+
+    def run(self, stop, emit):
+        """Observa ate `stop` (threading.Event) ser marcado. Bloqueia a thread."""
+        if not self.roots:
+            return
+        self._stop = stop
+        self._sink = emit
+        if self._libc:
+            self._run_inotify()
+        else:
+            self._run_polling()
+
+    def _emit(self, label, op, name, old=None):
+        self._sink((label, op, name, old))
+
+    def _snapshot(self, path, deep):
+        names = _subdirs(path)
+        if not deep:
+            return {name: None for name in names}
+        snap = {}
+        for name in names:
+            item = os.path.join(path, name)
+            snap[name] = (_mtime(item), _mtime(os.path.join(item, "ui")))
+        return snap
+
+    def _run_polling(self):
+        snaps = {label: self._snapshot(path, deep) for label, path, deep in self.roots}
+        while not self._stop.wait(self.interval):
+            for label, path, deep in self.roots:
+                new = self._snapshot(path, deep)
+                old = snaps[label]
+                for name in sorted(old.keys() - new.keys()):
+                    self._emit(label, "remove", name)
+                for name in sorted(new.keys() - old.keys()):
+                    self._emit(label, "add", name)
+                if deep:
+                    for name in sorted(new.keys() & old.keys()):
+                        if new[name] != old[name]:
+                            self._emit(label, "change", name)
+                snaps[label] = new
+
+    def _add_watch(self, fd, path, mask):
+        wd = self._libc.inotify_add_watch(fd, os.fsencode(path), mask)
+        return wd if wd >= 0 else None
+
+    def _watch_item(self, fd, watches, label, root, name):
+        """Observa <item>, <item>/ui e <item>/ui/<layout> de uma pista."""
+        item = os.path.join(root, name)
+        wd = self._add_watch(fd, item, DEEP_MASK)
+        if wd is not None:
+            watches[wd] = (label, name, "item")
+        ui = os.path.join(item, "ui")
+        wd = self._add_watch(fd, ui, DEEP_MASK)
+        if wd is not None:
+            watches[wd] = (label, name, "ui")
+            for layout in _subdirs(ui):
+                wd = self._add_watch(fd, os.path.join(ui, layout), DEEP_MASK)
+                if wd is not None:
+                    watches[wd] = (label, name, "layout")
+
+    def _run_inotify(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            self._libc = None
+            self._run_polling()
+            return
+        watches = {}
+        try:
+            for label, path, deep in self.roots:
+                wd = self._add_watch(fd, path, ROOT_MASK)
+                if wd is not None:
+                    watches[wd] = (label, None, path)
+                if deep:
+                    for name in _subdirs(path):
+                        self._watch_item(fd, watches, label, path, name)
+            deep_labels = {label: path for label, path, deep in self.roots if deep}
+
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._dispatch(fd, watches, deep_labels, data)
+        finally:
+            os.close(fd)
+
+    def _dispatch(self, fd, watches, deep_labels, data):
+        moved_from = {}
+        changed = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Fila do kernel estourou: avisa para reler tudo
+                for label, _, _ in self.roots:
+                    self._emit(label, "resync", None)
+                continue
+            watch = watches.get(wd)
+            if watch is None:
+                continue
+            if mask & IN_IGNORED:
+                del watches[wd]
+                continue
+            label, item, kind = watch
+
+            if item is not None:
+                if (label, item) not in changed:
+                    changed.append((label, item))
+                if kind in ("item", "ui") and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    root = deep_labels[label]
+                    self._watch_item(fd, watches, label, root, item)
+                continue
+
+            root = kind
+            if mask & (IN_CREATE | IN_MOVED_TO) and not os.path.isdir(os.path.join(root, name)):
+                # Arquivo solto na pasta (links para pastas contam como pasta)
+                continue
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = (label, name)
+            elif mask & IN_MOVED_TO:
+                old = moved_from.pop(cookie, None)
+                if old is not None:
+                    self._emit(label, "rename", name, old[1])
+                else:
+                    self._emit(label, "add", name)
+                if label in deep_labels:
+                    self._watch_item(fd, watches, label, root, name)
+            elif mask & IN_CREATE:
+                self._emit(label, "add", name)
+                if label in deep_labels:
+                    self._watch_item(fd, watches, label, root, name)
+            elif mask & IN_DELETE:
+                self._emit(label, "remove", name)
+
+        for label, old in moved_from.values():
+            self._emit(label, "remove", old)
+        for label, item in changed:
+            if os.path.isdir(os.path.join(deep_labels[label], item)):
+                self._emit(label, "change", item)
@@ -0,0 +1,78 @@
+import errno
+import os
+import sys
+import subprocess
+
+from ac_manager.console import STDOUT, ConsoleBuffer, RotatingLog, capture
+from ac_manager.supervisor import ServerProcess
+
+
+class FullDisk:
+    """Arquivo em que toda escrita falha como num disco cheio."""
+
+    def write(self, data):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_buffer_and_rotation(tmp_path):
+    log = RotatingLog(str(tmp_path / "console.log"), max_bytes=64, backups=2)
+    buffer = ConsoleBuffer(maxlen=3, log=log)
+    for i in range(10):
+        buffer.append(STDOUT, [f"linha {i:02d} " + "x" * 20])
+    lines, seq, lost = buffer.since(0)
+    assert [text[:8] for _, text in lines] == ["linha 07", "linha 08", "linha 09"]
+    assert (seq, lost) == (10, 7)
+    log.close()
+    assert log.files()[0] == str(tmp_path / "console.log")
+    assert len(log.files()) == 3
+
+
+def test_disk_error_turns_the_log_off(tmp_path):
+    log = RotatingLog(str(tmp_path / "console.log"))
+    log._file.close()
+    log._file = FullDisk()
+    buffer = ConsoleBuffer(log=log)
+    buffer.append(STDOUT, ["um"])
+    buffer.append(STDOUT, ["dois"])
+    assert log.error.errno == errno.ENOSPC
+    assert [text for _, text in buffer.since(0)[0]] == ["um", "dois"]
+
+
+def test_failed_rotation(tmp_path):
+    log = RotatingLog(str(tmp_path / "console.log"), max_bytes=10)
+    log.write(b"0123456789\n")
+    os.remove(log.path)  # a rotacao vai falhar no os.replace
+    log.write(b"mais\n")
+    assert isinstance(log.error, OSError)
+    log.write(b"e mais\n")
+    log.close()
+
+
+def test_server_survives_a_failing_log():
+    """Sem espaco em disco o servidor continua: a saida vai so para o buffer."""
+    buffer = ConsoleBuffer(maxlen=5000, log=FullDisk())
+    code = "import sys\nfor i in range(2000): print('linha', i); print('erro', i, file=sys.stderr)\n"
+    proc = ServerProcess("a", [sys.executable, "-c", code], auto_restart=False, console=buffer)
+    assert proc.run(lambda message: None) == 0
+    assert buffer.seq == 4000
+
+
+def test_pump_keeps_reading_when_append_raises():
+    class Exploding(ConsoleBuffer):
+        def append(self, stream, lines):
+            super().append(stream, lines)
+            raise RuntimeError("falha no consumidor")
+
+    buffer = Exploding()
+    process = subprocess.Popen([sys.executable, "-c", "for i in range(5000): print(i)"],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    for thread in capture(process, buffer):
+        thread.join(10)
+    assert process.wait(10) == 0
+    assert buffer.seq == 5000
@@ -0,0 +1,64 @@
+import os
+
+from ac_manager.deploy import MANIFEST_NAME, Deployer, walk_files
+
+
+def make_car(root):
+    for rel, data in {
+        "data.acd": b"acd",
+        "collider.kn5": b"collider",
+        "bmw.kn5": b"x" * 4096,
+        "ui/ui_car.json": b"{}",
+        "skins/red/ui_skin.json": b"{}",
+        "skins/red/livery.dds": b"y" * 1024,
+        "sfx/bmw.bank": b"z" * 2048,
+    }.items():
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def test_full_then_pack(tmp_path):
+    src, dst = str(tmp_path / "game"), str(tmp_path / "server")
+    make_car(src)
+    deployer = Deployer(workers=2)
+    result = deployer.deploy(src, dst)
+    assert result.copied == 7 and set(walk_files(dst)) == set(walk_files(src))
+
+    result = deployer.deploy_server_pack("cars", src, dst)
+    assert result.removed == 3
+    assert sorted(walk_files(dst)) == ["collider.kn5", "data.acd", "skins/red/ui_skin.json", "ui/ui_car.json"]
+    assert not os.path.exists(os.path.join(dst, "sfx"))
+
+
+def test_pack_over_copy_without_manifest(tmp_path):
+    """Pasta copiada antes do manifesto existir: as sobras saem e o que e igual nao e recopiado."""
+    src, dst = str(tmp_path / "game"), str(tmp_path / "server")
+    make_car(src)
+    Deployer(workers=2).deploy(src, dst)
+    os.remove(os.path.join(dst, MANIFEST_NAME))
+
+    result = Deployer(workers=2).deploy_server_pack("cars", src, dst)
+    assert (result.copied, result.skipped, result.removed) == (0, 4, 3)
+    assert sorted(walk_files(dst)) == ["collider.kn5", "data.acd", "skins/red/ui_skin.json", "ui/ui_car.json"]
+    assert os.path.isdir(os.path.join(dst, "skins", "red"))
+    assert not os.path.exists(os.path.join(dst, "sfx"))
+    assert os.path.exists(os.path.join(dst, MANIFEST_NAME))
+
+
+def test_full_copy_keeps_server_only_files(tmp_path):
+    """Copia completa sobre uma pasta feita a mao: o que so existe no servidor fica."""
+    src, dst = str(tmp_path / "game"), str(tmp_path / "server")
+    make_car(src)
+    Deployer(workers=2).deploy(src, dst)
+    os.remove(os.path.join(dst, MANIFEST_NAME))
+    extra = os.path.join(dst, "skins", "red", "server_only_skin.ini")
+    with open(extra, "w") as f:
+        f.write("[SKIN]\n")
+
+    result = Deployer(workers=2).deploy(src, dst)
+    assert (result.copied, result.skipped, result.removed) == (0, 7, 0)
+    assert os.path.exists(extra)
+    result = Deployer(workers=2).deploy(src, dst)
+    assert result.removed == 0 and os.path.exists(extra)
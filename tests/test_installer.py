@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.error import HTTPError
+
+import pytest
+
+from ac_manager.installer import InstallError, Installer, ReleaseAsset, ReleaseCache, fetch_release
+
+PAYLOAD = bytes(range(256)) * 512
+DIGEST = "sha256:" + hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class AssetHandler(BaseHTTPRequestHandler):
+    """Entrega PAYLOAD em /asset.zip, com ou sem suporte a Range, e a release em /latest."""
+
+    ranges = True
+    api_status = 200
+    etag = '"v1"'
+
+    def do_GET(self):
+        if self.path == "/latest":
+            return self.release()
+        self.requests.append((self.path, self.headers.get("Range")))
+        start = 0
+        if self.ranges and self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+        body = PAYLOAD[start:]
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def release(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.api_status == 200 and self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps({"tag_name": "v1.0.0", "assets": [
+            {"name": "assettoserver-linux-x64.tar.gz", "browser_download_url": self.url + "/linux", "size": 1},
+            {"name": "assettoserver-win-x64.zip", "browser_download_url": self.url + "/asset.zip",
+             "size": len(PAYLOAD), "digest": DIGEST},
+        ]}).encode()
+        self.send_response(self.api_status)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def github():
+    """Servidor local no lugar do GitHub; devolve a classe do handler (mude os atributos)."""
+    handler = type("Handler", (AssetHandler,), {"requests": []})
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    handler.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield handler
+    server.shutdown()
+    server.server_close()
+
+
+def asset(github, **kw):
+    kw.setdefault("size", len(PAYLOAD))
+    kw.setdefault("digest", DIGEST)
+    return ReleaseAsset(tag="v1.0.0", name="assettoserver-win-x64.zip", url=github.url + "/asset.zip", **kw)
+
+
+def installer():
+    return Installer(None, retries=0, timeout=5, chunk_size=4096)
+
+
+def test_download(github, tmp_path):
+    path = str(tmp_path / "server.zip")
+    progress = []
+    installer().download(asset(github), path, progress=lambda *a: progress.append(a))
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert not os.path.exists(path + ".part")
+    assert github.requests == [("/asset.zip", None)]
+    assert progress[-1][:3] == ("download", len(PAYLOAD), len(PAYLOAD))
+
+
+def test_download_resumes_part(github, tmp_path):
+    path = str(tmp_path / "server.zip")
+    with open(path + ".part", "wb") as f:
+        f.write(PAYLOAD[:50000])
+    installer().download(asset(github), path)
+    assert github.requests == [("/asset.zip", "bytes=50000-")]
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+
+
+def test_download_restarts_when_range_is_ignored(github, tmp_path):
+    github.ranges = False
+    path = str(tmp_path / "server.zip")
+    with open(path + ".part", "wb") as f:
+        f.write(b"lixo de uma versao anterior")
+    installer().download(asset(github), path)
+    assert github.requests == [("/asset.zip", "bytes=27-")]
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+
+
+def test_download_rejects_wrong_digest(github, tmp_path):
+    path = str(tmp_path / "server.zip")
+    bad = asset(github, digest="sha256:" + "0" * 64)
+    with pytest.raises(InstallError, match="sha256"):
+        installer().download(bad, path)
+    assert not os.path.exists(path) and not os.path.exists(path + ".part")
+
+
+def test_verify_rejects_size(tmp_path):
+    part = tmp_path / "server.zip.part"
+    part.write_bytes(PAYLOAD[:-1])
+    a = ReleaseAsset(tag="v1", name="x.zip", url="", size=len(PAYLOAD), digest=DIGEST)
+    with pytest.raises(InstallError, match="tamanho"):
+        Installer.verify(a, str(part), len(PAYLOAD) - 1, hashlib.sha256(PAYLOAD[:-1]).hexdigest())
+    assert not part.exists()
+    part.write_bytes(PAYLOAD)
+    Installer.verify(a, str(part), len(PAYLOAD), hashlib.sha256(PAYLOAD).hexdigest())
+    assert part.exists()
+
+
+def test_fetch_release_reuses_response_on_304(github, tmp_path):
+    cache = ReleaseCache(str(tmp_path))
+    first = fetch_release(github.url + "/latest", cache=cache)
+    assert first == asset(github)
+    assert first.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+    assert fetch_release(github.url + "/latest", cache=cache) == first
+    assert github.requests == [("/latest", None), ("/latest", '"v1"')]
+    # O indice sobrevive a uma instancia nova do cache
+    assert ReleaseCache(str(tmp_path)).api_entry(github.url + "/latest")[0] == '"v1"'
+
+
+@pytest.mark.parametrize("status", [403, 429, 502])
+def test_fetch_release_falls_back_to_cache(github, tmp_path, status):
+    cache = ReleaseCache(str(tmp_path))
+    first = fetch_release(github.url + "/latest", cache=cache)
+    github.api_status = status
+    assert fetch_release(github.url + "/latest", cache=cache) == first
+    with pytest.raises(HTTPError):
+        fetch_release(github.url + "/latest")
+
+
+def test_fetch_release_without_match(github):
+    with pytest.raises(InstallError, match="macos"):
+        fetch_release(github.url + "/latest", match="macos")
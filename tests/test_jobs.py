@@ -0,0 +1,58 @@
+import threading
+import time
+
+from ac_manager.jobs import CANCELLED, DONE, FAILED, JobScheduler
+
+
+def drain(jobs, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while jobs.poll():
+        assert time.monotonic() < deadline, "tempo esgotado"
+        time.sleep(0.01)
+
+
+def test_steps_and_callbacks():
+    jobs = JobScheduler(workers=2)
+    seen = []
+    job = jobs.submit("conta", lambda job, _: 1, lambda job, n: job.emit(n) or n + 1,
+                      on_message=seen.append, on_done=seen.append)
+    failed = jobs.submit("falha", lambda job, _: 1 / 0, on_error=lambda e: seen.append(type(e)))
+    drain(jobs)
+    assert (job.state, job.result, failed.state) == (DONE, 2, FAILED)
+    assert seen.count(1) == 1 and 2 in seen and ZeroDivisionError in seen
+    assert jobs.timing_snapshot()["conta"][0] == 1
+    jobs.shutdown()
+
+
+def test_lane_runs_in_order():
+    jobs = JobScheduler(workers=4)
+    order = []
+    for i in range(5):
+        jobs.submit(f"save:{i}", lambda job, _, i=i: time.sleep(0.01) or order.append(i), lane="save")
+    drain(jobs)
+    assert order == [0, 1, 2, 3, 4]
+    jobs.shutdown()
+
+
+def test_cancel_job_waiting_in_the_pool():
+    """Cancelado antes de pegar uma thread: nao roda e termina como cancelado."""
+    jobs = JobScheduler(workers=1)
+    release = threading.Event()
+    busy = jobs.submit("ocupa", lambda job, _: release.wait(10))
+    ran = []
+    waiting = jobs.submit("espera", lambda job, _: ran.append(True), on_cancel=lambda: ran.append(False))
+    waiting.cancel()
+    assert waiting.state == CANCELLED
+    release.set()
+    drain(jobs)
+    assert busy.state == DONE and ran == [False]
+    assert jobs.jobs() == []
+    jobs.shutdown()
+
+
+def test_process_pool():
+    jobs = JobScheduler(workers=1, processes=1)
+    job = jobs.submit_process("potencia", pow, 2, 10)
+    drain(jobs, timeout=30)
+    assert (job.state, job.result) == (DONE, 1024)
+    jobs.shutdown()
@@ -0,0 +1,109 @@
+import os
+import shutil
+
+import pytest
+
+from ac_manager.logparse import CONNECT, DISCONNECT, ERROR, KICK, LAP, LogAnalytics, LogTailer, parse_line
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+SAMPLE = "log-20240114.txt"
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Pasta de servidor com o log de exemplo (formato padrao de arquivo do Serilog)."""
+    os.makedirs(tmp_path / "logs")
+    shutil.copy(os.path.join(DATA, SAMPLE), tmp_path / "logs" / SAMPLE)
+    return tmp_path
+
+
+@pytest.mark.parametrize("line", [
+    "2024-01-14 23:58:40.877 +01:00 [INF] Mario (76561198000000001, 0 (bmw_m3_e30-red)) has connected",
+    "[2024-01-14 23:58:40.877 +01:00 INF] Mario (76561198000000001, 0 (bmw_m3_e30-red)) has connected",
+])
+def test_both_line_formats(line):
+    event = parse_line(line)
+    assert (event.kind, event.time, event.name, event.guid) == (
+        CONNECT, "2024-01-14 23:58:40", "Mario", "76561198000000001")
+
+
+def test_errors_and_non_events():
+    assert parse_line("2024-01-14 23:59:58.731 +01:00 [ERR] Error sending lobby update").kind == ERROR
+    assert parse_line("[2024-01-14 23:59:58.731 +01:00 FTL] Unhandled exception").kind == ERROR
+    assert parse_line("2024-01-14 23:59:40.550 +01:00 [WRN] Ana has a high ping (310ms)") is None
+    assert parse_line("2024-01-14 23:59:41.000 +01:00 [INF] CHAT: Ana: [ERR] nao e erro") is None
+    assert parse_line("   at System.Net.Http.HttpConnectionPool.ConnectToTcpHostAsync()") is None
+
+
+def test_sample_log(server):
+    tailer = LogTailer(str(server / "logs"))
+    events = tailer.poll()
+    assert [e.kind for e in events] == [CONNECT, CONNECT, ERROR, LAP, LAP, KICK, DISCONNECT, LAP]
+    laps = [e for e in events if e.kind == LAP]
+    assert [(e.name, e.lap_ms, e.detail) for e in laps] == [
+        ("Mario Rossi", 512345, "0 cortes"), ("Ana", 527120, "2 cortes"), ("Mario Rossi", 505100, "0 cortes")]
+    assert events[5].detail == "kicked: high ping"
+    assert tailer.poll() == []
+
+
+def test_analytics_resume(server, tmp_path):
+    state = str(tmp_path / "state.json")
+    analytics = LogAnalytics(state)
+    stats = analytics.watch("a", str(server))
+    assert analytics.poll()
+    assert stats.online == {"76561198000000001": "Mario Rossi"}
+    assert stats.leaderboard() == [("Mario Rossi", 505100, "2024-01-15 00:03:00"),
+                                   ("Ana", 527120, "2024-01-15 00:01:30")]
+    assert stats.errors == 1 and stats.last_error == "Error sending lobby update"
+    analytics.save()
+
+    with open(server / "logs" / SAMPLE, "a") as f:
+        f.write("2024-01-15 00:04:00.000 +01:00 [INF] Mario Rossi (76561198000000001) has disconnected\n")
+    again = LogAnalytics(state)
+    stats = again.watch("a", str(server))
+    found = again.poll()
+    assert [e.kind for e in found["a"]] == [DISCONNECT]
+    assert stats.online == {} and stats.laps == 3
+
+
+def test_poll_reads_in_chunks(server, tmp_path):
+    """Trechos sem eventos nao param a leitura: positions() mostra que o offset andou."""
+    with open(server / "logs" / SAMPLE, "a") as f:
+        f.writelines(f"2024-01-15 00:05:{i % 60:02d}.000 +01:00 [INF] Position update {i}\n" for i in range(500))
+        f.write("2024-01-15 00:06:00.000 +01:00 [ERR] Late failure\n")
+    tailer = LogTailer(str(server / "logs"))
+    total = []
+    while True:
+        before = dict(tailer.offsets)
+        total.extend(tailer.poll(limit=4096))
+        if tailer.offsets == before:
+            break
+    assert total[-1].detail == "Late failure"
+
+    analytics = LogAnalytics(str(tmp_path / "state.json"))
+    analytics.watch("a", str(server))
+    size = os.path.getsize(server / "logs" / SAMPLE)
+    analytics.poll()
+    assert analytics.positions() == {"a": {SAMPLE: size}}
+
+
+def test_line_longer_than_the_window(server):
+    with open(server / "logs" / SAMPLE, "a") as f:
+        f.write("2024-01-15 00:05:00.000 +01:00 [INF] " + "x" * 10000 + "\n")
+        f.write("2024-01-15 00:06:00.000 +01:00 [ERR] Late failure\n")
+        f.write("2024-01-15 00:07:00.000 +01:00 [INF] " + "y" * 10000)  # ainda sendo escrita
+    tailer = LogTailer(str(server / "logs"))
+    events = []
+    for _ in range(20):
+        events.extend(tailer.poll(limit=4096))
+    assert events[-1].detail == "Late failure"
+    assert [e.kind for e in events].count(ERROR) == 2
+
+
+def test_rotation_keeps_the_offset(server):
+    """Arquivo renomeado: o tailer reconhece o inode e nao le tudo de novo."""
+    tailer = LogTailer(str(server / "logs"))
+    assert tailer.poll()
+    os.rename(server / "logs" / SAMPLE, server / "logs" / "log-20240114-1.txt")
+    assert tailer.poll() == []
+    assert tailer.offsets["log-20240114-1.txt"][0] != 0
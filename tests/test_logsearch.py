@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import pytest
+
+from ac_manager.logsearch import INDEX_DIR, parse_query, search_logs
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+SAMPLE = "log-20240114.txt"
+
+
+@pytest.fixture
+def logs(tmp_path):
+    shutil.copy(os.path.join(DATA, SAMPLE), tmp_path / SAMPLE)
+    return {"a": str(tmp_path)}
+
+
+def lines(hits):
+    return [hit.line.split(" [", 1)[1] for _, hit in hits]
+
+
+def test_parse_query():
+    assert parse_query("piloto:Mario 76561198000000001 lobby") == (
+        ["name:mario", "76561198000000001"], ["lobby"])
+    assert parse_query("erro:") == (["error:*"], [])
+    # Numero comprido que nao e SteamID: procurado no arquivo, nao no indice
+    assert parse_query("123456789012345678") == ([], ["123456789012345678"])
+
+
+def test_indexed_search(logs):
+    hits, stats = search_logs(logs, "76561198000000002")
+    assert lines(hits) == [
+        "INF] Ana (76561198000000002, 1 (ks_mazda_mx5_cup)) has connected",
+        "INF] Ana (76561198000000002, 1 (ks_mazda_mx5_cup)) has disconnected",
+    ]
+    assert stats["indexed"] == 1
+    assert os.path.isdir(os.path.join(logs["a"], INDEX_DIR))
+
+    hits, _ = search_logs(logs, "erro:lobby")
+    assert lines(hits) == ["ERR] Error sending lobby update"]
+    hits, stats = search_logs(logs, "piloto:mario")
+    assert len(hits) == 3 and stats["indexed"] == 0
+
+
+def test_days_from_the_sample(logs):
+    hits, _ = search_logs(logs, "piloto:ana")
+    assert [hit.day for _, hit in hits] == ["2024-01-14", "2024-01-15", "2024-01-15", "2024-01-15"]
+    hits, _ = search_logs(logs, "piloto:ana", since="2024-01-15")
+    assert lines(hits)[0] == "INF] Lap completed by Ana, 2 cuts, laptime 8:47.120"
+    hits, _ = search_logs(logs, "lap", until="2024-01-14")
+    assert hits == []
+
+
+def test_scan_numbers_and_accents(logs):
+    with open(os.path.join(logs["a"], SAMPLE), "a", encoding="utf-8") as f:
+        f.write("2024-01-15 00:04:00.000 +01:00 [INF] JOÃO (76561198000000003, 2 (bmw)) has connected\n")
+        f.write("2024-01-15 00:04:01.000 +01:00 [INF] Session id 123456789012345678 created\n")
+    hits, _ = search_logs(logs, "joão")
+    assert lines(hits) == ["INF] JOÃO (76561198000000003, 2 (bmw)) has connected"]
+    hits, _ = search_logs(logs, "piloto:joão")
+    assert len(hits) == 1
+    hits, _ = search_logs(logs, "123456789012345678")
+    assert lines(hits) == ["INF] Session id 123456789012345678 created"]
+
+
+def test_scan_and_bracketed_format(logs):
+    with open(os.path.join(logs["a"], SAMPLE), "a") as f:
+        f.write("[2024-01-16 10:00:00.000 +01:00 ERR] Track checksum mismatch\n")
+    hits, _ = search_logs(logs, "erro:checksum")
+    assert [hit.day for _, hit in hits] == ["2024-01-16"]
+    # Texto livre: sem indice, procura no arquivo (inclusive nas linhas de stack trace)
+    hits, _ = search_logs(logs, "Connection refused")
+    assert [hit.line for _, hit in hits] == [
+        "System.Net.Http.HttpRequestException: Connection refused (lobby.assettocorsa.net:80)"]
@@ -0,0 +1,62 @@
+import socket
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from ac_manager.metrics import CONTENT_TYPE, MetricsServer
+
+
+class Exporter:
+    def render(self):
+        return b"ac_servers_running 1\n"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def metrics():
+    """MetricsServer num thread; devolve uma funcao que manda bytes e le a resposta."""
+    port = free_port()
+    job = SimpleNamespace(cancel_event=threading.Event())
+    thread = threading.Thread(target=MetricsServer(Exporter(), port).run, args=(job, None), daemon=True)
+    thread.start()
+
+    def request(data):
+        for _ in range(100):
+            try:
+                sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+                break
+            except ConnectionRefusedError:
+                threading.Event().wait(0.02)
+        with sock:
+            sock.sendall(data)
+            chunks = []
+            for buf in iter(lambda: sock.recv(65536), b""):
+                chunks.append(buf)
+        return b"".join(chunks)
+
+    yield request
+    job.cancel_event.set()
+    thread.join(5)
+
+
+def test_metrics(metrics):
+    reply = metrics(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert reply.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert f"Content-Type: {CONTENT_TYPE}".encode() in reply
+    assert reply.endswith(b"\r\n\r\nac_servers_running 1\n")
+    assert metrics(b"HEAD /metrics HTTP/1.1\r\n\r\n").endswith(b"Connection: close\r\n\r\n")
+    assert metrics(b"GET / HTTP/1.1\r\n\r\n").startswith(b"HTTP/1.1 404")
+    assert metrics(b"POST /metrics HTTP/1.1\r\n\r\n").startswith(b"HTTP/1.1 405")
+
+
+def test_line_too_long(metrics):
+    reply = metrics(b"GET /" + b"a" * 100000 + b" HTTP/1.1\r\n\r\n")
+    assert reply.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert metrics(b"GET /metrics HTTP/1.1\r\nX: " + b"b" * 100000 + b"\r\n\r\n").startswith(b"HTTP/1.1 400")
+    assert metrics(b"GET /metrics HTTP/1.1\r\n\r\n").startswith(b"HTTP/1.1 200")
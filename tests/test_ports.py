@@ -0,0 +1,86 @@
+import socket
+
+import pytest
+
+from ac_manager.ports import IntervalSet, PortAllocator, PortConflict, check_ports, find_conflicts
+
+
+def intervals(s):
+    return list(zip(s.starts, s.ends))
+
+
+def test_interval_set_discard_splits_and_trims():
+    s = IntervalSet(10, 20)
+    assert s.discard(15)
+    assert intervals(s) == [(10, 14), (16, 20)]
+    assert not s.discard(15) and 15 not in s
+    assert s.discard(10) and s.discard(20)
+    assert intervals(s) == [(11, 14), (16, 19)]
+    for n in (16, 17, 18, 19):
+        s.discard(n)
+    assert intervals(s) == [(11, 14)]
+    assert len(s) == 4 and 11 in s and 14 in s and 9 not in s
+    assert not s.discard(30) and not s.discard(5)
+
+
+def test_interval_set_pop_in_order():
+    s = IntervalSet(1, 5)
+    s.discard(1)
+    s.discard(3)
+    assert s.first() == 2
+    assert [s.pop() for _ in range(3)] == [2, 4, 5]
+    assert s.first() is None and len(s) == 0
+    with pytest.raises(KeyError):
+        s.pop()
+    assert len(IntervalSet(5, 4)) == 0
+
+
+def test_allocate_same_udp_and_tcp():
+    alloc = PortAllocator((9600, 9603), (8081, 8082))
+    assert alloc.allocate() == (9600, 9600, 8081)
+    assert alloc.allocate() == (9601, 9601, 8082)
+
+
+def test_scan_skips_used_and_bound():
+    used = [(9600, 9600, 8081), (9601, 9602, 8082)]
+    # UDP 9603 aberta por outro programa: a porta de jogo precisa estar livre nos dois protocolos
+    bound = {"udp": {9603}, "tcp": {9604, 8083}}
+    alloc = PortAllocator.scan(used, bound, game_range=(9600, 9610), http_range=(8081, 8090))
+    assert alloc.allocate() == (9605, 9605, 8084)
+
+
+def test_http_and_game_ranges_overlap():
+    alloc = PortAllocator((8000, 8002), (8000, 8002))
+    assert alloc.allocate() == (8000, 8000, 8001)
+    # Sobra 8002 para o jogo, mas nenhuma HTTP diferente dela
+    with pytest.raises(PortConflict, match="Nenhuma porta livre"):
+        alloc.allocate()
+
+
+def test_exhausted_range():
+    alloc = PortAllocator((9600, 9600), (8081, 8081))
+    alloc.reserve(9600, 9600, 8081)
+    with pytest.raises(PortConflict, match="Nenhuma porta livre"):
+        alloc.allocate()
+
+
+def test_probe_skips_ports_in_use():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as held:
+        held.bind(("", 0))
+        port = held.getsockname()[1]
+        with pytest.raises(PortConflict):
+            PortAllocator((port, port), (8081, 8999), probe=True).allocate()
+
+
+def test_find_conflicts():
+    others = {"b": (9600, 9600, 8081)}
+    assert find_conflicts((9601, 9601, 8082), others, {"udp": set(), "tcp": set()}) == []
+    assert find_conflicts((9600, 8081, 8081), others) == [
+        "porta TCP e HTTP iguais (8081)", "UDP 9600 ja usada por b",
+        "TCP 8081 ja usada por b", "HTTP 8081 ja usada por b",
+    ]
+    assert find_conflicts((9601, 9601, 8082), None, {"udp": {9601}, "tcp": {8082}}) == [
+        "UDP 9601 ja aberta na maquina", "HTTP 8082 ja aberta na maquina",
+    ]
+    with pytest.raises(PortConflict, match="UDP 9600"):
+        check_ports((9600, 9601, 8082), others)
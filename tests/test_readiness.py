@@ -0,0 +1,164 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from ac_manager.console import ConsoleBuffer, STDOUT
+from ac_manager.readiness import LogMatcher, ReadinessProbe, http_info, tcp_ready
+
+
+class InfoHandler(BaseHTTPRequestHandler):
+    status = 200
+    body = json.dumps({"name": "Teste", "clients": 0}).encode()
+
+    def do_GET(self):
+        self.send_response(self.status if self.path == "/INFO" else 404)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_stub():
+    """Servidor HTTP local; devolve um factory(status, body) -> porta."""
+    servers = []
+
+    def start(status=200, body=None):
+        handler = type("Handler", (InfoHandler,), {"status": status})
+        if body is not None:
+            handler.body = body
+        server = HTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def listener():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fake_proc(console=None):
+    """O que o probe le de um ServerProcess: pid, inicio, se esta rodando e o console."""
+    return SimpleNamespace(pid=1, started_at=time.monotonic(), running=True,
+                           console=console, console_mark=console.seq if console is not None else 0)
+
+
+def probe(tcp=None, http=None, **kw):
+    kw.setdefault("interval", 0.01)
+    kw.setdefault("timeout", 5)
+    return ReadinessProbe((None, tcp, http), **kw)
+
+
+def test_http_info(http_stub):
+    assert http_info("127.0.0.1", http_stub()) == {"name": "Teste", "clients": 0}
+    assert http_info("127.0.0.1", http_stub(body=b"ok")) == {}
+    assert http_info("127.0.0.1", http_stub(body=b"[1, 2]")) == {}
+    assert http_info("127.0.0.1", http_stub(status=503)) is None
+    assert http_info("127.0.0.1", free_port()) is None
+
+
+def test_tcp_ready(listener):
+    assert tcp_ready("127.0.0.1", listener)
+    assert not tcp_ready("127.0.0.1", free_port())
+
+
+def test_ready_via_http(http_stub):
+    ready = probe(http=http_stub())(fake_proc(), threading.Event())
+    assert ready.via == "http" and ready.info["name"] == "Teste"
+    assert 0 <= ready.seconds < 5
+
+
+def test_tcp_needs_grace_period(listener):
+    started = time.monotonic()
+    ready = probe(tcp=listener, http=free_port(), tcp_grace=0.2)(fake_proc(), threading.Event())
+    assert ready.via == "tcp" and ready.info is None
+    assert time.monotonic() - started >= 0.2
+
+
+def test_ready_via_console():
+    console = ConsoleBuffer()
+    console.append(STDOUT, ["Now listening on: http://0.0.0.0:8081"])  # de antes do inicio: nao vale
+    proc = fake_proc(console)
+    threading.Timer(0.1, console.append, (STDOUT, ["Lobby registration successful"])).start()
+    ready = probe()(proc, threading.Event())
+    assert ready.via == "log" and ready.seconds >= 0.1
+
+
+def test_ready_via_log_file(tmp_path):
+    log = tmp_path / "log-20240101.txt"
+    log.write_text("Now listening on: http://0.0.0.0:8081\n")  # antigo
+
+    def write():
+        with open(log, "a") as f:
+            f.write("2024-01-01 10:00:00.000 +00:00 [INF] Server started\n")
+
+    threading.Timer(0.1, write).start()
+    ready = probe(log_dir=str(tmp_path))(fake_proc(), threading.Event())
+    assert ready.via == "log"
+
+
+def test_log_matcher_waits_for_whole_lines(tmp_path):
+    log = tmp_path / "log.txt"
+    log.write_text("")
+    matcher = LogMatcher(str(tmp_path))
+    log.write_text("Now listen")
+    assert not matcher.check()
+    with open(log, "a") as f:
+        f.write("ing on: http://0.0.0.0:8081\n")
+    assert matcher.check()
+
+
+def test_timeout():
+    with pytest.raises(TimeoutError):
+        probe(tcp=free_port(), http=free_port(), timeout=0.1)(fake_proc(), threading.Event())
+
+
+def test_process_exit_and_cancel():
+    proc = fake_proc()
+    proc.running = False
+    with pytest.raises(RuntimeError, match="encerrou"):
+        probe()(proc, threading.Event())
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RuntimeError, match="cancelada"):
+        probe()(fake_proc(), cancel)
+
+
+def test_for_server_reads_ports(tmp_path):
+    (tmp_path / "cfg").mkdir()
+    (tmp_path / "cfg" / "server_cfg.ini").write_text("[SERVER]\nUDP_PORT=9600\nTCP_PORT=9601\nHTTP_PORT=8081\n")
+    p = ReadinessProbe.for_server(str(tmp_path))
+    assert (p.tcp_port, p.http_port) == (9601, 8081)
+    assert p.log_dir == str(tmp_path / "logs")
+
+
+def test_for_server_falls_back_to_logs(tmp_path):
+    (tmp_path / "cfg").mkdir()
+    # Salvo por outro editor em Latin-1, nao UTF-8
+    (tmp_path / "cfg" / "server_cfg.ini").write_bytes(b"[SERVER]\nNAME=Caf\xe9\nTCP_PORT=9601\n")
+    p = ReadinessProbe.for_server(str(tmp_path))
+    assert (p.tcp_port, p.http_port) == (None, None)
+    assert p.log_dir == str(tmp_path / "logs")
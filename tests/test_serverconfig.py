@@ -0,0 +1,18 @@
+from ac_manager.serverconfig import DEFAULTS, read_server_cfg, render_server_cfg
+
+CFG = "; editado a mao\n[SERVER]\nNAME=Teste\nTIME_OF_DAY_MULT=1.5\nMAX_CLIENTS=abc\nCUSTOM=sim\n"
+
+
+def values(**kw):
+    return dict(DEFAULTS, **read_server_cfg(CFG), **kw)
+
+
+def test_unparsed_values_are_kept():
+    out = render_server_cfg(values(), [], CFG)
+    assert out.startswith("; editado a mao\n[SERVER]\nNAME=Teste\nTIME_OF_DAY_MULT=1.5\nMAX_CLIENTS=abc\nCUSTOM=sim\n")
+
+
+def test_changed_field_replaces_unparsed_value():
+    out = render_server_cfg(values(time_mult=4), [], CFG)
+    assert "TIME_OF_DAY_MULT=4\n" in out and "MAX_CLIENTS=abc\n" in out
+    assert read_server_cfg(out)["time_mult"] == 4
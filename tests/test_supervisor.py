@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import subprocess
+
+import pytest
+
+from ac_manager.console import CONSOLE_DIR, CONSOLE_FILE, STDERR, STDOUT
+from ac_manager.jobs import JobScheduler
+from ac_manager.supervisor import (
+    BACKOFF, CRASHLOOP, RUNNING, STOPPED, ServerProcess, Supervisor, WINDOWS,
+    pid_alive, popen_options, process_start, same_process, terminate_pid,
+)
+
+
+def child(code):
+    """Comando que roda `code` num Python novo (o "servidor" dos testes)."""
+    return [sys.executable, "-c", code]
+
+
+SLEEPER = child("import time; time.sleep(60)")
+
+
+def wait_until(cond, timeout=10.0, poll=None):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            raise AssertionError("tempo esgotado")
+        if poll:
+            poll()
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def jobs():
+    jobs = JobScheduler(workers=2)
+    yield jobs
+    jobs.shutdown()
+
+
+def test_start_and_stop(jobs, tmp_path):
+    events = []
+    sup = Supervisor(jobs, on_event=lambda name, event, data: events.append((name, event, data)))
+    proc = sup.start("a", SLEEPER, str(tmp_path))
+    assert proc.state == RUNNING and proc.running and pid_alive(proc.pid)
+    assert sup.start("a", SLEEPER, str(tmp_path)) is proc
+    assert sup.pids() == [proc.pid]
+
+    pid = proc.pid
+    assert sup.stop("a", timeout=5)
+    wait_until(lambda: ("a", "exited") in [e[:2] for e in events], poll=jobs.poll)
+    assert proc.state == STOPPED and not proc.running and not pid_alive(pid)
+    assert events[0] == ("a", "started", pid)
+    assert events[-1][2][1] is True  # parada pedida
+    assert not sup.stop("a")
+    assert sup.pids() == []
+
+
+def test_exit_without_restart():
+    events = []
+    proc = ServerProcess("a", child("raise SystemExit(7)"), auto_restart=False)
+    assert proc.run(events.append) == 7
+    assert proc.state == STOPPED and proc.exit_code == 7
+    assert [e[1] for e in events] == ["started", "exited"]
+    assert events[-1][2] == (7, False)
+
+
+def test_backoff_until_crashloop():
+    events = []
+    proc = ServerProcess("a", child("raise SystemExit(3)"), backoff=0.05, crash_limit=4)
+    assert proc.run(events.append) == 3
+    assert proc.state == CRASHLOOP
+    assert proc.restarts == 3
+    assert [e[1] for e in events] == ["started", "crashed"] * 3 + ["started", "crashloop"]
+    delays = [data[1] for _, event, data in events if event == "crashed"]
+    assert delays == [0.05, 0.1, 0.2]
+
+
+def test_backoff_is_capped():
+    events = []
+    proc = ServerProcess("a", child("raise SystemExit(1)"), backoff=0.02, backoff_max=0.05, crash_limit=5)
+    proc.run(events.append)
+    assert [data[1] for _, event, data in events if event == "crashed"] == [0.02, 0.04, 0.05, 0.05]
+
+
+def test_stable_run_forgets_old_crashes():
+    events = []
+    proc = ServerProcess("a", child("raise SystemExit(1)"), backoff=0.01, crash_limit=2, stable_after=0)
+    proc.crashes.extend([time.monotonic()] * 5)
+
+    # Com stable_after=0 toda queda conta como a primeira: sem crash loop ate pararem o processo
+    def emit(message):
+        events.append(message)
+        if len(events) >= 6:
+            proc._stop.set()
+
+    proc.run(emit)
+    assert "crashloop" not in [e[1] for e in events]
+    assert {data[1] for _, event, data in events if event == "crashed"} == {0.01}
+
+
+def test_stop_during_backoff(jobs):
+    events = []
+    sup = Supervisor(jobs, capture=False, backoff=30,
+                     on_event=lambda name, event, data: events.append(event))
+    proc = sup.start("a", child("raise SystemExit(2)"))
+    wait_until(lambda: proc.state == BACKOFF)
+    assert sup.start("a", SLEEPER) is proc  # esperando para reiniciar: nao inicia outro
+    assert not sup.stop("a")
+    wait_until(lambda: "exited" in events, poll=jobs.poll)
+    assert proc.state == STOPPED and proc.restarts == 0
+
+
+def test_console_capture(jobs, tmp_path):
+    events = []
+    sup = Supervisor(jobs, auto_restart=False, on_event=lambda name, event, data: events.append(event))
+    proc = sup.start("a", child("import sys; print('ola'); print('erro', file=sys.stderr)"), str(tmp_path))
+    wait_until(lambda: "exited" in events, poll=jobs.poll)
+    lines, seq, lost = proc.console.since(0)
+    assert (STDOUT, "ola") in lines and (STDERR, "erro") in lines
+    assert seq == 2 and lost == 0
+    assert (tmp_path / CONSOLE_DIR / CONSOLE_FILE).exists()
+
+
+@pytest.mark.skipif(WINDOWS, reason="grupos de processos POSIX")
+def test_stop_kills_the_whole_group(tmp_path):
+    """Servidor que ignora SIGTERM e deixa um filho: o kill depois do prazo pega os dois."""
+    pidfile = tmp_path / "filho.pid"
+    code = (
+        "import signal, subprocess, sys, time\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        "p = subprocess.Popen([sys.executable, '-c', "
+        "'import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)'])\n"
+        f"open({str(pidfile)!r}, 'w').write(str(p.pid))\n"
+        "time.sleep(60)\n"
+    )
+    proc = ServerProcess("a", child(code), stop_timeout=0.5)
+    proc.launch()
+    wait_until(lambda: pidfile.exists() and pidfile.read_text())
+    grandchild = int(pidfile.read_text())
+    assert pid_alive(grandchild)
+
+    started = time.monotonic()
+    assert proc.stop()
+    assert time.monotonic() - started >= 0.5
+    assert proc.process.returncode == -9
+    wait_until(lambda: not pid_alive(grandchild), timeout=5)
+
+
+@pytest.mark.skipif(WINDOWS, reason="grupos de processos POSIX")
+def test_terminate_pid_of_foreign_process():
+    process = subprocess.Popen(SLEEPER, **popen_options())
+    try:
+        assert terminate_pid(process.pid, timeout=5)
+        assert process.wait(5) is not None
+        assert not terminate_pid(process.pid)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="precisa de /proc")
+def test_same_process_rejects_reused_pid():
+    pid = os.getpid()
+    start = process_start(pid)
+    assert start and same_process(pid, start)
+    assert not same_process(pid, start + "0")
+    assert not same_process(pid, "")